@@ -0,0 +1,216 @@
+import asyncio
+import os
+import time
+from urllib.parse import parse_qs
+
+from asgiref.wsgi import WsgiToAsgi
+from werkzeug.datastructures import MIMEAccept
+from werkzeug.http import parse_accept_header, parse_etags
+
+import live_timing
+import metrics
+import poller
+import position
+import server
+from stream import format_sse
+from wire_format import preferred_format
+
+# Single-process async entry point for all three services.
+#
+#   uvicorn asgi:app --host 0.0.0.0 --port 5000      (or: python asgi.py)
+#
+# Run as `python asgi.py` (as f1_api.service does) it reports READY=1 to systemd
+# once uvicorn is listening.
+#
+# The hot routes are answered directly on the event loop from the in-memory
+# snapshots and pre-encoded responses, and the SSE stream uses asyncio queues,
+# so idle or slow clients cost no threads. A live view not yet encoded for the
+# current snapshot (a new filter combination) is built and compressed on a
+# worker thread, so it never stalls the loop. /f1info.json never blocks: it is
+# served from the refresh-ahead cache, or answered with "warming" while
+# server.py loads it in the background. Anything else is handed to the owning
+# Flask app on a worker thread, so every existing route keeps working unchanged.
+
+CORS_HEADERS = [(b"access-control-allow-origin", b"*")]
+
+
+# Pick the Flask app that owns a path
+def wsgi_dispatch(environ, start_response):
+    path = environ.get("PATH_INFO", "")
+    if path.startswith("/live_session_data"):
+        return live_timing.app(environ, start_response)
+    if path.startswith("/position"):
+        return position.app(environ, start_response)
+    return server.app(environ, start_response)
+
+
+wsgi_fallback = WsgiToAsgi(wsgi_dispatch)
+
+
+def request_header(scope, name):
+    for key, value in scope["headers"]:
+        if key == name:
+            return value.decode("latin-1")
+    return None
+
+
+# Wire format ("json" or "msgpack") from ?format= and the Accept header
+def request_format(scope):
+    query = parse_qs(scope.get("query_string", b"").decode("latin-1"))
+    accept = parse_accept_header(request_header(scope, b"accept"), MIMEAccept)
+    return preferred_format(query.get("format", [None])[0], accept)
+
+
+async def send_response(send, status, headers, body, more_body=False):
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [(key.lower().encode("latin-1"), value.encode("latin-1")) for key, value in headers] + CORS_HEADERS,
+    })
+    await send({"type": "http.response.body", "body": body, "more_body": more_body})
+
+
+async def send_encoded(scope, send, encoded):
+    status, headers, body = encoded.respond(
+        parse_etags(request_header(scope, b"if-none-match")),
+        parse_accept_header(request_header(scope, b"accept-encoding")),
+    )
+    headers.append(("Content-Length", str(len(body))))
+    if scope["method"] == "HEAD":
+        body = b""
+    await send_response(send, status, headers, body)
+
+
+async def send_json(send, status, payload, headers=()):
+    body = server.app.json.dumps(payload).encode("utf-8")
+    await send_response(send, status, [("Content-Type", "application/json"), *headers], body)
+
+
+async def f1info(scope, receive, send):
+    try:
+        info = server.current_f1info()
+        if info is None:
+            await send_json(send, 503, server.WARMING_RESPONSE, [("Retry-After", "5")])
+            return
+        encoded = server.f1info_response(info, request_format(scope))
+    except Exception as e:
+        print(f"ERROR generating F1 JSON data: {e}")
+        await send_json(send, 500, {"error": "Could not retrieve F1 data."})
+        return
+    await send_encoded(scope, send, encoded)
+
+
+# Encoded live view from the cache, or built off the event loop on a miss
+async def live_view(snapshot, session_filter, driver_filter, fmt="json"):
+    encoded = live_timing.cached_live_response(snapshot, session_filter, driver_filter, fmt)
+    if encoded is None:
+        encoded = await asyncio.get_running_loop().run_in_executor(
+            None, live_timing.live_response, snapshot, session_filter, driver_filter, fmt)
+    return encoded
+
+
+async def live_session_data(scope, receive, send, session_filter, driver_filter):
+    snapshot = live_timing.current_snapshot
+    encoded = await live_view(snapshot, session_filter, driver_filter, request_format(scope))
+    await send_encoded(scope, send, encoded)
+
+
+async def live_session_stream(scope, receive, send, session_filter, driver_filter):
+    loop = asyncio.get_running_loop()
+    subscriber = live_timing.live_stream.subscribe((session_filter, driver_filter), loop=loop)
+    snapshot = await live_view(live_timing.current_snapshot, session_filter, driver_filter)
+    disconnected = asyncio.Event()
+
+    async def watch_disconnect():
+        while (await receive())["type"] != "http.disconnect":
+            pass
+        disconnected.set()
+
+    watcher = loop.create_task(watch_disconnect())
+    try:
+        headers = [
+            ("Content-Type", "text/event-stream"),
+            ("Cache-Control", "no-cache"),
+            ("X-Accel-Buffering", "no"),
+        ]
+        await send_response(send, 200, headers, format_sse("snapshot", snapshot.body.decode("utf-8")), more_body=True)
+        async for message in subscriber.messages():
+            if disconnected.is_set():
+                break
+            await send({"type": "http.response.body", "body": message, "more_body": True})
+        if not disconnected.is_set():
+            await send({"type": "http.response.body", "body": b""})
+    finally:
+        live_timing.live_stream.unsubscribe(subscriber)
+        watcher.cancel()
+
+
+LIVE_RULES = ("", "/<session_filter>", "/<session_filter>/<driver_filter>")
+
+
+# Native handler, its (session_filter, driver_filter)-style arguments and the
+# matching Flask URL rule (the metrics route label) for a path, or
+# (None, (), None) to fall back to the Flask apps
+def route(path):
+    if path == "/f1info.json":
+        return f1info, (), path
+    parts = [part for part in path.split("/") if part]
+    if not parts or parts[0] != "live_session_data":
+        return None, (), None
+    # the event log queries are served by Flask
+    if parts[1:] == ["events"]:
+        return None, (), None
+    handler, rest, rule = live_session_data, parts[1:], "/live_session_data"
+    if rest[:1] == ["stream"]:
+        handler, rest, rule = live_session_stream, rest[1:], "/live_session_data/stream"
+    if len(rest) > 2:
+        return None, (), None
+    return handler, tuple(rest) + (None,) * (2 - len(rest)), rule + LIVE_RULES[len(rest)]
+
+
+# Record a native response in the shared HTTP metrics when its headers go out,
+# so streams are timed to their first byte like the Flask routes
+def timed_send(send, rule):
+    started = time.perf_counter()
+
+    async def send_and_record(message):
+        if message["type"] == "http.response.start":
+            metrics.observe_request(rule, message["status"], time.perf_counter() - started)
+        await send(message)
+    return send_and_record
+
+
+async def lifespan(receive, send):
+    while True:
+        message = await receive()
+        if message["type"] == "lifespan.startup":
+            await send({"type": "lifespan.startup.complete"})
+        elif message["type"] == "lifespan.shutdown":
+            await send({"type": "lifespan.shutdown.complete"})
+            return
+
+
+async def app(scope, receive, send):
+    if scope["type"] == "lifespan":
+        await lifespan(receive, send)
+        return
+    if scope["type"] == "http" and scope["method"] in ("GET", "HEAD"):
+        handler, args, rule = route(scope["path"])
+        if handler is not None:
+            await handler(scope, receive, timed_send(send, rule), *args)
+            return
+    await wsgi_fallback(scope, receive, send)
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    class Server(uvicorn.Server):
+        # Report ready to systemd once the socket is bound, not at import
+        async def startup(self, sockets=None):
+            await super().startup(sockets)
+            if self.started:
+                poller.notify_ready()
+
+    config = uvicorn.Config(app, host="0.0.0.0", port=int(os.environ.get("PORT", 5000)))
+    Server(config).run()
@@ -0,0 +1,99 @@
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+# Import-time benchmark for the service modules.
+#
+# Each run imports the module in a fresh interpreter with `-X importtime`, so
+# the numbers are what systemd sees between process start and the app being
+# ready to bind its port. Background warm-up and the history top-up are
+# disabled, the process polls on its own instead of joining (or taking over)
+# the StateBus of a running service, and it gets an empty cache directory, so
+# only the import itself is measured and the machine's state does not matter.
+#
+#   python benchmarks/import_time.py                 # server.py, 5 runs
+#   python benchmarks/import_time.py live_timing --runs 10 --json
+#   python benchmarks/import_time.py --max-ms 400    # exit 1 on regression
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def run_once(module):
+    cache_dir = tempfile.mkdtemp(prefix="f1-import-time-")
+    env = dict(os.environ, F1INFO_WARMUP="0", F1_HISTORY_TOPUP="0", F1_BUS="off", F1_CACHE_DIR=cache_dir,
+               PYTHONDONTWRITEBYTECODE="1")
+    try:
+        start = time.perf_counter()
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+            cwd=ROOT, env=env, capture_output=True, text=True,
+        )
+        wall_ms = (time.perf_counter() - start) * 1000
+    finally:
+        shutil.rmtree(cache_dir, ignore_errors=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{result.stderr[-2000:]}")
+
+    # "import time: self [us] | cumulative | imported package"
+    cumulative = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        cumulative[name.strip()] = (int(cumulative_us), depth)
+    module_ms = cumulative.get(module, (0, 0))[0] / 1000
+    return wall_ms, module_ms, cumulative
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure module import time in fresh interpreters.")
+    parser.add_argument("module", nargs="?", default="server")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=10, help="heaviest top-level imports to list")
+    parser.add_argument("--max-ms", type=float, help="fail if the median module import exceeds this")
+    parser.add_argument("--json", action="store_true", help="print machine-readable results")
+    args = parser.parse_args()
+
+    walls, imports, last = [], [], {}
+    for _ in range(args.runs):
+        wall_ms, module_ms, last = run_once(args.module)
+        walls.append(wall_ms)
+        imports.append(module_ms)
+
+    # direct dependencies of the module, heaviest first (from the last run)
+    heaviest = sorted(
+        ((name, us / 1000) for name, (us, depth) in last.items() if depth == 1),
+        key=lambda item: item[1], reverse=True,
+    )[:args.top]
+    result = {
+        "module": args.module,
+        "runs": args.runs,
+        "import_ms_median": round(statistics.median(imports), 1),
+        "import_ms_min": round(min(imports), 1),
+        "process_ms_median": round(statistics.median(walls), 1),
+        "heaviest": [{"module": name, "ms": round(ms, 1)} for name, ms in heaviest],
+    }
+
+    if args.json:
+        print(json.dumps(result, indent=2))
+    else:
+        print(f"import {args.module}: median {result['import_ms_median']} ms "
+              f"(min {result['import_ms_min']} ms), process {result['process_ms_median']} ms over {args.runs} runs")
+        for item in result["heaviest"]:
+            print(f"  {item['ms']:8.1f} ms  {item['module']}")
+
+    if args.max_ms is not None and result["import_ms_median"] > args.max_ms:
+        print(f"FAIL: {result['import_ms_median']} ms > {args.max_ms} ms", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
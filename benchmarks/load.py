@@ -0,0 +1,338 @@
+import argparse
+import json
+import os
+import platform
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timezone
+
+import requests
+
+# Load and latency benchmark for the three HTTP services.
+#
+# Every scenario starts fresh processes: the OpenF1 replay server (sample race
+# session), stub Jolpica/Open-Meteo upstreams, and each service under test
+# with an empty cache directory. Requests are then driven at a fixed
+# concurrency for a fixed time, and the service process's CPU time and RSS are
+# read from /proc (Linux).
+#
+#   cold      load starts as soon as the port is open, caches empty
+#   warm      load starts once every target path returns real data
+#   expiring  warm, but cache TTLs are scaled down (server.py) and the replay
+#             runs at 100x (live timing, positions) so data churns under load
+#
+#   python benchmarks/load.py                                # all services and scenarios
+#   python benchmarks/load.py --services live_timing --concurrency 32 --duration 20
+#   python benchmarks/load.py --output run.json --baseline previous.json --max-regression 15
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+
+SERVICES = {
+    # name: (script, target paths)
+    "server": ("server.py", ["/f1info.json"]),
+    "live_timing": ("live_timing.py", ["/live_session_data", "/live_session_data/race", "/live_session_data/race/VER"]),
+    "position": ("position.py", ["/position.json"]),
+}
+SCENARIOS = {
+    # name: (wait for warm data, F1_CACHE_TTL_SCALE, replay speed)
+    "cold": (False, 1.0, 1.0),
+    "warm": (True, 1.0, 1.0),
+    "expiring": (True, 0.005, 100.0),
+}
+READY_TIMEOUT = 30
+WARM_TIMEOUT = 90
+CLOCK_TICKS = os.sysconf("SC_CLK_TCK") if hasattr(os, "sysconf") else 100
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class Process:
+    def __init__(self, args, env, port, log_path):
+        self.port = port
+        self.log = open(log_path, "w")
+        self.started = time.monotonic()
+        self.popen = subprocess.Popen(
+            [sys.executable, *args], cwd=ROOT, env=dict(os.environ, **env, PORT=str(port)),
+            stdout=self.log, stderr=subprocess.STDOUT,
+        )
+
+    @property
+    def base(self):
+        return f"http://127.0.0.1:{self.port}"
+
+    def wait_ready(self, timeout=READY_TIMEOUT):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if self.popen.poll() is not None:
+                raise RuntimeError(f"process exited early; see {self.log.name}")
+            try:
+                with socket.create_connection(("127.0.0.1", self.port), timeout=0.2):
+                    return
+            except OSError:
+                time.sleep(0.05)
+        raise RuntimeError(f"port {self.port} not ready after {timeout}s; see {self.log.name}")
+
+    # User + system CPU seconds used so far
+    def cpu_seconds(self):
+        with open(f"/proc/{self.popen.pid}/stat") as f:
+            fields = f.read().rsplit(")", 1)[1].split()
+        return (int(fields[11]) + int(fields[12])) / CLOCK_TICKS
+
+    # (current RSS, peak RSS) in MB
+    def memory_mb(self):
+        values = {}
+        with open(f"/proc/{self.popen.pid}/status") as f:
+            for line in f:
+                key, _, value = line.partition(":")
+                if key in ("VmRSS", "VmHWM"):
+                    values[key] = int(value.split()[0]) / 1024
+        return round(values.get("VmRSS", 0), 1), round(values.get("VmHWM", 0), 1)
+
+    def stop(self):
+        self.popen.terminate()
+        try:
+            self.popen.wait(5)
+        except subprocess.TimeoutExpired:
+            self.popen.kill()
+        self.log.close()
+
+
+def start_upstreams(workdir, replay_speed, latency_ms):
+    replay_port, stub_port = free_port(), free_port()
+    schedule = os.path.join(workdir, "schedule.json")
+    replay = Process(["openf1_replay.py", "--sample", "race", "--speed", str(replay_speed), "--port", str(replay_port)],
+                     {}, replay_port, os.path.join(workdir, "replay.log"))
+    stubs = Process([os.path.join(BENCH_DIR, "stub_upstreams.py"), "--port", str(stub_port),
+                     "--latency-ms", str(latency_ms), "--schedule", schedule],
+                    {}, stub_port, os.path.join(workdir, "stubs.log"))
+    replay.wait_ready(60)
+    stubs.wait_ready()
+    env = {
+        "OPENF1_BASE": f"{replay.base}/v1",
+        "JOLPICA_BASE": f"{stubs.base}/ergast/f1",
+        "OPEN_METEO_BASE": f"{stubs.base}/v1",
+        "F1_SCHEDULE_FILE": schedule,
+    }
+    return [replay, stubs], env
+
+
+# True once `url` serves real data rather than a warming/empty response
+def is_warm(url):
+    try:
+        response = requests.get(url, timeout=2)
+    except requests.RequestException:
+        return False
+    if response.status_code != 200:
+        return False
+    body = response.json()
+    return not isinstance(body, dict) or bool(body.get("drivers", True))
+
+
+def wait_warm(base, paths, timeout=WARM_TIMEOUT):
+    deadline = time.monotonic() + timeout
+    pending = list(paths)
+    while pending and time.monotonic() < deadline:
+        pending = [path for path in pending if not is_warm(base + path)]
+        if pending:
+            time.sleep(0.25)
+    if pending:
+        raise RuntimeError(f"not warm after {timeout}s: {', '.join(pending)}")
+
+
+# Drive `paths` round-robin from `concurrency` keep-alive clients for `duration` seconds
+def drive(base, paths, concurrency, duration):
+    results = [None] * concurrency
+    stop_at = time.perf_counter() + duration
+
+    def worker(i):
+        session = requests.Session()
+        latencies, statuses, errors = [], {}, 0
+        n = i
+        while time.perf_counter() < stop_at:
+            url = base + paths[n % len(paths)]
+            n += 1
+            start = time.perf_counter()
+            try:
+                response = session.get(url, timeout=10)
+                response.content
+            except requests.RequestException:
+                errors += 1
+                continue
+            latencies.append(time.perf_counter() - start)
+            statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+        results[i] = (latencies, statuses, errors)
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(concurrency)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    latencies, statuses, errors = [], {}, 0
+    for worker_latencies, worker_statuses, worker_errors in results:
+        latencies.extend(worker_latencies)
+        errors += worker_errors
+        for status, count in worker_statuses.items():
+            statuses[status] = statuses.get(status, 0) + count
+    return latencies, statuses, errors, elapsed
+
+
+def percentile(ordered, q):
+    if not ordered:
+        return None
+    return round(ordered[min(len(ordered) - 1, int(q * len(ordered)))] * 1000, 2)
+
+
+def run_case(service, scenario, args, workdir):
+    warm, ttl_scale, replay_speed = SCENARIOS[scenario]
+    script, paths = SERVICES[service]
+    case_dir = os.path.join(workdir, f"{service}-{scenario}")
+    os.makedirs(case_dir)
+
+    upstreams, env = start_upstreams(case_dir, replay_speed, args.upstream_latency_ms)
+    port = free_port()
+    env.update(F1_CACHE_DIR=os.path.join(case_dir, "cache"), F1_CACHE_TTL_SCALE=str(ttl_scale), F1_HISTORY_TOPUP="0")
+    proc = Process([script], env, port, os.path.join(case_dir, f"{service}.log"))
+    try:
+        proc.wait_ready()
+        ready_s = time.monotonic() - proc.started
+        if warm:
+            wait_warm(proc.base, paths)
+        warm_s = time.monotonic() - proc.started
+
+        cpu_before = proc.cpu_seconds()
+        latencies, statuses, errors, elapsed = drive(proc.base, paths, args.concurrency, args.duration)
+        cpu = proc.cpu_seconds() - cpu_before
+        rss, peak_rss = proc.memory_mb()
+    finally:
+        proc.stop()
+        for upstream in upstreams:
+            upstream.stop()
+
+    latencies.sort()
+    ok = statuses.get(200, 0) + statuses.get(304, 0)
+    return {
+        "service": service,
+        "scenario": scenario,
+        "paths": paths,
+        "concurrency": args.concurrency,
+        "duration_s": round(elapsed, 2),
+        "requests": len(latencies),
+        "ok": ok,
+        "errors": errors,
+        "statuses": {str(status): count for status, count in sorted(statuses.items())},
+        "throughput_rps": round(len(latencies) / elapsed, 1),
+        "latency_ms": {
+            "p50": percentile(latencies, 0.50),
+            "p90": percentile(latencies, 0.90),
+            "p99": percentile(latencies, 0.99),
+            "max": percentile(latencies, 1.0),
+        },
+        "cpu_s": round(cpu, 2),
+        "cpu_percent": round(100 * cpu / elapsed, 1),
+        "rss_mb": rss,
+        "peak_rss_mb": peak_rss,
+        "ready_s": round(ready_s, 2),
+        "warm_s": round(warm_s, 2),
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                              text=True, timeout=5).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+# Lines describing throughput and p99 changes against a previous run, and
+# whether any exceeded `max_regression` percent
+def compare(results, baseline, max_regression):
+    previous = {(r["service"], r["scenario"]): r for r in baseline.get("results", [])}
+    lines, regressed = [], False
+    for result in results:
+        before = previous.get((result["service"], result["scenario"]))
+        if not before or not before["throughput_rps"] or not before["latency_ms"]["p99"]:
+            continue
+        throughput = 100 * (result["throughput_rps"] / before["throughput_rps"] - 1)
+        p99 = 100 * ((result["latency_ms"]["p99"] or 0) / before["latency_ms"]["p99"] - 1)
+        flag = ""
+        if max_regression is not None and (throughput < -max_regression or p99 > max_regression):
+            regressed = True
+            flag = "  REGRESSION"
+        lines.append(f"{result['service']:<12} {result['scenario']:<9} throughput {throughput:+6.1f}%  p99 {p99:+6.1f}%{flag}")
+    return lines, regressed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load and latency benchmark for the HTTP services.")
+    parser.add_argument("--services", nargs="+", choices=sorted(SERVICES), default=list(SERVICES))
+    parser.add_argument("--scenarios", nargs="+", choices=list(SCENARIOS), default=list(SCENARIOS))
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds of load per case")
+    parser.add_argument("--upstream-latency-ms", type=float, default=50.0, help="delay added by the stub upstreams")
+    parser.add_argument("--output", help="write results as JSON here")
+    parser.add_argument("--baseline", help="previous --output file to compare against")
+    parser.add_argument("--max-regression", type=float, help="exit 1 if throughput drops or p99 rises by more than this percent")
+    parser.add_argument("--keep-logs", action="store_true", help="keep the per-case working directory")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="f1-load-")
+    results = []
+    try:
+        for scenario in args.scenarios:
+            for service in args.services:
+                print(f"{service} / {scenario} ...", file=sys.stderr)
+                result = run_case(service, scenario, args, workdir)
+                results.append(result)
+                latency = result["latency_ms"]
+                print(f"{service:<12} {scenario:<9} {result['throughput_rps']:>8.1f} req/s  "
+                      f"p50 {latency['p50']} ms  p99 {latency['p99']} ms  "
+                      f"cpu {result['cpu_percent']}%  rss {result['rss_mb']} MB  "
+                      f"ok {result['ok']}/{result['requests']}")
+    finally:
+        if args.keep_logs:
+            print(f"logs in {workdir}", file=sys.stderr)
+        else:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    report = {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "concurrency": args.concurrency,
+            "duration_s": args.duration,
+            "upstream_latency_ms": args.upstream_latency_ms,
+        },
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            lines, regressed = compare(results, json.load(f), args.max_regression)
+        print("\n".join(lines))
+        if regressed:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,120 @@
+import argparse
+import json
+import os
+import time
+from datetime import datetime, timedelta, timezone
+
+from flask import Flask, jsonify, request
+
+# Local stand-ins for the Jolpica (Ergast) and Open-Meteo APIs, plus a
+# generated event schedule, so server.py can be benchmarked offline.
+# OpenF1 is served by openf1_replay.py.
+#
+#   python benchmarks/stub_upstreams.py --port 8766 --latency-ms 50
+#   JOLPICA_BASE=http://127.0.0.1:8766/ergast/f1 OPEN_METEO_BASE=http://127.0.0.1:8766/v1 \
+#   F1_SCHEDULE_FILE=schedule.json python server.py
+
+EVENTS = [
+    ("Bahrain Grand Prix", "Sakhir", "Bahrain"),
+    ("Saudi Arabia Grand Prix", "Jeddah", "Saudi Arabia"),
+    ("Australia Grand Prix", "Melbourne", "Australia"),
+    ("Japan Grand Prix", "Suzuka", "Japan"),
+    ("China Grand Prix", "Shanghai", "China"),
+    ("Miami Grand Prix", "Miami", "United States"),
+]
+SESSIONS = [("Practice 1", 0, 11.5), ("Practice 2", 0, 15), ("Practice 3", 1, 10.5), ("Qualifying", 1, 14), ("Race", 2, 13)]
+DRIVERS = [("NOR", "British", 226), ("PIA", "Australian", 234), ("VER", "Dutch", 165),
+           ("RUS", "British", 147), ("LEC", "Monegasque", 119)]
+CONSTRUCTORS = [("McLaren", "British", 460), ("Ferrari", "Italian", 222), ("Mercedes", "German", 210)]
+
+
+# fastf1-style EventSchedule records with race weekends around `now`, so there
+# is always a next race and a mix of completed and upcoming sessions
+def build_schedule(now=None):
+    now = now or datetime.now(timezone.utc)
+    first_friday = (now - timedelta(days=21)).replace(hour=0, minute=0, second=0, microsecond=0)
+    events = []
+    for round_number, (name, location, country) in enumerate(EVENTS, start=1):
+        friday = first_friday + timedelta(days=14 * (round_number - 1))
+        event = {"RoundNumber": round_number, "EventName": name, "Location": location, "Country": country}
+        for slot, (session, day, hour) in enumerate(SESSIONS, start=1):
+            event[f"Session{slot}"] = session
+            event[f"Session{slot}DateUtc"] = (friday + timedelta(days=day, hours=hour)).isoformat()
+        events.append(event)
+    return events
+
+
+def write_schedule(path):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(build_schedule(), f)
+
+
+def create_app(latency=0.0):
+    app = Flask(__name__)
+    app.config["requests"] = 0
+
+    @app.before_request
+    def simulate_latency():
+        app.config["requests"] += 1
+        if latency:
+            time.sleep(latency)
+
+    @app.route("/ergast/f1/<season>/driverstandings.json")
+    def driver_standings(season):
+        standings = [
+            {"position": str(i), "points": str(points), "Driver": {"code": code, "nationality": nationality}}
+            for i, (code, nationality, points) in enumerate(DRIVERS, start=1)
+        ]
+        return jsonify({"MRData": {"StandingsTable": {"StandingsLists": [{"DriverStandings": standings}]}}})
+
+    @app.route("/ergast/f1/<season>/constructorstandings.json")
+    def constructor_standings(season):
+        standings = [
+            {"position": str(i), "points": str(points), "Constructor": {"name": name, "nationality": nationality}}
+            for i, (name, nationality, points) in enumerate(CONSTRUCTORS, start=1)
+        ]
+        return jsonify({"MRData": {"StandingsTable": {"StandingsLists": [{"ConstructorStandings": standings}]}}})
+
+    @app.route("/ergast/f1/<season>/last/results.json")
+    def last_results(season):
+        race = {"raceName": "Japan Grand Prix", "Results": [{"Driver": {"code": "VER", "nationality": "Dutch"}}]}
+        return jsonify({"MRData": {"RaceTable": {"Races": [race]}}})
+
+    @app.route("/v1/forecast")
+    def forecast():
+        # one result per comma-separated location, as Open-Meteo batches them
+        latitudes = request.args.get("latitude", "").split(",")
+        start = int(time.time()) // 3600 * 3600
+        hours = range(start, start + 24 * int(request.args.get("forecast_days", 7)) * 3600, 3600)
+        results = [
+            {
+                "latitude": float(lat),
+                "current": {"temperature_2m": 21.4, "weather_code": 1},
+                "hourly": {"time": list(hours), "temperature_2m": [20.0] * len(hours),
+                           "precipitation_probability": [10] * len(hours), "weather_code": [2] * len(hours)},
+            }
+            for lat in latitudes
+        ]
+        return jsonify(results if len(results) > 1 else results[0])
+
+    @app.route("/stub/status")
+    def status():
+        return jsonify({"requests": app.config["requests"]})
+
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve stub Jolpica and Open-Meteo APIs.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=int(os.environ.get("PORT", 8766)))
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="delay added to every response")
+    parser.add_argument("--schedule", help="also write a matching event schedule JSON here")
+    args = parser.parse_args()
+    if args.schedule:
+        write_schedule(args.schedule)
+    create_app(args.latency_ms / 1000).run(host=args.host, port=args.port, threaded=True)
+
+
+if __name__ == "__main__":
+    main()
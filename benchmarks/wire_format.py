@@ -0,0 +1,138 @@
+import argparse
+import gzip
+import json
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from live_snapshot import DriverRow, RaceControlRow, RadioRow
+from wire_format import compact, encode_msgpack, msgpack
+
+# Encode-time and size benchmark for the response wire formats.
+#
+# Builds representative payloads for /live_session_data (full grid),
+# /position.json (20 cars) and /f1info.json, then reports bytes per response
+# and microseconds per encode for JSON, MessagePack with short field IDs, and
+# both after gzip.
+#
+#   python benchmarks/wire_format.py
+#   python benchmarks/wire_format.py --number 5000 --json
+
+CODES = ["VER", "NOR", "LEC", "PIA", "SAI", "HAM", "RUS", "PER", "ALO", "STR",
+         "GAS", "OCO", "ALB", "TSU", "HUL", "MAG", "BOT", "ZHO", "RIC", "SAR"]
+NUMBERS = [1, 4, 16, 81, 55, 44, 63, 11, 14, 18, 10, 31, 23, 22, 27, 20, 77, 24, 3, 2]
+
+
+def live_payload():
+    drivers = [
+        DriverRow(number, code, f"+{i * 1.137:.3f}" if i else "Leader", 42, i + 1).to_dict()
+        for i, (number, code) in enumerate(zip(NUMBERS, CODES))
+    ]
+    radio = [
+        RadioRow(number, code, f"2025-07-06T14:{i:02d}:30+00:00",
+                 f"https://livetiming.formula1.com/static/TeamRadio/{code}_{i + 1:02d}.mp3").to_dict()
+        for i, (number, code) in enumerate(zip(NUMBERS[:5], CODES[:5]))
+    ]
+    race_control = [
+        RaceControlRow("Flag", f"YELLOW IN TRACK SECTOR {i}", f"2025-07-06T14:{i:02d}:00+00:00").to_dict()
+        for i in range(10)
+    ]
+    return {"session": "All", "drivers": drivers, "team_radio": radio, "race_control": race_control}
+
+
+def position_payload():
+    return [
+        {"car_number": number, "x": -1234.0 + 97 * i, "y": 4321.0 - 53 * i, "z": 112.0,
+         "date": "2025-07-06T14:31:07.214000+00:00"}
+        for i, number in enumerate(NUMBERS)
+    ]
+
+
+def f1info_payload():
+    sessions = [
+        {"name": name, "status": "✅ Completed", "datetime_utc": "2025-07-04T11:30:00+00:00",
+         "datetime_local": "Fri 12:30"}
+        for name in ("FP1", "FP2", "FP3", "Quali", "Race")
+    ]
+    calendar = [
+        {"Name": f"Grand Prix {i}", "Location": "Somewhere", "Circuit": "Some Circuit",
+         "Country": "🇬🇧", "DateRange": "July 4–6"}
+        for i in range(24)
+    ]
+    return {
+        "Race": {
+            "Name": "British Grand Prix", "Circuit-Name": "Silverstone Circuit", "Location": "Silverstone",
+            "Country": "🇬🇧", "Weather": "🌤️ 21°C", "CountdownToNextSession": "⏱️ Race in 0d 2h 10m",
+            "CountdownToRace": "🟩 Race in 0d 2h 10m", "NextSession": "Race",
+        },
+        "Calender": {"2025 ": calendar},
+        "Sessions": sessions,
+        "Drivers": "[DRIVER STANDINGS] 🇦🇺 PIA 234 | 🇬🇧 NOR 226 | 🇳🇱 VER 165",
+        "Constructors": "[CONSTRUCTOR STANDINGS] McLaren 460 | Ferrari 222 | Mercedes 210",
+        "Last Winner": "[WINNER] 🇬🇧 NOR",
+        "Meta": {"AsOf": "2025-07-06T12:20:00+00:00", "Stale": False, "Source": "upstream"},
+    }
+
+
+PAYLOADS = {
+    "live_session_data": live_payload,
+    "position.json": position_payload,
+    "f1info.json": f1info_payload,
+}
+
+
+def json_encode(payload):
+    return json.dumps(payload, ensure_ascii=False).encode("utf-8")
+
+
+def encoders():
+    formats = {"json": json_encode, "json+gzip": lambda p: gzip.compress(json_encode(p), compresslevel=6)}
+    if msgpack is not None:
+        formats["msgpack"] = encode_msgpack
+        formats["msgpack+gzip"] = lambda p: gzip.compress(encode_msgpack(p), compresslevel=6)
+        # short IDs without MessagePack, to separate the two effects
+        formats["json-short-ids"] = lambda p: json.dumps(compact(p), ensure_ascii=False).encode("utf-8")
+    return formats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare response encodings by size and encode time.")
+    parser.add_argument("--number", type=int, default=2000, help="encodes per timing run")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--json", action="store_true", help="print machine-readable results")
+    args = parser.parse_args()
+
+    if msgpack is None:
+        print("msgpack is not installed; only JSON is measured", file=sys.stderr)
+
+    results = []
+    for endpoint, build in PAYLOADS.items():
+        payload = build()
+        for fmt, encode in encoders().items():
+            size = len(encode(payload))
+            best = min(timeit.repeat(lambda: encode(payload), number=args.number, repeat=args.repeat))
+            results.append({
+                "endpoint": endpoint,
+                "format": fmt,
+                "bytes": size,
+                "encode_us": round(best / args.number * 1e6, 2),
+            })
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return 0
+
+    baseline = {}
+    for item in results:
+        if item["format"] == "json":
+            baseline[item["endpoint"]] = item["bytes"]
+        ratio = item["bytes"] / baseline[item["endpoint"]]
+        print(f"{item['endpoint']:<18} {item['format']:<15} {item['bytes']:>7} B  "
+              f"({ratio:5.0%} of JSON)  {item['encode_us']:>8.1f} us/encode")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,59 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+
+# Small persistent key/value store (SQLite) for cached upstream results.
+#
+# Values are stored as JSON with the time they were fetched, so after a
+# restart the caches can answer from disk straight away, report how old that
+# data is, and refresh it in the background.
+
+
+class DiskStore:
+    def __init__(self, path):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            " key TEXT PRIMARY KEY,"
+            " value TEXT NOT NULL,"
+            " saved_at REAL NOT NULL)"
+        )
+
+    # (value, saved_at) or None
+    def get(self, key):
+        try:
+            with self._lock:
+                row = self._conn.execute("SELECT value, saved_at FROM entries WHERE key = ?", (key,)).fetchone()
+        except sqlite3.Error as e:
+            print(f"Disk cache read failed for {key}: {e}")
+            return None
+        if row is None:
+            return None
+        try:
+            return json.loads(row[0]), row[1]
+        except ValueError:
+            return None
+
+    def put(self, key, value, saved_at=None):
+        try:
+            encoded = json.dumps(value, ensure_ascii=False)
+        except (TypeError, ValueError) as e:
+            print(f"Not persisting {key}: {e}")
+            return False
+        try:
+            with self._lock:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO entries (key, value, saved_at) VALUES (?, ?, ?)",
+                    (key, encoded, saved_at or time.time()),
+                )
+        except sqlite3.Error as e:
+            print(f"Disk cache write failed for {key}: {e}")
+            return False
+        return True
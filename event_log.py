@@ -0,0 +1,140 @@
+from bisect import bisect_right
+from collections import namedtuple
+
+# Append-only log of a session's team radio and race control messages.
+#
+# Every event gets the next integer ID as it is appended, so a client can ask
+# for "everything after ID n" and receive only what it has not seen. Besides
+# the events themselves the log keeps, per indexed field (type, driver number
+# and code, category, flag, lap), the ascending list of IDs carrying each
+# value. A filtered query bisects the shortest matching list for the cursor
+# and checks the remaining filters on just those events, so asking for one
+# driver's radio costs the same late in a race as on lap 1.
+#
+# One thread appends (the live timing poller, or the bus follower in other
+# processes); readers never lock. An event is in the list before its ID is in
+# any index, so every ID a reader finds resolves. A new session gets a new log.
+
+DEFAULT_LIMIT = 100
+MAX_LIMIT = 1000
+INDEXED_FIELDS = ("kind", "driver_number", "driver", "category", "flag", "lap")
+
+
+class Event(namedtuple(
+    "Event", "id kind date driver_number driver category flag lap scope sector message recording_url",
+    defaults=(None,) * 9,
+)):
+    __slots__ = ()
+
+    def to_dict(self):
+        return {
+            "ID": self.id,
+            "Type": self.kind,
+            "Time UTC": self.date,
+            "Driver Number": self.driver_number,
+            "Driver": self.driver,
+            "Category": self.category,
+            "Flag": self.flag,
+            "Lap": self.lap,
+            "Scope": self.scope,
+            "Sector": self.sector,
+            "Message": self.message,
+            "Recording URL": self.recording_url
+        }
+
+
+# Index key for a field value; strings match case-insensitively
+def index_key(value):
+    return value.lower() if isinstance(value, str) else value
+
+
+# What makes two events the same message. The driver code is left out: it is
+# looked up locally and may be missing the first time a row is seen.
+def identity(event):
+    return event.kind, event.date, event.driver_number, event.message, event.recording_url
+
+
+class EventLog:
+    def __init__(self, session_key=None):
+        self.session_key = session_key
+        self._events = []
+        # identity() of every event, for dropping rows OpenF1 sends twice
+        self._seen = set()
+        # field -> value -> ascending IDs
+        self._index = {field: {} for field in INDEXED_FIELDS}
+
+    def __len__(self):
+        return len(self._events)
+
+    def last_id(self):
+        return len(self._events)
+
+    def _insert(self, event):
+        self._events.append(event)
+        self._seen.add(identity(event))
+        for field in INDEXED_FIELDS:
+            value = getattr(event, field)
+            if value is not None:
+                self._index[field].setdefault(index_key(value), []).append(event.id)
+
+    # Append new events (their `id` is ignored) in order; returns those not seen before
+    def add(self, events):
+        added = []
+        for event in events:
+            if identity(event) in self._seen:
+                continue
+            event = event._replace(id=len(self._events) + 1)
+            self._insert(event)
+            added.append(event)
+        return added
+
+    # Append events numbered by another log (relayed from the polling leader);
+    # returns those past this log's last ID
+    def extend(self, events):
+        added = []
+        for event in events:
+            if event.id == len(self._events) + 1:
+                self._insert(event)
+                added.append(event)
+        return added
+
+    # Events matching every filter, oldest first (newest first if `reverse`),
+    # restricted to IDs after `since` and, if given, up to `until`
+    def _matching(self, filters, since=0, until=None, reverse=False):
+        events = self._events
+        wanted = {field: index_key(value) for field, value in filters.items() if value is not None}
+        if wanted:
+            ids = min((self._index[field].get(key, ()) for field, key in wanted.items()), key=len)
+        else:
+            ids = range(1, len(events) + 1)
+        # walk positions in the ID list rather than slicing it, so a query
+        # costs what it returns, not the length of the session
+        end = len(ids) if until is None else bisect_right(ids, until)
+        positions = range(bisect_right(ids, since), end)
+        for i in (reversed(positions) if reverse else positions):
+            event = events[ids[i] - 1]
+            if all(index_key(getattr(event, field)) == key for field, key in wanted.items()):
+                yield event
+
+    # Up to `limit` matching events after ID `since`, oldest first, and whether
+    # more are waiting. `filters` are INDEXED_FIELDS names; None matches anything.
+    def since(self, since=0, limit=DEFAULT_LIMIT, **filters):
+        selected = []
+        for event in self._matching(filters, since):
+            if len(selected) == limit:
+                return selected, True
+            selected.append(event)
+        return selected, False
+
+    # The newest `limit` matching events up to ID `until`, oldest first
+    def latest(self, limit, until=None, **filters):
+        selected = []
+        for event in self._matching(filters, until=until, reverse=True):
+            if len(selected) == limit:
+                break
+            selected.append(event)
+        selected.reverse()
+        return selected
+
+    def all(self):
+        return list(self._events)
@@ -0,0 +1,211 @@
+import argparse
+import os
+import sys
+import time
+from datetime import datetime, timezone
+
+import requests
+
+import upstream
+from history_store import HistoryStore
+
+# Bulk import and incremental top-up of past seasons from Jolpica (Ergast).
+#
+#   python history_import.py 2014 2024      # whole seasons (resumes where it stopped)
+#   python history_import.py --top-up       # only rounds finished since the last run
+#
+# Each round costs three requests (results plus both standings tables) and one
+# more per season for its calendar. Rounds already in the store are skipped, so
+# an import cut short by rate limiting can just be run again. server.py runs the
+# top-up for the current season in the background; each run re-reads the
+# season's calendar (one request, so added, moved or cancelled races are picked
+# up) and otherwise only calls upstream after a race date has passed, and then
+# only for the new round.
+
+JOLPICA_BASE = os.environ.get("JOLPICA_BASE", "https://api.jolpi.ca/ergast/f1")
+HISTORY_DB = os.path.join(os.environ.get("F1_CACHE_DIR", "f1_cache"), "history.sqlite")
+ERGAST_TIMEOUT = 10
+# Pause between requests during bulk imports; Jolpica allows short bursts only
+DEFAULT_PAUSE = 0.3
+PAGE_LIMIT = 100
+
+
+def fetch_mrdata(path, base=JOLPICA_BASE):
+    response = upstream.get(f"{base}/{path}", params={"limit": PAGE_LIMIT}, timeout=ERGAST_TIMEOUT)
+    response.raise_for_status()
+    return response.json().get("MRData", {})
+
+
+def as_int(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def as_float(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def driver_fields(driver):
+    return {
+        "driver_id": driver.get("driverId", ""),
+        "code": driver.get("code"),
+        "driver_name": f"{driver.get('givenName', '')} {driver.get('familyName', '')}".strip(),
+        "nationality": driver.get("nationality"),
+    }
+
+
+def parse_races(mrdata):
+    return [
+        {
+            "round": int(race["round"]),
+            "race_name": race.get("raceName"),
+            "circuit_id": race.get("Circuit", {}).get("circuitId"),
+            "circuit_name": race.get("Circuit", {}).get("circuitName"),
+            "country": race.get("Circuit", {}).get("Location", {}).get("country"),
+            "date": race.get("date"),
+        }
+        for race in mrdata.get("RaceTable", {}).get("Races", [])
+    ]
+
+
+def parse_results(mrdata):
+    races = mrdata.get("RaceTable", {}).get("Races", [])
+    rows = []
+    for result in (races[0].get("Results", []) if races else []):
+        constructor = result.get("Constructor", {})
+        rows.append(dict(
+            driver_fields(result.get("Driver", {})),
+            position=as_int(result.get("position")),
+            position_text=result.get("positionText"),
+            constructor_id=constructor.get("constructorId"),
+            constructor_name=constructor.get("name"),
+            grid=as_int(result.get("grid")),
+            laps=as_int(result.get("laps")),
+            status=result.get("status"),
+            points=as_float(result.get("points")),
+            time=result.get("Time", {}).get("time"),
+        ))
+    return [row for row in rows if row["position"] is not None]
+
+
+def standings_list(mrdata, key):
+    lists = mrdata.get("StandingsTable", {}).get("StandingsLists", [])
+    return lists[0].get(key, []) if lists else []
+
+
+def parse_driver_standings(mrdata):
+    return [
+        dict(
+            driver_fields(standing.get("Driver", {})),
+            position=as_int(standing.get("position")),
+            constructor=" / ".join(c.get("name", "") for c in standing.get("Constructors", [])) or None,
+            points=as_float(standing.get("points")),
+            wins=as_int(standing.get("wins")),
+        )
+        for standing in standings_list(mrdata, "DriverStandings")
+    ]
+
+
+def parse_constructor_standings(mrdata):
+    return [
+        {
+            "constructor_id": standing.get("Constructor", {}).get("constructorId", ""),
+            "name": standing.get("Constructor", {}).get("name"),
+            "nationality": standing.get("Constructor", {}).get("nationality"),
+            "position": as_int(standing.get("position")),
+            "points": as_float(standing.get("points")),
+            "wins": as_int(standing.get("wins")),
+        }
+        for standing in standings_list(mrdata, "ConstructorStandings")
+    ]
+
+
+class HistoryImporter:
+    def __init__(self, store, base=JOLPICA_BASE, pause=0.0):
+        self.store = store
+        self.base = base
+        self.pause = pause
+
+    def _fetch(self, path):
+        mrdata = fetch_mrdata(path, self.base)
+        if self.pause:
+            time.sleep(self.pause)
+        return mrdata
+
+    # The season's calendar, from the store unless `refresh` or not stored yet
+    def races(self, season, refresh=False):
+        stored = self.store.races(season)
+        if stored and not refresh:
+            return stored
+        races = parse_races(self._fetch(f"{season}.json"))
+        if not races:
+            return stored
+        self.store.put_races(season, races)
+        return races
+
+    # Fetch and store one round; False if its results are not published yet
+    def import_round(self, season, round_number):
+        results = parse_results(self._fetch(f"{season}/{round_number}/results.json"))
+        if not results:
+            return False
+        drivers = parse_driver_standings(self._fetch(f"{season}/{round_number}/driverstandings.json"))
+        constructors = parse_constructor_standings(self._fetch(f"{season}/{round_number}/constructorstandings.json"))
+        self.store.put_round(season, round_number, results, drivers, constructors, time.time())
+        return True
+
+    # Import every finished round of a season that is not stored yet; returns the rounds added.
+    # `refresh_calendar` re-reads the calendar even if one is stored.
+    def import_season(self, season, today=None, refresh_calendar=False):
+        today = (today or datetime.now(timezone.utc)).date().isoformat()
+        have = set(self.store.imported_rounds(season))
+        added = []
+        for race in self.races(season, refresh=refresh_calendar):
+            if race["round"] in have:
+                continue
+            if race["date"] and race["date"] > today:
+                break
+            if not self.import_round(season, race["round"]):
+                break
+            added.append(race["round"])
+        return added
+
+    # Add only the rounds finished since the last import of the current season,
+    # against its calendar as published now
+    def top_up(self, now=None):
+        now = now or datetime.now(timezone.utc)
+        return self.import_season(now.year, now, refresh_calendar=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import Jolpica (Ergast) seasons into the local history store.")
+    parser.add_argument("first", type=int, nargs="?", help="first season to import")
+    parser.add_argument("last", type=int, nargs="?", help="last season to import (default: first)")
+    parser.add_argument("--top-up", action="store_true", help="only add rounds finished since the last import")
+    parser.add_argument("--db", default=HISTORY_DB)
+    parser.add_argument("--pause", type=float, default=DEFAULT_PAUSE, help="seconds to wait between requests")
+    args = parser.parse_args()
+    if args.first is None and not args.top_up:
+        parser.error("give a season range or --top-up")
+
+    importer = HistoryImporter(HistoryStore(args.db), pause=args.pause)
+    if args.top_up:
+        seasons = [datetime.now(timezone.utc).year]
+    else:
+        seasons = range(args.first, (args.last or args.first) + 1)
+    for season in seasons:
+        try:
+            added = importer.import_season(season, refresh_calendar=args.top_up)
+        except requests.exceptions.RequestException as e:
+            print(f"{season}: stopped ({e}); run again to resume")
+            return 1
+        print(f"{season}: imported {len(added)} round(s){': ' + ', '.join(map(str, added)) if added else ''}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,174 @@
+import os
+import sqlite3
+import threading
+
+# Local store of past seasons from Ergast/Jolpica, for historical queries.
+#
+# One row per race, per classified result and per championship position after
+# every round, in indexed SQLite tables. Every query is a primary-key or index
+# range scan over a single season (a few hundred rows at most), so the
+# /history endpoints answer in well under a millisecond without any upstream
+# call. Rounds are written in one transaction each, so an interrupted import
+# leaves only whole rounds behind and can simply be resumed.
+# history_import.py fills it.
+
+SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS races ("
+    " season INTEGER NOT NULL, round INTEGER NOT NULL, race_name TEXT, circuit_id TEXT,"
+    " circuit_name TEXT, country TEXT, date TEXT,"
+    " PRIMARY KEY (season, round)) WITHOUT ROWID",
+    # rounds whose results and standings are complete
+    "CREATE TABLE IF NOT EXISTS imported_rounds ("
+    " season INTEGER NOT NULL, round INTEGER NOT NULL, imported_at REAL NOT NULL,"
+    " PRIMARY KEY (season, round)) WITHOUT ROWID",
+    "CREATE TABLE IF NOT EXISTS results ("
+    " season INTEGER NOT NULL, round INTEGER NOT NULL, position INTEGER NOT NULL, position_text TEXT,"
+    " driver_id TEXT NOT NULL, code TEXT, driver_name TEXT, nationality TEXT,"
+    " constructor_id TEXT, constructor_name TEXT, grid INTEGER, laps INTEGER, status TEXT,"
+    " points REAL, time TEXT,"
+    " PRIMARY KEY (season, round, position)) WITHOUT ROWID",
+    "CREATE INDEX IF NOT EXISTS results_by_driver ON results (driver_id, season, round)",
+    "CREATE TABLE IF NOT EXISTS driver_standings ("
+    " season INTEGER NOT NULL, round INTEGER NOT NULL, driver_id TEXT NOT NULL, position INTEGER,"
+    " code TEXT, driver_name TEXT, nationality TEXT, constructor TEXT, points REAL, wins INTEGER,"
+    " PRIMARY KEY (season, round, driver_id)) WITHOUT ROWID",
+    "CREATE INDEX IF NOT EXISTS driver_standings_by_driver ON driver_standings (driver_id, season, round)",
+    "CREATE TABLE IF NOT EXISTS constructor_standings ("
+    " season INTEGER NOT NULL, round INTEGER NOT NULL, constructor_id TEXT NOT NULL, position INTEGER,"
+    " name TEXT, nationality TEXT, points REAL, wins INTEGER,"
+    " PRIMARY KEY (season, round, constructor_id)) WITHOUT ROWID",
+)
+
+RESULT_COLUMNS = ("position", "position_text", "driver_id", "code", "driver_name", "nationality",
+                  "constructor_id", "constructor_name", "grid", "laps", "status", "points", "time")
+DRIVER_STANDING_COLUMNS = ("position", "driver_id", "code", "driver_name", "nationality", "constructor", "points", "wins")
+CONSTRUCTOR_STANDING_COLUMNS = ("position", "constructor_id", "name", "nationality", "points", "wins")
+
+
+def _rows(columns, rows):
+    return [dict(zip(columns, row)) for row in rows]
+
+
+class HistoryStore:
+    def __init__(self, path):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        for statement in SCHEMA:
+            self._conn.execute(statement)
+
+    def _query(self, sql, args=()):
+        with self._lock:
+            return self._conn.execute(sql, args).fetchall()
+
+    # [(season, rounds imported, last round imported)], newest season first
+    def seasons(self):
+        return self._query(
+            "SELECT season, COUNT(*), MAX(round) FROM imported_rounds GROUP BY season ORDER BY season DESC")
+
+    def imported_rounds(self, season):
+        return [row[0] for row in self._query("SELECT round FROM imported_rounds WHERE season = ? ORDER BY round", (season,))]
+
+    def latest_round(self, season):
+        return self._query("SELECT MAX(round) FROM imported_rounds WHERE season = ?", (season,))[0][0]
+
+    # The season's calendar as stored by put_races
+    def races(self, season):
+        return _rows(
+            ("round", "race_name", "circuit_id", "circuit_name", "country", "date"),
+            self._query("SELECT round, race_name, circuit_id, circuit_name, country, date"
+                        " FROM races WHERE season = ? ORDER BY round", (season,)),
+        )
+
+    def race(self, season, round_number):
+        rows = self._query("SELECT race_name, date FROM races WHERE season = ? AND round = ?", (season, round_number))
+        return {"race_name": rows[0][0], "date": rows[0][1]} if rows else None
+
+    # Replace the season's calendar (races dropped from it are removed)
+    def put_races(self, season, races):
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                self._conn.execute("DELETE FROM races WHERE season = ?", (season,))
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO races VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    [(season, race["round"], race["race_name"], race["circuit_id"], race["circuit_name"],
+                      race["country"], race["date"]) for race in races],
+                )
+                self._conn.execute("COMMIT")
+            except sqlite3.Error:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    # Replace one round's results and standings atomically
+    def put_round(self, season, round_number, results, driver_standings, constructor_standings, imported_at):
+        key = (season, round_number)
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                for table in ("results", "driver_standings", "constructor_standings", "imported_rounds"):
+                    self._conn.execute(f"DELETE FROM {table} WHERE season = ? AND round = ?", key)
+                self._conn.executemany(
+                    f"INSERT OR REPLACE INTO results VALUES (?, ?, {', '.join('?' * len(RESULT_COLUMNS))})",
+                    [key + tuple(row[c] for c in RESULT_COLUMNS) for row in results],
+                )
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO driver_standings"
+                    " (season, round, " + ", ".join(DRIVER_STANDING_COLUMNS) + ")"
+                    f" VALUES (?, ?, {', '.join('?' * len(DRIVER_STANDING_COLUMNS))})",
+                    [key + tuple(row[c] for c in DRIVER_STANDING_COLUMNS) for row in driver_standings],
+                )
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO constructor_standings"
+                    " (season, round, " + ", ".join(CONSTRUCTOR_STANDING_COLUMNS) + ")"
+                    f" VALUES (?, ?, {', '.join('?' * len(CONSTRUCTOR_STANDING_COLUMNS))})",
+                    [key + tuple(row[c] for c in CONSTRUCTOR_STANDING_COLUMNS) for row in constructor_standings],
+                )
+                self._conn.execute("INSERT INTO imported_rounds VALUES (?, ?, ?)", key + (imported_at,))
+                self._conn.execute("COMMIT")
+            except sqlite3.Error:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    # Round to answer for: `round_number` if imported, else the latest (None if nothing is)
+    def resolve_round(self, season, round_number=None):
+        if round_number is None:
+            return self.latest_round(season)
+        rows = self._query("SELECT 1 FROM imported_rounds WHERE season = ? AND round = ?", (season, round_number))
+        return round_number if rows else None
+
+    def results(self, season, round_number):
+        return _rows(RESULT_COLUMNS, self._query(
+            "SELECT " + ", ".join(RESULT_COLUMNS) + " FROM results WHERE season = ? AND round = ? ORDER BY position",
+            (season, round_number)))
+
+    # Championship table after a round; unclassified entries (no position) last
+    def driver_standings(self, season, round_number, limit=-1):
+        return _rows(DRIVER_STANDING_COLUMNS, self._query(
+            "SELECT " + ", ".join(DRIVER_STANDING_COLUMNS) + " FROM driver_standings"
+            " WHERE season = ? AND round = ? ORDER BY position IS NULL, position, points DESC LIMIT ?",
+            (season, round_number, limit)))
+
+    def constructor_standings(self, season, round_number, limit=-1):
+        return _rows(CONSTRUCTOR_STANDING_COLUMNS, self._query(
+            "SELECT " + ", ".join(CONSTRUCTOR_STANDING_COLUMNS) + " FROM constructor_standings"
+            " WHERE season = ? AND round = ? ORDER BY position IS NULL, position, points DESC LIMIT ?",
+            (season, round_number, limit)))
+
+    # Ergast driverId for a driverId or three-letter code in a season, or None
+    def resolve_driver(self, season, driver):
+        rows = self._query(
+            "SELECT driver_id FROM driver_standings WHERE season = ? AND (driver_id = ? OR code = ?) LIMIT 1",
+            (season, driver.lower(), driver.upper()))
+        return rows[0][0] if rows else None
+
+    # A driver's championship position, points and wins after every imported round
+    def driver_progression(self, season, driver_id):
+        return _rows(("round", "race_name", "position", "points", "wins"), self._query(
+            "SELECT s.round, r.race_name, s.position, s.points, s.wins FROM driver_standings s"
+            " LEFT JOIN races r ON r.season = s.season AND r.round = s.round"
+            " WHERE s.driver_id = ? AND s.season = ? ORDER BY s.round",
+            (driver_id, season)))
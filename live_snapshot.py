@@ -0,0 +1,134 @@
+from collections import namedtuple
+from types import MappingProxyType
+import time
+
+# Immutable view of everything /live_session_data serves.
+#
+# The poller builds a new LiveSnapshot next to the current one and publishes it
+# with a single reference assignment, so a request that grabs the current
+# snapshot once sees positions and the newest team radio and race control from
+# the same moment without taking a lock. The full radio and race control
+# history lives in the session's EventLog (event_log.py); `last_event_id` is
+# how far into it this snapshot reaches, so views read from the log stay
+# consistent with the rest of the snapshot. `seq` increases with every publish and is what
+# the response cache and the push stream key on.
+
+
+class DriverRow(namedtuple(
+    "DriverRow", "number code gap laps position leader_gap last_lap best_lap sector_deltas",
+    defaults=("N/A", "N/A", "N/A", ()),
+)):
+    __slots__ = ()
+
+    def to_dict(self):
+        return {
+            "Driver Number": self.number,
+            "Code": self.code,
+            "Gap to Car Ahead": self.gap,
+            "Gap to Leader": self.leader_gap,
+            "Laps Completed": self.laps,
+            "Position": self.position,
+            "Lap Indicator": f"L{self.laps}" if self.laps else "Out",
+            "Last Lap": self.last_lap,
+            "Best Lap": self.best_lap,
+            "Sector Deltas": list(self.sector_deltas)
+        }
+
+
+class RadioRow(namedtuple("RadioRow", "number code date recording_url")):
+    __slots__ = ()
+
+    def to_dict(self):
+        return {
+            "Driver Number": self.number,
+            "Driver": self.code,
+            "Time UTC": self.date,
+            "Recording URL": self.recording_url
+        }
+
+
+class RaceControlRow(namedtuple("RaceControlRow", "category message date")):
+    __slots__ = ()
+
+    def to_dict(self):
+        return {
+            "Category": self.category,
+            "Message": self.message,
+            "Time UTC": self.date
+        }
+
+
+class LiveSnapshot:
+    __slots__ = ("seq", "session_key", "drivers", "driver_index", "team_radio", "race_control", "last_event_id",
+                 "fetched_at", "published_at")
+
+    def __init__(self, seq, session_key, drivers=(), team_radio=(), race_control=(), last_event_id=0, fetched_at=None,
+                 published_at=0.0):
+        set_ = object.__setattr__
+        set_(self, "seq", seq)
+        set_(self, "session_key", session_key)
+        set_(self, "drivers", tuple(drivers))
+        # lower-cased code -> DriverRow, for the per-driver views
+        set_(self, "driver_index", MappingProxyType({row.code.lower(): row for row in self.drivers if row.code}))
+        set_(self, "team_radio", tuple(team_radio))
+        set_(self, "race_control", tuple(race_control))
+        set_(self, "last_event_id", last_event_id)
+        # endpoint -> unix time of the fetch that last changed it
+        set_(self, "fetched_at", MappingProxyType(dict(fetched_at or {})))
+        set_(self, "published_at", published_at)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("LiveSnapshot is immutable")
+
+    def __repr__(self):
+        return f"LiveSnapshot(seq={self.seq}, session_key={self.session_key}, drivers={len(self.drivers)})"
+
+    # Copy with `changes` applied, the next sequence number and, if given,
+    # the endpoint that was just fetched stamped with the current time
+    def evolve(self, fetched=None, **changes):
+        now = time.time()
+        fetched_at = dict(self.fetched_at)
+        if fetched:
+            fetched_at[fetched] = now
+        fields = {
+            "session_key": self.session_key,
+            "drivers": self.drivers,
+            "team_radio": self.team_radio,
+            "race_control": self.race_control,
+            "last_event_id": self.last_event_id,
+            "fetched_at": fetched_at,
+        }
+        fields.update(changes)
+        return LiveSnapshot(self.seq + 1, published_at=now, **fields)
+
+    # JSON-ready copy for relaying to follower processes (see state_bus.py)
+    def to_wire(self):
+        return {
+            "seq": self.seq,
+            "session_key": self.session_key,
+            "drivers": self.drivers,
+            "team_radio": self.team_radio,
+            "race_control": self.race_control,
+            "last_event_id": self.last_event_id,
+            "fetched_at": dict(self.fetched_at),
+            "published_at": self.published_at,
+        }
+
+    @classmethod
+    def from_wire(cls, data):
+        return cls(
+            data["seq"], data["session_key"],
+            drivers=[DriverRow(*row[:-1], tuple(row[-1])) for row in data["drivers"]],
+            team_radio=[RadioRow(*row) for row in data["team_radio"]],
+            race_control=[RaceControlRow(*row) for row in data["race_control"]],
+            last_event_id=data["last_event_id"],
+            fetched_at=data["fetched_at"],
+            published_at=data["published_at"],
+        )
+
+    # Seconds since this snapshot was published
+    def age(self, now=None):
+        return (now or time.time()) - self.published_at if self.published_at else None
+
+
+EMPTY_SNAPSHOT = LiveSnapshot(0, None)
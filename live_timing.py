@@ -1,201 +1,587 @@
-from flask import Flask, jsonify, request
-from flask_cors import CORS
-import requests
-import os
-from datetime import datetime, timedelta, timezone
-import threading
-import time
-
-# Create the Flask app FIRST
-app = Flask(__name__)
-CORS(app)
-OPENF1_BASE = "https://api.openf1.org/v1"
-
-# Initialize global variables to hold the latest live session data
-live_session_data = {}
-team_radio_data = {}
-race_control_data = {}
-
-# Function to fetch sessions data
-def fetch_sessions(date=None):
-    try:
-        url = f"{OPENF1_BASE}/sessions"
-        params = {"date": date} if date else {}
-        response = requests.get(url, params=params, timeout=10)
-        response.raise_for_status()
-        return response.json()
-    except Exception as e:
-        print("Error fetching sessions:", e)
-        return []
-
-# Function to get the session key by filter
-def get_session_key_by_filter(session_filter=None):
-    now_utc = datetime.now(timezone.utc)
-    dates_to_check = [
-        (now_utc - timedelta(days=1)).date().isoformat(),
-        now_utc.date().isoformat(),
-        (now_utc + timedelta(days=1)).date().isoformat()
-    ]
-
-    sessions = []
-    for date in dates_to_check:
-        sessions += fetch_sessions(date)
-
-    if not sessions:
-        sessions = fetch_sessions()
-
-    sessions = sorted(sessions, key=lambda s: s.get("session_start_utc", ""), reverse=True)
-
-    for session in sessions:
-        start_str = session.get("session_start_utc")
-        if not start_str:
-            continue
-        try:
-            start_dt = datetime.fromisoformat(start_str.replace("Z", "+00:00"))
-            if session_filter:
-                if session.get("session_name", "").lower() != session_filter.lower():
-                    continue
-            if now_utc >= start_dt - timedelta(minutes=10):
-                return session["session_key"]
-        except Exception:
-            continue
-
-    if sessions:
-        return sessions[0].get("session_key")
-    return None
-
-# Function to fetch live position data
-def fetch_live_data(session_key):
-    try:
-        response = requests.get(
-            f"{OPENF1_BASE}/position",
-            params={"session_key": session_key},
-            timeout=10
-        )
-        response.raise_for_status()
-        return response.json()
-    except Exception as e:
-        print("Error fetching live data:", e)
-        return []
-
-# Function to fetch team radio data
-def fetch_team_radio(session_key):
-    try:
-        response = requests.get(
-            f"{OPENF1_BASE}/team_radio",
-            params={"session_key": session_key},
-            timeout=10
-        )
-        response.raise_for_status()
-        return response.json()
-    except Exception as e:
-        print("Error fetching team radio:", e)
-        return []
-
-# Function to fetch Race Control data
-def fetch_race_control(session_key):
-    try:
-        response = requests.get(
-            f"{OPENF1_BASE}/race_control",
-            params={"session_key": session_key},
-            timeout=10
-        )
-        response.raise_for_status()
-        return response.json()
-    except Exception as e:
-        print("Error fetching race control data:", e)
-        return []
-
-# Background thread to fetch all live data periodically
-def fetch_live_data_periodically():
-    global live_session_data, team_radio_data, race_control_data
-    while True:
-        session_key = get_session_key_by_filter()
-        if session_key:
-            # Fetch position data
-            raw_data = fetch_live_data(session_key)
-            if raw_data:
-                latest_data = {}
-                for entry in raw_data:
-                    number = entry.get("driver_number")
-                    if not number:
-                        continue
-                    if number not in latest_data or (entry.get("utc") or "") > (latest_data[number].get("utc") or ""):
-                        latest_data[number] = entry
-                sorted_drivers = sorted(latest_data.values(), key=lambda x: x.get("position", 999))
-                live_session_data = [
-                    {
-                        "Driver Number": driver.get("driver_number"),
-                        "Code": driver.get("driver_code"),
-                        "Gap to Car Ahead": driver.get("gap_to_car_ahead", "N/A"),
-                        "Laps Completed": driver.get("laps_completed", 0),
-                        "Position": driver.get("position", "N/A"),
-                        "Lap Indicator": f"L{driver.get('laps_completed', 0)}" if driver.get('laps_completed', 0) else "Out"
-                    }
-                    for driver in sorted_drivers
-                ]
-
-            # Fetch team radio
-            team_radio_data = [
-                {
-                    "Driver": msg.get("driver"),
-                    "Radio Message": msg.get("radio_message")
-                }
-                for msg in fetch_team_radio(session_key)
-            ]
-
-            # Fetch race control messages
-            race_data = fetch_race_control(session_key)
-            if race_data:
-                sorted_msgs = sorted(race_data, key=lambda x: x.get("utc", ""), reverse=True)
-                race_control_data["messages"] = [
-                    {
-                        "Category": msg.get("category"),
-                        "Message": msg.get("message"),
-                        "Time UTC": msg.get("utc")
-                    }
-                    for msg in sorted_msgs[:10]
-                ]
-        time.sleep(5)
-
-# Start background task
-def start_background_task():
-    thread = threading.Thread(target=fetch_live_data_periodically)
-    thread.daemon = True
-    thread.start()
-
-start_background_task()
-
-@app.route("/")
-def home():
-    return "F1 Live Timing API – Visit /live_session_data or /live_session_data/<SessionName>"
-
-@app.route("/live_session_data", defaults={'session_filter': None, 'driver_filter': None})
-@app.route("/live_session_data/<session_filter>", defaults={'driver_filter': None})
-@app.route("/live_session_data/<session_filter>/<driver_filter>")
-def live_session_data_route(session_filter, driver_filter):
-    if not live_session_data:
-        return jsonify({
-            "session": session_filter or "Unknown",
-            "drivers": [],
-            "team_radio": [],
-            "race_control": [],
-            "message": f"No live data currently available for session '{session_filter or 'N/A'}'. Please check back when the session is live."
-        })
-
-    filtered_live_data = [
-        data for data in live_session_data if driver_filter is None or (data['Code'] and data['Code'].lower() == driver_filter.lower())
-    ]
-    filtered_radio_data = [
-        msg for msg in team_radio_data if driver_filter is None or (msg['Driver'] and msg['Driver'].lower() == driver_filter.lower())
-    ]
-
-    return jsonify({
-        "session": session_filter or "All",
-        "drivers": filtered_live_data,
-        "team_radio": filtered_radio_data,
-        "race_control": race_control_data.get("messages", [])
-    })
-
-if __name__ == "__main__":
-    app.run(host='0.0.0.0', port=int(os.environ.get("PORT", 5002)))
+from flask import Flask, Response, jsonify, request
+from flask_cors import CORS
+import upstream
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed, TimeoutError as FetchTimeout
+from openf1 import fetch_sessions, openf1_url
+from session_index import SessionSchedule
+from stream import Broadcaster, format_sse
+from response_cache import ResponseCache, request_format, serve, serve_payload
+from event_log import DEFAULT_LIMIT, MAX_LIMIT, Event, EventLog
+from live_snapshot import EMPTY_SNAPSHOT, DriverRow, LiveSnapshot, RadioRow, RaceControlRow
+from state_bus import StateBus
+from timing_engine import TimingEngine
+import metrics
+import poller
+
+# Create the Flask app FIRST
+app = Flask(__name__)
+CORS(app)
+metrics.install(app)
+
+# Latest published LiveSnapshot. Only the poller replaces it; readers take the
+# reference once per request and use that snapshot throughout.
+current_snapshot = EMPTY_SNAPSHOT
+
+# Season schedule, loaded once and refreshed by the poller; lookups are in-memory
+session_schedule = SessionSchedule(fetch_sessions)
+
+# Function to get the session key by filter
+def get_session_key_by_filter(session_filter=None):
+    if session_schedule.maybe_refresh():
+        bus.publish("sessions", session_schedule.raw_sessions)
+    return session_schedule.session_key_for(session_filter)
+
+# Timestamp used to order OpenF1 rows and to advance the per-endpoint cursor
+def row_time(row):
+    return row.get("date") or row.get("utc") or ""
+
+# Function to fetch live position data
+def fetch_live_data(session_key, since=None):
+    try:
+        response = upstream.get(openf1_url("position", session_key, since), timeout=10)
+        response.raise_for_status()
+        return response.json()
+    except Exception as e:
+        print("Error fetching live data:", e)
+        return []
+
+# Function to fetch team radio data
+def fetch_team_radio(session_key, since=None):
+    try:
+        response = upstream.get(openf1_url("team_radio", session_key, since), timeout=10)
+        response.raise_for_status()
+        return response.json()
+    except Exception as e:
+        print("Error fetching team radio:", e)
+        return []
+
+# Function to fetch Race Control data
+def fetch_race_control(session_key, since=None):
+    try:
+        response = upstream.get(openf1_url("race_control", session_key, since), timeout=10)
+        response.raise_for_status()
+        return response.json()
+    except Exception as e:
+        print("Error fetching race control data:", e)
+        return []
+
+# Function to fetch lap data. `since` is (first lap, {driver number: first
+# lap}): every driver's laps from the first lap onwards, plus those of drivers
+# too far behind for it, each from its own lap. Laps are re-read from the
+# oldest one still in progress, because OpenF1 fills in a lap's sector and lap
+# times as it is driven rather than appending a new row.
+def fetch_laps(session_key, since=None):
+    first_lap, lagging = since or (1, {})
+    queries = [f"lap_number>={int(first_lap)}"] + [
+        f"driver_number={int(number)}&lap_number>={int(lap)}" for number, lap in lagging.items()
+    ]
+    rows = []
+    for query in queries:
+        try:
+            response = upstream.get(f"{openf1_url('laps', session_key)}&{query}", timeout=10)
+            response.raise_for_status()
+            rows.extend(response.json())
+        except Exception as e:
+            print("Error fetching laps:", e)
+    return rows
+
+# Function to fetch gap/interval data
+def fetch_intervals(session_key, since=None):
+    try:
+        response = upstream.get(openf1_url("intervals", session_key, since), timeout=10)
+        response.raise_for_status()
+        return response.json()
+    except Exception as e:
+        print("Error fetching intervals:", e)
+        return []
+
+# Function to fetch the driver list (number -> three-letter code) for a session
+def fetch_drivers(session_key):
+    try:
+        response = upstream.get(openf1_url("drivers", session_key), timeout=10)
+        response.raise_for_status()
+        return response.json()
+    except Exception as e:
+        print("Error fetching drivers:", e)
+        return []
+
+# Incremental ingestion state for the session currently being polled.
+# Each endpoint keeps a high-water mark (the newest row `date` seen so far) and
+# only asks OpenF1 for rows after it, so a poll late in a race moves the same
+# amount of data as one on lap 1. Everything is dropped when the session changes.
+ingest_state = {
+    "session_key": None,
+    "cursors": {},
+    "positions": {},
+    "driver_codes": {},
+}
+
+# Lap, sector and interval state for the session, fed from /laps and /intervals
+timing = TimingEngine()
+
+# Team radio and race control for the session, append-only and indexed
+# (see event_log.py). Replaced, not cleared, when the session changes.
+event_log = EventLog()
+
+# Newest messages kept in the snapshot for /live_session_data; the rest are
+# served from the event log
+MAX_RACE_CONTROL_MESSAGES = 10
+MAX_TEAM_RADIO_MESSAGES = 20
+
+def reset_ingest_state(session_key):
+    ingest_state["session_key"] = session_key
+    ingest_state["cursors"] = {}
+    ingest_state["positions"] = {}
+    ingest_state["driver_codes"] = {}
+    timing.reset()
+
+def load_driver_codes(session_key):
+    ingest_state["driver_codes"] = {
+        driver["driver_number"]: driver.get("name_acronym")
+        for driver in fetch_drivers(session_key)
+        if driver.get("driver_number") is not None
+    }
+
+# Advance the cursor for an endpoint to the newest row in a batch
+def advance_cursor(endpoint, rows):
+    newest = max((row_time(row) for row in rows), default="")
+    if newest > ingest_state["cursors"].get(endpoint, ""):
+        ingest_state["cursors"][endpoint] = newest
+
+# Keep only the newest position row per driver
+def merge_position_rows(rows):
+    positions = ingest_state["positions"]
+    for entry in rows:
+        number = entry.get("driver_number")
+        if not number:
+            continue
+        if number not in positions or row_time(entry) >= row_time(positions[number]):
+            positions[number] = entry
+
+def build_driver_rows():
+    sorted_drivers = sorted(ingest_state["positions"].values(), key=lambda x: x.get("position", 999))
+    codes = ingest_state["driver_codes"]
+    details = timing.describe([driver.get("driver_number") for driver in sorted_drivers])
+    rows = []
+    for driver in sorted_drivers:
+        number = driver.get("driver_number")
+        gap, leader_gap, laps, last_lap, best_lap, sector_deltas = details.get(
+            number, ("N/A", "N/A", 0, "N/A", "N/A", ()))
+        rows.append(DriverRow(
+            number,
+            codes.get(number) or driver.get("driver_code"),
+            gap,
+            laps,
+            driver.get("position", "N/A"),
+            leader_gap,
+            last_lap,
+            best_lap,
+            sector_deltas
+        ))
+    return tuple(rows)
+
+# OpenF1 /team_radio rows carry the driver number, date and recording URL
+def team_radio_event(msg):
+    number = msg.get("driver_number")
+    return Event(None, "team_radio", row_time(msg), number, ingest_state["driver_codes"].get(number),
+                 recording_url=msg.get("recording_url"))
+
+def race_control_event(msg):
+    number = msg.get("driver_number")
+    return Event(None, "race_control", row_time(msg), number, ingest_state["driver_codes"].get(number),
+                 msg.get("category"), msg.get("flag"), msg.get("lap_number"), msg.get("scope"), msg.get("sector"),
+                 msg.get("message"))
+
+def team_radio_row(event):
+    return RadioRow(event.driver_number, event.driver, event.date, event.recording_url)
+
+def race_control_row(event):
+    return RaceControlRow(event.category, event.message, event.date)
+
+# The event log if it belongs to `snapshot`'s session, else an empty one
+def session_events(snapshot):
+    log = event_log
+    return log if log.session_key == snapshot.session_key else EventLog(snapshot.session_key)
+
+def recent_team_radio(log, until=None, **filters):
+    return tuple(team_radio_row(event) for event in log.latest(
+        MAX_TEAM_RADIO_MESSAGES, until, kind="team_radio", **filters))
+
+# Newest first, as race control is shown
+def recent_race_control(log):
+    return tuple(race_control_row(event) for event in reversed(log.latest(MAX_RACE_CONTROL_MESSAGES, kind="race_control")))
+
+def matches_driver(code, driver_filter):
+    return driver_filter is None or bool(code and code.lower() == driver_filter.lower())
+
+def session_matches(snapshot, session_filter):
+    return not session_filter or session_schedule.session_key_for(session_filter) == snapshot.session_key
+
+# Push stream of live changes for /live_session_data/stream subscribers.
+# Subscribers are keyed by their (session_filter, driver_filter) pair.
+live_stream = Broadcaster()
+
+# Send `event` to every subscriber whose filters select at least one of `rows`.
+# Rows without a driver code (race control) go to every subscriber.
+def broadcast_rows(snapshot, event, rows, by_driver=True):
+    if not len(live_stream) or not rows:
+        return
+
+    def render(key):
+        session_filter, driver_filter = key
+        if not session_matches(snapshot, session_filter):
+            return None
+        selected = [row.to_dict() for row in rows if not by_driver or matches_driver(row.code, driver_filter)]
+        if not selected:
+            return None
+        return format_sse(event, app.json.dumps(selected))
+
+    live_stream.publish(render)
+
+# Encoded /live_session_data views, keyed by (session_filter, driver_filter) and
+# rebuilt for every new snapshot sequence number
+live_responses = ResponseCache(lambda payload: app.json.dumps(payload))
+
+def live_response_key(session_filter, driver_filter):
+    return session_filter, driver_filter.lower() if driver_filter else None
+
+def live_response(snapshot, session_filter, driver_filter, fmt="json"):
+    key = live_response_key(session_filter, driver_filter)
+    return live_responses.get(key, snapshot.seq, lambda: build_live_payload(snapshot, session_filter, driver_filter), fmt)
+
+# The view if it is already encoded for `snapshot`, else None
+def cached_live_response(snapshot, session_filter, driver_filter, fmt="json"):
+    return live_responses.cached(live_response_key(session_filter, driver_filter), snapshot.seq, fmt)
+
+# Swap in a snapshot and pre-encode the views most clients ask for: the
+# unfiltered payload and one per driver
+def install_snapshot(snapshot):
+    global current_snapshot
+    current_snapshot = snapshot
+    live_response(snapshot, None, None)
+    for row in snapshot.drivers:
+        if row.code:
+            live_response(snapshot, None, row.code)
+
+# Publish the poller's next snapshot here and to any follower processes
+def publish_snapshot(fetched=None, **changes):
+    snapshot = current_snapshot.evolve(fetched=fetched, **changes)
+    install_snapshot(snapshot)
+    bus.publish("snapshot", snapshot_message(snapshot))
+    return snapshot
+
+# A snapshot as relayed to followers, with the ingest cursors a follower needs
+# to carry on polling if it takes over
+def snapshot_message(snapshot):
+    return dict(snapshot.to_wire(), cursors=dict(ingest_state["cursors"]))
+
+# Merge a batch of new rows for one endpoint, publish a new snapshot and
+# stream only what changed
+def publish_drivers(fetched):
+    previous = {row.number: row for row in current_snapshot.drivers}
+    snapshot = publish_snapshot(fetched=fetched, drivers=build_driver_rows())
+    changed = [row for row in snapshot.drivers if previous.get(row.number) != row]
+    broadcast_rows(snapshot, "positions", changed)
+
+def publish_positions(rows):
+    merge_position_rows(rows)
+    advance_cursor("position", rows)
+    publish_drivers("position")
+
+def publish_laps(rows):
+    timing.ingest_laps(rows)
+    ingest_state["cursors"]["laps"] = (timing.lap_cursor(), timing.lagging_cursors())
+    publish_drivers("laps")
+
+def publish_intervals(rows):
+    timing.ingest_intervals(rows)
+    advance_cursor("intervals", rows)
+    publish_drivers("intervals")
+
+# Append to the event log and relay the new events ahead of the snapshot that
+# shows them, so followers never serve a snapshot newer than their log
+def log_events(events):
+    added = event_log.add(events)
+    if added:
+        bus.publish("events", {"session_key": event_log.session_key, "events": added})
+    return added
+
+def publish_team_radio(rows):
+    advance_cursor("team_radio", rows)
+    added = log_events([team_radio_event(msg) for msg in sorted(rows, key=row_time)])
+    snapshot = publish_snapshot(fetched="team_radio", team_radio=recent_team_radio(event_log),
+                                last_event_id=event_log.last_id())
+    broadcast_rows(snapshot, "team_radio", [team_radio_row(event) for event in added])
+
+def publish_race_control(rows):
+    advance_cursor("race_control", rows)
+    added = log_events([race_control_event(msg) for msg in sorted(rows, key=row_time)])
+    snapshot = publish_snapshot(fetched="race_control", race_control=recent_race_control(event_log),
+                                last_event_id=event_log.last_id())
+    broadcast_rows(snapshot, "race_control", [race_control_row(event) for event in added], by_driver=False)
+
+# Per-session endpoints polled every tick: (fetch function, publish function)
+LIVE_ENDPOINTS = {
+    "position": (fetch_live_data, publish_positions),
+    "team_radio": (fetch_team_radio, publish_team_radio),
+    "race_control": (fetch_race_control, publish_race_control),
+    "laps": (fetch_laps, publish_laps),
+    "intervals": (fetch_intervals, publish_intervals),
+}
+
+# Tick cadence while a session is live, and around sessions; with nothing on
+# the poller sleeps until just before the next session (see SessionSchedule.poll_delay)
+POLL_INTERVAL = 5
+IDLE_POLL_INTERVAL = float(os.environ.get("LIVE_TIMING_IDLE_INTERVAL", 120))
+# "fanout" issues every endpoint fetch at once; "serial" runs them one by one
+POLL_MODE = os.environ.get("LIVE_TIMING_POLL_MODE", "fanout")
+# Longest a fan-out tick waits for its fetches before moving on
+TICK_DEADLINE = float(os.environ.get("LIVE_TIMING_TICK_DEADLINE", 4))
+
+DEADLINE_MISSES = metrics.Counter(
+    "live_timing_deadline_misses_total", "Endpoint fetches still running when a tick's deadline passed.", ("endpoint",))
+deadline_misses = {endpoint: DEADLINE_MISSES.labels(endpoint) for endpoint in LIVE_ENDPOINTS}
+metrics.Gauge(
+    "live_snapshot_age_seconds", "Seconds since the served live snapshot was published.",
+).set_function(lambda: current_snapshot.age())
+metrics.Gauge("live_stream_subscribers", "Connected /live_session_data/stream clients.").set_function(lambda: len(live_stream))
+
+fetch_pool = ThreadPoolExecutor(max_workers=len(LIVE_ENDPOINTS), thread_name_prefix="openf1-fetch")
+# endpoint -> (session_key, future) for fetches that outlived their tick
+inflight_fetches = {}
+
+def start_session(session_key):
+    global event_log
+    reset_ingest_state(session_key)
+    inflight_fetches.clear()
+    # A follower taking over mid-session keeps the log it was relayed, so event
+    # IDs clients hold stay valid; the rows it fetches again are duplicates
+    if event_log.session_key != session_key:
+        event_log = EventLog(session_key)
+    publish_snapshot(session_key=session_key, drivers=(), team_radio=recent_team_radio(event_log),
+                     race_control=recent_race_control(event_log), last_event_id=event_log.last_id(), fetched_at={})
+
+def poll_endpoints_serial(session_key):
+    for endpoint, (fetch, publish) in LIVE_ENDPOINTS.items():
+        rows = fetch(session_key, ingest_state["cursors"].get(endpoint))
+        if rows:
+            publish(rows)
+
+# Fetch every endpoint concurrently and publish each result as it lands.
+# An endpoint still running when the deadline passes is left in flight and
+# picked up on a later tick, rather than being requested again on top of itself.
+# Results are always merged here, on the poller thread, so state has one writer.
+def poll_endpoints_fanout(session_key):
+    deadline = time.monotonic() + TICK_DEADLINE
+    pending = {}
+    for endpoint, (fetch, _) in LIVE_ENDPOINTS.items():
+        if endpoint not in inflight_fetches:
+            future = fetch_pool.submit(fetch, session_key, ingest_state["cursors"].get(endpoint))
+            inflight_fetches[endpoint] = (session_key, future)
+        pending[inflight_fetches[endpoint][1]] = endpoint
+
+    try:
+        for future in as_completed(pending, timeout=max(0, deadline - time.monotonic())):
+            endpoint = pending[future]
+            fetched_for, _ = inflight_fetches.pop(endpoint)
+            rows = future.result()
+            if rows and fetched_for == ingest_state["session_key"]:
+                LIVE_ENDPOINTS[endpoint][1](rows)
+    except FetchTimeout:
+        slow = [endpoint for future, endpoint in pending.items() if not future.done()]
+        for endpoint in slow:
+            deadline_misses[endpoint].inc()
+        print(f"Live timing tick deadline passed, still waiting on: {', '.join(slow)}")
+
+# One live timing tick; run by the supervised poller below
+def poll_once():
+    session_key = get_session_key_by_filter()
+    if session_key:
+        if session_key != ingest_state["session_key"]:
+            start_session(session_key)
+        if not ingest_state["driver_codes"]:
+            load_driver_codes(session_key)
+        if POLL_MODE == "serial":
+            poll_endpoints_serial(session_key)
+        else:
+            poll_endpoints_fanout(session_key)
+
+def poll_delay():
+    return session_schedule.poll_delay(POLL_INTERVAL, IDLE_POLL_INTERVAL)
+
+# Install a snapshot relayed by the polling leader and stream the position
+# changes, as the leader did for its own subscribers
+def adopt_snapshot(snapshot):
+    global event_log
+    previous = current_snapshot
+    if snapshot.session_key != event_log.session_key:
+        event_log = EventLog(snapshot.session_key)
+    install_snapshot(snapshot)
+    drivers = {row.number: row for row in previous.drivers}
+    broadcast_rows(snapshot, "positions", [row for row in snapshot.drivers if drivers.get(row.number) != row])
+
+# Append events relayed by the leader (IDs and all) and stream the new ones
+def adopt_events(payload):
+    global event_log
+    if payload["session_key"] != event_log.session_key:
+        event_log = EventLog(payload["session_key"])
+    added = event_log.extend(Event(*event) for event in payload["events"])
+    broadcast_rows(current_snapshot, "team_radio", [
+        team_radio_row(event) for event in added if event.kind == "team_radio"])
+    broadcast_rows(current_snapshot, "race_control", [
+        race_control_row(event) for event in added if event.kind == "race_control"], by_driver=False)
+
+def apply_bus_message(kind, payload):
+    global relayed_cursors
+    if kind == "sessions":
+        session_schedule.load(payload)
+    elif kind == "events":
+        adopt_events(payload)
+    elif kind == "snapshot":
+        relayed_cursors = payload.get("cursors", {})
+        adopt_snapshot(LiveSnapshot.from_wire(payload))
+
+# What a follower that just connected needs to catch up
+def bus_state():
+    state = [("sessions", session_schedule.raw_sessions)] if session_schedule.loaded else []
+    log = event_log
+    return state + [
+        ("events", {"session_key": log.session_key, "events": log.all()}),
+        ("snapshot", snapshot_message(current_snapshot)),
+    ]
+
+# Ingest cursors of the leader this process follows, from its last snapshot
+relayed_cursors = {}
+
+# Taking over from a leader that died: carry on with the session it was
+# polling from the state it relayed, instead of publishing an empty snapshot
+# and downloading the session again. Positions and driver codes come from the
+# snapshot, the endpoint cursors from the leader. Lap history is not relayed,
+# so /laps is read again from lap 1 to rebuild lap and sector times.
+def resume_relayed_session():
+    snapshot = current_snapshot
+    if snapshot.session_key is None:
+        return
+    ingest_state["session_key"] = snapshot.session_key
+    ingest_state["driver_codes"] = {row.number: row.code for row in snapshot.drivers if row.code}
+    ingest_state["positions"] = {
+        row.number: {"driver_number": row.number, "driver_code": row.code, "position": row.position}
+        for row in snapshot.drivers if isinstance(row.position, int)
+    }
+    ingest_state["cursors"] = {endpoint: cursor for endpoint, cursor in relayed_cursors.items() if endpoint != "laps"}
+
+# Start background task
+def start_background_task():
+    global live_poller
+    resume_relayed_session()
+    live_poller = poller.supervise("live_timing", poll_once, poll_delay)
+    return live_poller
+
+# Only one process per host polls OpenF1; the others follow it (see state_bus.py)
+live_poller = None
+bus = StateBus("live_timing", apply_bus_message, bus_state)
+bus.start(on_leader=start_background_task)
+# Keep the systemd watchdog fed while it leads or follows (see poller.py)
+poller.supervisor.watch("live_timing bus", bus.healthy)
+poller.supervisor.start()
+
+@app.route("/")
+def home():
+    return "F1 Live Timing API – Visit /live_session_data or /live_session_data/<SessionName>"
+
+def build_live_payload(snapshot, session_filter, driver_filter):
+    # Resolve the requested session from the in-memory schedule; only the
+    # session the poller is following has live data to serve
+    if not snapshot.drivers or not session_matches(snapshot, session_filter):
+        return {
+            "session": session_filter or "Unknown",
+            "drivers": [],
+            "team_radio": [],
+            "race_control": [],
+            "message": f"No live data currently available for session '{session_filter or 'N/A'}'. Please check back when the session is live."
+        }
+
+    # A driver filter is a lookup in the snapshot's code index and the event
+    # log's driver index rather than a scan of every row. The log is read only
+    # up to the snapshot's last event, since the poller may have appended more.
+    if driver_filter is None:
+        drivers, radio = snapshot.drivers, snapshot.team_radio
+    else:
+        row = snapshot.driver_index.get(driver_filter.lower())
+        drivers = (row,) if row else ()
+        radio = recent_team_radio(session_events(snapshot), snapshot.last_event_id, driver=driver_filter)
+
+    return {
+        "session": session_filter or "All",
+        "drivers": [row.to_dict() for row in drivers],
+        "team_radio": [msg.to_dict() for msg in radio],
+        "race_control": [msg.to_dict() for msg in snapshot.race_control]
+    }
+
+@app.route("/live_session_data", defaults={'session_filter': None, 'driver_filter': None})
+@app.route("/live_session_data/<session_filter>", defaults={'driver_filter': None})
+@app.route("/live_session_data/<session_filter>/<driver_filter>")
+def live_session_data_route(session_filter, driver_filter):
+    return serve(live_response(current_snapshot, session_filter, driver_filter, request_format()))
+
+# The session's team radio and race control after a cursor, oldest first.
+# ?since=<the last ID seen> (default 0: from the start), ?type=team_radio or
+# race_control, ?driver=<number or code>, ?category=, ?flag=, ?lap= and
+# ?limit= (default 100, at most 1000). Poll again with since=next_since while
+# has_more is true to page through the backlog.
+@app.route("/live_session_data/events")
+def live_events_route():
+    snapshot = current_snapshot
+    try:
+        since = int(request.args.get("since", 0))
+        limit = min(max(int(request.args.get("limit", DEFAULT_LIMIT)), 1), MAX_LIMIT)
+        lap = int(request.args["lap"]) if "lap" in request.args else None
+    except ValueError:
+        return jsonify({"error": "since, limit and lap must be integers"}), 400
+    driver = request.args.get("driver")
+    filters = {
+        "kind": request.args.get("type"),
+        "category": request.args.get("category"),
+        "flag": request.args.get("flag"),
+        "lap": lap,
+    }
+    if driver and driver.isdigit():
+        filters["driver_number"] = int(driver)
+    else:
+        filters["driver"] = driver
+    log = session_events(snapshot)
+    events, has_more = log.since(since, limit, **filters)
+    return serve_payload({
+        "session_key": log.session_key,
+        "events": [event.to_dict() for event in events],
+        "next_since": events[-1].id if events else since,
+        "has_more": has_more
+    })
+
+# Server-sent events: a full snapshot on connect, then only the position
+# changes, new team radio and new race control messages as the poller sees them
+@app.route("/live_session_data/stream", defaults={'session_filter': None, 'driver_filter': None})
+@app.route("/live_session_data/stream/<session_filter>", defaults={'driver_filter': None})
+@app.route("/live_session_data/stream/<session_filter>/<driver_filter>")
+def live_session_stream_route(session_filter, driver_filter):
+    subscriber = live_stream.subscribe((session_filter, driver_filter))
+    snapshot = format_sse("snapshot", live_response(current_snapshot, session_filter, driver_filter).body.decode("utf-8"))
+
+    def events():
+        try:
+            yield snapshot
+            yield from subscriber.messages()
+        finally:
+            live_stream.unsubscribe(subscriber)
+
+    return Response(events(), mimetype="text/event-stream", headers={
+        "Cache-Control": "no-cache",
+        "X-Accel-Buffering": "no"
+    })
+
+if __name__ == "__main__":
+    # the development server binds its port as soon as run() starts
+    poller.notify_ready()
+    app.run(host='0.0.0.0', port=int(os.environ.get("PORT", 5002)))
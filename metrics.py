@@ -0,0 +1,277 @@
+from bisect import bisect_left
+import threading
+import time
+
+# Minimal Prometheus-style metrics, cheap enough for the hot paths.
+#
+# Metrics are declared once at import time. Each label combination gets a
+# child holding preallocated counters or bucket counts; callers look a child
+# up once (per host, per cache, per route) and keep it, so recording a value is
+# a lock, an add and, for histograms, a bisect over the bucket bounds. Gauges
+# can instead be backed by a function that is only evaluated when /metrics is
+# scraped. All metrics live in one process-wide registry, so the combined ASGI
+# process exposes every service's metrics on one /metrics page.
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+_registry = []
+_registry_lock = threading.Lock()
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names, values):
+    if not names:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values)) + "}"
+
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children = {}
+        self._lock = threading.Lock()
+        with _registry_lock:
+            _registry.append(self)
+
+    # Child for one combination of label values; keep it rather than calling
+    # this on every observation
+    def labels(self, *values):
+        child = self._children.get(values)
+        if child is None:
+            with self._lock:
+                child = self._children.get(values)
+                if child is None:
+                    child = self._children[values] = self._new_child()
+        return child
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        for values, child in sorted(self._children.items(), key=lambda item: tuple(map(str, item[0]))):
+            lines.extend(self._render_child(_format_labels(self.labelnames, values), values, child))
+        return lines
+
+
+class _CounterChild:
+    __slots__ = ("value", "_lock")
+
+    def __init__(self):
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1.0):
+        with self._lock:
+            self.value += amount
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def _new_child(self):
+        return _CounterChild()
+
+    def inc(self, amount=1.0):
+        self.labels().inc(amount)
+
+    def _render_child(self, labels, values, child):
+        return [f"{self.name}{labels} {_format_value(child.value)}"]
+
+
+class _GaugeChild:
+    __slots__ = ("value", "function")
+
+    def __init__(self):
+        self.value = 0.0
+        self.function = None
+
+    def set(self, value):
+        self.value = value
+
+    # Evaluate `function()` at scrape time instead of storing a value
+    def set_function(self, function):
+        self.function = function
+
+    def get(self):
+        if self.function is None:
+            return self.value
+        try:
+            return self.function()
+        except Exception:
+            return float("nan")
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def _new_child(self):
+        return _GaugeChild()
+
+    def set(self, value):
+        self.labels().set(value)
+
+    def set_function(self, function):
+        self.labels().set_function(function)
+
+    def _render_child(self, labels, values, child):
+        value = child.get()
+        if value is None:
+            return []
+        return [f"{self.name}{labels} {_format_value(value)}"]
+
+
+class _HistogramChild:
+    __slots__ = ("bounds", "counts", "sum", "_lock")
+
+    def __init__(self, bounds):
+        self.bounds = bounds
+        # one slot per bucket plus +Inf; cumulated only when rendered
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        i = bisect_left(self.bounds, value)
+        with self._lock:
+            self.counts[i] += 1
+            self.sum += value
+
+    # Context manager timing a block in seconds
+    def time(self):
+        return _Timer(self)
+
+
+class _Timer:
+    __slots__ = ("child", "start")
+
+    def __init__(self, child):
+        self.child = child
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.child.observe(time.perf_counter() - self.start)
+        return False
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames)
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value):
+        self.labels().observe(value)
+
+    def _render_child(self, labels, values, child):
+        with child._lock:
+            counts, total = list(child.counts), child.sum
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets + (float("inf"),), counts):
+            cumulative += count
+            bucket_labels = _format_labels(self.labelnames + ("le",), values + (_format_value(bound),))
+            lines.append(f"{self.name}_bucket{bucket_labels} {cumulative}")
+        lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+        lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+# The whole registry in Prometheus text exposition format
+def render():
+    with _registry_lock:
+        metrics = list(_registry)
+    lines = []
+    for metric in metrics:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+# Shared HTTP metrics, recorded by the Flask apps and the ASGI fast path
+HTTP_REQUEST_SECONDS = Histogram("http_request_duration_seconds", "Time to produce a response, by route.", ("route",))
+HTTP_REQUESTS = Counter("http_requests_total", "Responses sent, by route and status.", ("route", "status"))
+_route_children = {}
+
+
+# (latency histogram child, {status: counter child}) for a route label
+def route_metrics(route):
+    children = _route_children.get(route)
+    if children is None:
+        children = _route_children[route] = (HTTP_REQUEST_SECONDS.labels(route), {})
+    return children
+
+
+def observe_request(route, status, seconds):
+    latency, statuses = route_metrics(route)
+    latency.observe(seconds)
+    counter = statuses.get(status)
+    if counter is None:
+        counter = statuses[status] = HTTP_REQUESTS.labels(route, str(status))
+    counter.inc()
+
+
+# Background poller health, shared by the live timing and position ingesters
+POLLER_TICK_SECONDS = Histogram("poller_tick_duration_seconds", "Duration of one poller tick.", ("poller",))
+POLLER_LAG_SECONDS = Gauge(
+    "poller_lag_seconds", "Seconds since the poller last finished a tick; keeps growing if it stalls.", ("poller",))
+POLLER_ERRORS = Counter("poller_errors_total", "Poller ticks that raised.", ("poller",))
+
+
+class PollerMetrics:
+    __slots__ = ("ticks", "errors", "last_tick")
+
+    def __init__(self, name):
+        self.ticks = POLLER_TICK_SECONDS.labels(name)
+        self.errors = POLLER_ERRORS.labels(name)
+        self.last_tick = None
+        POLLER_LAG_SECONDS.labels(name).set_function(self.lag)
+
+    def lag(self):
+        return None if self.last_tick is None else time.time() - self.last_tick
+
+    # Record a tick that started at perf_counter() value `started`
+    def tick_done(self, started):
+        self.ticks.observe(time.perf_counter() - started)
+        self.last_tick = time.time()
+
+
+# Time every request to a Flask app by URL rule, and serve /metrics from it
+def install(app):
+    from flask import Response, g, request
+
+    @app.before_request
+    def start_timer():
+        g.metrics_start = time.perf_counter()
+
+    @app.after_request
+    def record_request(response):
+        start = g.pop("metrics_start", None)
+        if start is not None:
+            rule = request.url_rule.rule if request.url_rule is not None else "unmatched"
+            observe_request(rule, response.status_code, time.perf_counter() - start)
+        return response
+
+    @app.route("/metrics")
+    def metrics_route():
+        return Response(render(), content_type=CONTENT_TYPE)
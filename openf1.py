@@ -0,0 +1,39 @@
+import os
+from urllib.parse import quote
+
+import upstream
+
+# OpenF1 requests shared by live_timing.py and position.py.
+#
+# Both services load the same season schedule (see session_index.py) and poll
+# per-session endpoints incrementally, asking only for rows newer than the last
+# `date` they ingested.
+
+# Overridable to point the services at a local replay server (openf1_replay.py)
+OPENF1_BASE = os.environ.get("OPENF1_BASE", "https://api.openf1.org/v1")
+
+
+# Sessions on `date` and/or in `year`; [] if OpenF1 cannot be reached
+def fetch_sessions(date=None, year=None):
+    try:
+        params = {}
+        if date:
+            params["date"] = date
+        if year:
+            params["year"] = year
+        response = upstream.get(f"{OPENF1_BASE}/sessions", params=params, timeout=10)
+        response.raise_for_status()
+        return response.json()
+    except Exception as e:
+        print("Error fetching sessions:", e)
+        return []
+
+
+# Build an OpenF1 query URL, optionally restricted to rows newer than `since`.
+# The `date>` comparison has to appear literally in the query string, so it is
+# assembled by hand rather than through `params=`.
+def openf1_url(endpoint, session_key, since=None):
+    url = f"{OPENF1_BASE}/{endpoint}?session_key={session_key}"
+    if since:
+        url += f"&date>{quote(since, safe=':')}"
+    return url
@@ -0,0 +1,256 @@
+import argparse
+import bisect
+import json
+import os
+import re
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from urllib.parse import unquote, urlsplit
+
+from flask import Flask, Response, request
+
+from recorder import read_archive
+from session_index import parse_utc
+
+# Offline stand-in for the OpenF1 API, replaying a recorded (or generated) session.
+#
+#   python openf1_replay.py session.jsonl.gz --speed 10 --port 8765
+#   python openf1_replay.py --sample race --speed 100
+#   OPENF1_BASE=http://127.0.0.1:8765/v1 python live_timing.py
+#
+# The session is shifted so it starts when the replay starts and runs at
+# `speed` times real time: a row becomes visible once the replay clock passes
+# its own time, and every date field is rewritten into the shifted timeline, so
+# `/sessions` reports the session as live right now and `date>` cursors behave
+# as they do against the real API. Laps become visible once they are complete.
+#
+# Supported query filters: equality plus >, >=, <, <= on any field, with date
+# fields compared as times (e.g. `session_key=9999&date>2025-07-06T14:00:00`).
+
+DATE_FIELDS = ("date", "date_start", "date_end")
+FILTER = re.compile(r"^([A-Za-z0-9_]+)(>=|<=|>|<|=)(.*)$")
+OPERATORS = {
+    "=": lambda a, b: a == b,
+    ">": lambda a, b: a > b,
+    ">=": lambda a, b: a >= b,
+    "<": lambda a, b: a < b,
+    "<=": lambda a, b: a <= b,
+}
+
+
+def epoch(value):
+    when = parse_utc(value) if isinstance(value, str) else None
+    return when.timestamp() if when else None
+
+
+def iso(seconds):
+    return datetime.fromtimestamp(seconds, timezone.utc).isoformat()
+
+
+# Unix time at which a row exists upstream: laps once driven, everything else at its date
+def visible_at(endpoint, row):
+    if endpoint == "laps":
+        start = epoch(row.get("date_start"))
+        if start is not None and isinstance(row.get("lap_duration"), (int, float)):
+            return start + row["lap_duration"]
+        return start
+    for field in DATE_FIELDS:
+        when = epoch(row.get(field))
+        if when is not None:
+            return when
+    return None
+
+
+# (row, {date field: unix time}) so dates are parsed once, not per request
+def indexed(row):
+    return row, {field: when for field in DATE_FIELDS if (when := epoch(row.get(field))) is not None}
+
+
+class ReplayArchive:
+    # `rows` maps endpoint name -> list of OpenF1 rows
+    def __init__(self, rows):
+        self.sessions = [indexed(row) for row in rows.get("sessions", [])]
+        self.endpoints = {}
+        for endpoint, endpoint_rows in rows.items():
+            if endpoint == "sessions":
+                continue
+            timed, untimed = [], []
+            for row in endpoint_rows:
+                when = visible_at(endpoint, row)
+                (untimed if when is None else timed).append((when, indexed(row)))
+            timed.sort(key=lambda item: item[0])
+            self.endpoints[endpoint] = (
+                [when for when, _ in timed],
+                [entry for _, entry in timed],
+                [entry for _, entry in untimed],
+            )
+        starts = [dates["date_start"] for _, dates in self.sessions if "date_start" in dates]
+        first_rows = [times[0] for times, _, _ in self.endpoints.values() if times]
+        self.origin = min(starts or first_rows or [0.0])
+
+    # Rows per endpoint from a recorder archive, de-duplicated across polls
+    @classmethod
+    def from_file(cls, path):
+        rows = defaultdict(dict)
+        for record in read_archive(path):
+            body = record.get("body")
+            if record.get("status") != 200 or not isinstance(body, list):
+                continue
+            endpoint = urlsplit(record["url"]).path.rstrip("/").rsplit("/", 1)[-1]
+            for row in body:
+                rows[endpoint][json.dumps(row, sort_keys=True)] = row
+        return cls({endpoint: list(by_key.values()) for endpoint, by_key in rows.items()})
+
+
+class ReplayClock:
+    def __init__(self, origin, speed=1.0, start_offset=0.0):
+        self.origin = origin
+        self.speed = speed
+        self.started = time.time() - start_offset / speed
+
+    # Archive time the replay has reached
+    def now(self):
+        return self.origin + (time.time() - self.started) * self.speed
+
+    # Archive time -> shifted (served) time, and back
+    def shift(self, t):
+        return self.started + (t - self.origin) / self.speed
+
+    def unshift(self, t):
+        return self.origin + (t - self.started) * self.speed
+
+
+def parse_value(field, value):
+    value = unquote(value)
+    if field in DATE_FIELDS:
+        return epoch(value)
+    for cast in (int, float):
+        try:
+            return cast(value)
+        except ValueError:
+            pass
+    return value
+
+
+# [(field, operator, value)] from a raw OpenF1-style query string
+def parse_filters(query_string):
+    filters = []
+    for part in query_string.split("&"):
+        match = FILTER.match(unquote(part))
+        if match and match.group(2) in OPERATORS:
+            field, op, value = match.groups()
+            filters.append((field, op, parse_value(field, value)))
+    return filters
+
+
+class ReplayServer:
+    def __init__(self, archive, speed=1.0, start_offset=0.0):
+        self.archive = archive
+        self.clock = ReplayClock(archive.origin, speed, start_offset)
+        self.requests = 0
+        self._lock = threading.Lock()
+
+    # Copy of an indexed row with its dates moved onto the replay timeline
+    def shifted(self, entry):
+        row, dates = entry
+        row = dict(row)
+        for field, when in dates.items():
+            row[field] = iso(self.clock.shift(when))
+        if "year" in row and "date_start" in dates:
+            row["year"] = datetime.fromtimestamp(self.clock.shift(dates["date_start"]), timezone.utc).year
+        return row
+
+    # Rows of `endpoint` visible now that pass `filters`; dates already shifted
+    def query(self, endpoint, filters):
+        with self._lock:
+            self.requests += 1
+        if endpoint == "sessions":
+            return [self.shifted(entry) for entry in self.archive.sessions if self.matches(entry, filters)]
+        if endpoint not in self.archive.endpoints:
+            return None
+        times, entries, untimed = self.archive.endpoints[endpoint]
+
+        lo, hi = 0, bisect.bisect_right(times, self.clock.now())
+        # a lower bound on `date` narrows the scan when rows are ordered by it
+        if endpoint != "laps":
+            for field, op, value in filters:
+                if field == "date" and op in (">", ">=") and value is not None:
+                    bound = self.clock.unshift(value)
+                    lo = max(lo, (bisect.bisect_right if op == ">" else bisect.bisect_left)(times, bound))
+
+        result = [self.shifted(entry) for entry in untimed if self.matches(entry, filters)]
+        result.extend(self.shifted(entry) for entry in entries[lo:hi] if self.matches(entry, filters))
+        return result
+
+    def matches(self, entry, filters):
+        row, dates = entry
+        for field, op, value in filters:
+            if field in DATE_FIELDS:
+                actual = self.clock.shift(dates[field]) if field in dates else None
+            elif field == "year" and "date_start" in dates:
+                actual = datetime.fromtimestamp(self.clock.shift(dates["date_start"]), timezone.utc).year
+            else:
+                actual = row.get(field)
+            if actual is None or value is None:
+                return False
+            try:
+                if not OPERATORS[op](actual, value):
+                    return False
+            except TypeError:
+                if not OPERATORS[op](str(actual), str(value)):
+                    return False
+        return True
+
+
+def create_app(replay):
+    app = Flask(__name__)
+
+    @app.route("/v1/<endpoint>")
+    def openf1_endpoint(endpoint):
+        rows = replay.query(endpoint, parse_filters(request.query_string.decode("latin-1")))
+        if rows is None:
+            return Response(json.dumps({"detail": "Not Found"}), status=404, mimetype="application/json")
+        return Response(json.dumps(rows), mimetype="application/json")
+
+    @app.route("/replay/status")
+    def replay_status():
+        now = replay.clock.now()
+        return {
+            "archive_time": iso(now),
+            "elapsed": str(timedelta(seconds=int(now - replay.archive.origin))),
+            "speed": replay.clock.speed,
+            "requests": replay.requests,
+        }
+
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve a recorded OpenF1 session as a local stand-in API.")
+    parser.add_argument("archive", nargs="?", help="recorder archive (.jsonl.gz)")
+    parser.add_argument("--sample", help="replay a generated sample session instead (see replay_samples.py)")
+    parser.add_argument("--speed", type=float, default=1.0, help="replay speed, e.g. 1, 10 or 100")
+    parser.add_argument("--start-offset", type=float, default=0.0, help="seconds into the session to start at")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=int(os.environ.get("PORT", 8765)))
+    args = parser.parse_args()
+
+    if args.sample:
+        from replay_samples import generate_session
+
+        archive = ReplayArchive(generate_session(args.sample))
+    elif args.archive:
+        archive = ReplayArchive.from_file(args.archive)
+    else:
+        parser.error("give an archive path or --sample")
+
+    replay = ReplayServer(archive, args.speed, args.start_offset)
+    print(f"Replaying from {iso(archive.origin)} at {args.speed}x; "
+          f"set OPENF1_BASE=http://{args.host}:{args.port}/v1")
+    create_app(replay).run(host=args.host, port=args.port, threaded=True)
+
+
+if __name__ == "__main__":
+    main()
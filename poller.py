@@ -0,0 +1,212 @@
+import os
+import socket
+import threading
+import time
+
+import metrics
+
+# Supervised background pollers and the systemd watchdog.
+#
+# A Poller runs `tick()` on its own thread, waiting `cadence()` seconds between
+# ticks, so each service can poll fast while a session is live and sleep when
+# nothing is on. A tick that raises is logged and retried with exponential
+# back-off; it never ends the loop. The supervisor thread restarts any poller
+# thread that died anyway, and pings the systemd watchdog (WATCHDOG=1) only
+# while every poller has completed a tick within the time it promised and every
+# other registered health check (a bus follower's link to its leader) passes. A
+# poller stuck inside a tick therefore stops the pings and systemd restarts the
+# whole service, instead of it serving frozen data forever.
+#
+# Optional pollers (critical=False: weather, history) are restarted like the
+# others but never hold back the pings, since restarting the service cannot fix
+# an upstream or data fault, and after an error they simply wait their normal
+# cadence instead of retrying sooner.
+#
+# READY=1 is sent separately, by notify_ready(), once the service is about to
+# accept connections: each entry point calls it after importing its apps and
+# starting their pollers, so systemd does not count the service as started
+# while its port is still closed.
+#
+# Outside systemd (no NOTIFY_SOCKET) the notifications are skipped and the
+# supervisor only restarts dead threads.
+
+# Retry waits for a failing tick of a critical poller double from
+# ERROR_RETRY_SECONDS up to MAX_ERROR_BACKOFF, but never exceed its cadence
+ERROR_RETRY_SECONDS = 5
+MAX_ERROR_BACKOFF = 60
+# How late a poller's next successful tick may be before it counts as stale
+DEFAULT_STALE_AFTER = 120
+# How often the supervisor checks its pollers when systemd sets no watchdog
+SUPERVISE_SECONDS = 5
+
+POLLER_RESTARTS = metrics.Counter("poller_restarts_total", "Poller threads restarted after dying.", ("poller",))
+POLLER_HEALTHY = metrics.Gauge("poller_healthy", "1 while the poller's data is fresh, else 0.", ("poller",))
+POLLER_DELAY_SECONDS = metrics.Gauge("poller_delay_seconds", "Wait chosen before the poller's next tick.", ("poller",))
+
+
+# Send a state string ("READY=1", "WATCHDOG=1", ...) to systemd; False when
+# not running under a notify-type unit
+def sd_notify(message):
+    address = os.environ.get("NOTIFY_SOCKET")
+    if not address:
+        return False
+    if address.startswith("@"):
+        address = "\0" + address[1:]
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM) as sock:
+            sock.connect(address)
+            sock.sendall(message.encode())
+        return True
+    except OSError:
+        return False
+
+
+# Tell systemd the service is up; called by the entry point once it is listening
+def notify_ready():
+    return sd_notify("READY=1")
+
+
+# systemd's watchdog timeout in seconds, or None if it is not watching this process
+def watchdog_seconds():
+    usec = os.environ.get("WATCHDOG_USEC")
+    pid = os.environ.get("WATCHDOG_PID")
+    if not usec or (pid and pid != str(os.getpid())):
+        return None
+    try:
+        return int(usec) / 1e6
+    except ValueError:
+        return None
+
+
+class Poller:
+    def __init__(self, name, tick, cadence, stale_after=DEFAULT_STALE_AFTER, critical=True):
+        self.name = name
+        self._tick = tick
+        self._cadence = cadence
+        self.stale_after = stale_after
+        # whether the watchdog waits on this poller's health
+        self.critical = critical
+        self.failures = 0
+        self.thread = None
+        # monotonic time by which the next successful tick is due; startup gets
+        # one stale_after to complete its first tick
+        self.fresh_until = time.monotonic() + stale_after
+        self._wake = threading.Event()
+        self.stopped = False
+        self._metrics = metrics.PollerMetrics(name)
+        self._delay = POLLER_DELAY_SECONDS.labels(name)
+        POLLER_HEALTHY.labels(name).set_function(lambda: int(self.healthy()))
+
+    def start(self):
+        self.stopped = False
+        self.thread = threading.Thread(target=self._run, name=f"{self.name}-poller", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.stopped = True
+        self._wake.set()
+
+    # Cut the current wait short, e.g. after the schedule changed
+    def wake(self):
+        self._wake.set()
+
+    def alive(self):
+        return self.thread is not None and self.thread.is_alive()
+
+    def healthy(self, now=None):
+        return self.alive() and (now or time.monotonic()) <= self.fresh_until
+
+    def _run(self):
+        while not self.stopped:
+            delay = self.tick_once()
+            self._delay.set(delay)
+            self._wake.wait(delay)
+            self._wake.clear()
+
+    # Run one tick and return the wait before the next
+    def tick_once(self):
+        started = time.perf_counter()
+        try:
+            self._tick()
+        except Exception as e:
+            self.failures += 1
+            self._metrics.errors.inc()
+            print(f"Error in {self.name} poller (failure {self.failures}):", e)
+        else:
+            self.failures = 0
+        finally:
+            self._metrics.tick_done(started)
+
+        try:
+            delay = float(self._cadence())
+        except Exception as e:
+            print(f"Error scheduling {self.name} poller:", e)
+            delay = MAX_ERROR_BACKOFF
+        if self.failures and self.critical:
+            return min(delay, ERROR_RETRY_SECONDS * 2 ** (self.failures - 1), MAX_ERROR_BACKOFF)
+        if self.failures:
+            return delay
+        self.fresh_until = time.monotonic() + delay + self.stale_after
+        return delay
+
+
+class Supervisor:
+    def __init__(self):
+        self.pollers = []
+        # name -> callable returning True while that part of the process is healthy
+        self.checks = {}
+        self.thread = None
+        self._lock = threading.Lock()
+
+    # Register and start a poller, starting the supervisor with it
+    def supervise(self, poller):
+        with self._lock:
+            self.pollers.append(poller)
+        poller.start()
+        self.start()
+        return poller
+
+    # Gate the watchdog on `check()` as well, e.g. a follower's bus connection
+    def watch(self, name, check):
+        with self._lock:
+            self.checks[name] = check
+
+    def start(self):
+        with self._lock:
+            if self.thread is not None:
+                return
+            self.thread = threading.Thread(target=self._run, name="poller-supervisor", daemon=True)
+            self.thread.start()
+
+    def healthy(self):
+        now = time.monotonic()
+        return (all(poller.healthy(now) for poller in list(self.pollers) if poller.critical)
+                and all(check() for check in list(self.checks.values())))
+
+    def check(self):
+        for poller in list(self.pollers):
+            if not poller.alive() and not poller.stopped:
+                print(f"Restarting {poller.name} poller")
+                POLLER_RESTARTS.labels(poller.name).inc()
+                poller.start()
+        if self.healthy():
+            sd_notify("WATCHDOG=1")
+
+    def _run(self):
+        watchdog = watchdog_seconds()
+        interval = min(SUPERVISE_SECONDS, watchdog / 2) if watchdog else SUPERVISE_SECONDS
+        while True:
+            try:
+                self.check()
+            except Exception as e:
+                print("Error supervising pollers:", e)
+            time.sleep(interval)
+
+
+# One supervisor per process, so the combined ASGI process reports the health
+# of every service's pollers to systemd together
+supervisor = Supervisor()
+
+
+def supervise(name, tick, cadence, stale_after=DEFAULT_STALE_AFTER, critical=True):
+    return supervisor.supervise(Poller(name, tick, cadence, stale_after, critical))
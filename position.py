@@ -1,36 +1,248 @@
-from flask import Flask, jsonify
-import os
-import requests
-from flask_cors import CORS
-
-# Create the Flask app FIRST
-app = Flask(__name__)
-CORS(app)
-
-# Replace with actual API URL for car positions
-OPENF1_POSITION_URL = "https://api.openf1.org/v1/position"
-
-@app.route('/position.json')
-def get_car_position():
-    try:
-        # Send GET request to fetch car positions
-        response = requests.get(OPENF1_POSITION_URL)
-
-        if response.status_code == 200:
-            # Parse response JSON
-            car_positions = response.json()
-            # Process car positions (adjust based on API structure)
-            positions = [
-                {"car_number": car["car_number"], "x": car["x"], "y": car["y"]}
-                for car in car_positions["cars"]
-            ]
-            return jsonify(positions)  # Return as JSON
-
-        else:
-            return jsonify({"error": "No session is live"}), 500
-
-    except Exception as e:
-        return jsonify({"error": str(e)}), 500
-
-if __name__ == '__main__':
-    app.run(host='0.0.0.0', port=int(os.environ.get("PORT", 5001)))
+from flask import Flask, jsonify, request
+from datetime import datetime, timezone
+import os
+import time
+import upstream
+from flask_cors import CORS
+from openf1 import fetch_sessions, openf1_url
+from session_index import SessionSchedule, parse_utc
+from position_buffer import PositionStore
+from position_frames import DEFAULT_RATE, MAX_RATE, encode_frames, frame_times, resample
+from response_cache import EncodedResponse, ResponseCache, request_format, serve, serve_payload
+import metrics
+import poller
+from state_bus import StateBus
+
+# Create the Flask app FIRST
+app = Flask(__name__)
+CORS(app)
+metrics.install(app)
+
+# Seconds between /location polls while a session is current, and around
+# sessions; with nothing on the poller sleeps until the next session
+POSITION_POLL_INTERVAL = 1
+POSITION_IDLE_INTERVAL = float(os.environ.get("POSITION_IDLE_INTERVAL", 120))
+# Samples kept per car; OpenF1 sends ~4 per second, so the default holds
+# a little over an hour and memory stays fixed however long the session runs
+POSITION_BUFFER_SAMPLES = int(os.environ.get("POSITION_BUFFER_SAMPLES", 16384))
+# How far back to start when joining a session already under way; fetching
+# from the first sample of a long session would pull hundreds of thousands of rows
+POSITION_BACKFILL_SECONDS = 60
+# Largest number of points a window query may ask for per car
+MAX_WINDOW_POINTS = 2000
+# Default span of /position/frames, ending at the newest time all cars cover
+FRAME_WINDOW_SECONDS = 1
+# Cars with no sample this close to the newest one (retired, in the garage)
+# no longer hold back the frame clock
+ACTIVE_CAR_SECONDS = 5
+
+# Car samples for the current session, filled by the ingester thread below.
+# Requests are answered from here and never reach OpenF1.
+position_store = PositionStore(POSITION_BUFFER_SAMPLES)
+# newest sample `date` seen, so each poll only asks for rows after it
+location_cursor = {"date": None}
+
+session_schedule = SessionSchedule(fetch_sessions)
+
+# Fetch /location rows for a session, newer than `since` if given
+def fetch_locations(session_key, since=None):
+    try:
+        response = upstream.get(openf1_url("location", session_key, since), timeout=10)
+        response.raise_for_status()
+        return response.json()
+    except Exception as e:
+        print("Error fetching car locations:", e)
+        return []
+
+# (car_number, epoch seconds, x, y, z) for every usable /location row
+def location_samples(rows):
+    samples = []
+    for row in rows:
+        when = parse_utc(row.get("date"))
+        car = row.get("driver_number")
+        if when is None or car is None:
+            continue
+        samples.append((car, when.timestamp(), row.get("x") or 0.0, row.get("y") or 0.0, row.get("z") or 0.0))
+    samples.sort(key=lambda sample: sample[1])
+    return samples
+
+def ingest_locations(session_key):
+    if session_key != position_store.session_key:
+        position_store.reset(session_key)
+        bus.publish("reset", session_key)
+        backfill_from = datetime.now(timezone.utc).timestamp() - POSITION_BACKFILL_SECONDS
+        location_cursor["date"] = iso_time(backfill_from)
+    rows = fetch_locations(session_key, location_cursor["date"])
+    if not rows:
+        return
+    samples = location_samples(rows)
+    position_store.extend(samples)
+    bus.publish("samples", samples)
+    newest = max((row.get("date") or "" for row in rows), default="")
+    if newest > (location_cursor["date"] or ""):
+        location_cursor["date"] = newest
+
+def newest_sample_age():
+    latest = position_store.latest_times()
+    return time.time() - max(latest.values()) if latest else None
+
+metrics.Gauge("position_sample_age_seconds", "Age of the newest car location sample held.").set_function(newest_sample_age)
+
+# One tick of the supervised poller keeping the position buffer up to date
+def ingest_locations_tick():
+    session_schedule.maybe_refresh()
+    session_key = session_schedule.session_key_for(None)
+    if session_key:
+        ingest_locations(session_key)
+
+def ingest_delay():
+    return session_schedule.poll_delay(POSITION_POLL_INTERVAL, POSITION_IDLE_INTERVAL)
+
+def start_background_task():
+    global position_poller
+    # taking over from a leader that died: carry on from the samples it relayed
+    latest = position_store.latest_times()
+    if latest:
+        location_cursor["date"] = iso_time(max(latest.values()))
+    position_poller = poller.supervise("position", ingest_locations_tick, ingest_delay)
+    return position_poller
+
+# Followers mirror the leader's buffer: a reset per new session, then every batch
+def apply_bus_message(kind, payload):
+    if kind == "reset":
+        position_store.reset(payload)
+    elif kind == "samples":
+        position_store.extend(payload)
+
+# The session and its last POSITION_BACKFILL_SECONDS of samples, for a new follower
+def bus_state():
+    latest = position_store.latest_times()
+    if not latest:
+        return [("reset", position_store.session_key)]
+    t0 = max(latest.values()) - POSITION_BACKFILL_SECONDS
+    tracks = position_store.window(t0, float("inf"))
+    samples = sorted(((car, t, x, y, z) for car, track in tracks.items() for t, x, y, z in track), key=lambda s: s[1])
+    return [("reset", position_store.session_key), ("samples", samples)]
+
+# Only one process per host polls OpenF1; the others follow it (see state_bus.py)
+position_poller = None
+bus = StateBus("position", apply_bus_message, bus_state)
+bus.start(on_leader=start_background_task)
+# Keep the systemd watchdog fed whether it leads or follows (see poller.py)
+poller.supervisor.watch("position bus", bus.healthy)
+poller.supervisor.start()
+
+# Query timestamps may be ISO 8601 or epoch seconds
+def parse_time_arg(value):
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    when = parse_utc(value)
+    if when is None:
+        raise ValueError(f"Invalid timestamp: {value}")
+    return when.timestamp()
+
+def iso_time(t):
+    return datetime.fromtimestamp(t, timezone.utc).isoformat()
+
+def car_position(car, sample):
+    t, x, y, z = sample
+    return {"car_number": car, "x": x, "y": y, "z": z, "date": iso_time(t)}
+
+# Encoded latest positions, rebuilt once per ingest batch rather than per request
+latest_responses = ResponseCache(lambda payload: app.json.dumps(payload))
+
+def latest_positions_payload():
+    samples = position_store.latest()
+    return [car_position(car, samples[car]) for car in sorted(samples)]
+
+def latest_positions_response(fmt):
+    return latest_responses.get("latest", position_store.version, latest_positions_payload, fmt)
+
+@app.route('/position.json')
+def get_car_position():
+    # ?at=T             -> each car's position at T
+    # ?from=T0&to=T1    -> each car's track over [T0, T1], thinned to ?points=N
+    # (no arguments)    -> each car's latest position
+    try:
+        args = request.args
+        if "from" in args or "to" in args:
+            t0 = parse_time_arg(args["from"]) if "from" in args else 0.0
+            t1 = parse_time_arg(args["to"]) if "to" in args else time.time()
+            points = min(int(args.get("points", MAX_WINDOW_POINTS)), MAX_WINDOW_POINTS)
+            cars = {int(car) for car in args.getlist("car")} or None
+            tracks = position_store.window(t0, t1, max(points, 1), cars)
+            return serve_payload([
+                {"car_number": car, "samples": [[iso_time(t), x, y, z] for t, x, y, z in tracks[car]]}
+                for car in sorted(tracks)
+            ])
+
+        if "at" not in args:
+            if not position_store.has_samples():
+                return jsonify({"error": "No session is live"}), 404
+            return serve(latest_positions_response(request_format()))
+
+        samples = position_store.at(parse_time_arg(args["at"]))
+        if not samples:
+            return jsonify({"error": f"No positions at or before {args['at']}"}), 404
+        return serve_payload([car_position(car, samples[car]) for car in sorted(samples)])
+
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+# Newest time every active car has a sample for, so default frames are
+# interpolated rather than held at the last sample
+def frames_end():
+    latest = position_store.latest_times()
+    if not latest:
+        return None
+    newest = max(latest.values())
+    return min(t for t in latest.values() if t >= newest - ACTIVE_CAR_SECONDS)
+
+@app.route('/position/frames')
+def get_position_frames():
+    # All cars' x/y resampled to a fixed clock (?rate=, default 10Hz) over
+    # ?from=T0&to=T1, or the most recent second by default. JSON by default;
+    # ?format=bin or Accept: application/octet-stream returns packed float32
+    # frames (layout in position_frames.py).
+    try:
+        args = request.args
+        rate = min(float(args.get("rate", DEFAULT_RATE)), MAX_RATE)
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        end = frames_end()
+        if end is None:
+            return jsonify({"error": "No session is live"}), 404
+        t1 = parse_time_arg(args["to"]) if "to" in args else end
+        t0 = parse_time_arg(args["from"]) if "from" in args else t1 - FRAME_WINDOW_SECONDS
+        cars = {int(car) for car in args.getlist("car")} or None
+
+        times = frame_times(t0, t1, rate)
+        cars, xy = resample(position_store.columns(t0, t1, cars), times)
+
+        binary = args.get("format") == "bin" or request.accept_mimetypes.best_match(
+            ["application/json", "application/octet-stream"]) == "application/octet-stream"
+        if binary:
+            return serve(EncodedResponse(encode_frames(times, cars, xy, rate), "application/octet-stream"))
+        return jsonify({
+            "rate": rate,
+            "start": iso_time(times[0]) if len(times) else None,
+            "frames": len(times),
+            "cars": [
+                {"car_number": car, "x": xy[i, :, 0].round(1).tolist(), "y": xy[i, :, 1].round(1).tolist()}
+                for i, car in enumerate(cars)
+            ],
+        })
+
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+if __name__ == '__main__':
+    # the development server binds its port as soon as run() starts
+    poller.notify_ready()
+    app.run(host='0.0.0.0', port=int(os.environ.get("PORT", 5001)))
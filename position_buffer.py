@@ -0,0 +1,173 @@
+from array import array
+import threading
+
+# Bounded, array-backed history of car positions for the current session.
+#
+# Each car gets a fixed-capacity ring of parallel `array('d')` columns
+# (t, x, y, z), allocated once, so memory stays flat however long the session
+# runs: once full, the oldest sample is overwritten. Samples are appended in
+# time order, which keeps every column sorted and lets lookups by time binary
+# search the ring.
+
+DEFAULT_CAPACITY = 16384
+
+
+class TrackRing:
+    __slots__ = ("capacity", "t", "x", "y", "z", "start", "size")
+
+    def __init__(self, capacity=DEFAULT_CAPACITY):
+        self.capacity = capacity
+        zeros = [0.0] * capacity
+        self.t = array("d", zeros)
+        self.x = array("d", zeros)
+        self.y = array("d", zeros)
+        self.z = array("d", zeros)
+        self.start = 0
+        self.size = 0
+
+    def __len__(self):
+        return self.size
+
+    def _slot(self, i):
+        return (self.start + i) % self.capacity
+
+    def time_at(self, i):
+        return self.t[self._slot(i)]
+
+    def sample(self, i):
+        slot = self._slot(i)
+        return self.t[slot], self.x[slot], self.y[slot], self.z[slot]
+
+    # Append a sample; anything not newer than the latest one is ignored
+    def append(self, t, x, y, z):
+        if self.size and t <= self.t[self._slot(self.size - 1)]:
+            return False
+        if self.size < self.capacity:
+            slot = self._slot(self.size)
+            self.size += 1
+        else:
+            slot = self.start
+            self.start = (self.start + 1) % self.capacity
+        self.t[slot] = t
+        self.x[slot] = x
+        self.y[slot] = y
+        self.z[slot] = z
+        return True
+
+    # Number of samples with time <= t (bisect_right over the ring)
+    def count_until(self, t):
+        lo, hi = 0, self.size
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self.time_at(mid) <= t:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def latest(self):
+        return self.sample(self.size - 1) if self.size else None
+
+    # Latest sample at or before `t`
+    def at(self, t):
+        i = self.count_until(t)
+        return self.sample(i - 1) if i else None
+
+    # Logical index range [lo, hi) of the samples with t0 <= t <= t1
+    def _bounds(self, t0, t1):
+        lo = self.count_until(t0)
+        if lo and self.time_at(lo - 1) == t0:
+            lo -= 1
+        return lo, self.count_until(t1)
+
+    # Contiguous copy of logical samples [lo, hi) of one column
+    def _span(self, column, lo, hi):
+        first, last = self.start + lo, self.start + hi
+        if last <= self.capacity:
+            return column[first:last]
+        if first >= self.capacity:
+            return column[first - self.capacity:last - self.capacity]
+        return column[first:] + column[:last - self.capacity]
+
+    # (t, x, y, z) column arrays covering [t0, t1], oldest first, plus up to
+    # `pad` samples either side so callers can interpolate up to the edges
+    def columns(self, t0, t1, pad=1):
+        lo, hi = self._bounds(t0, t1)
+        lo, hi = max(lo - pad, 0), min(hi + pad, self.size)
+        return tuple(self._span(column, lo, hi) for column in (self.t, self.x, self.y, self.z))
+
+    # Samples with t0 <= t <= t1, evenly thinned to at most `points`
+    def window(self, t0, t1, points=None):
+        lo, hi = self._bounds(t0, t1)
+        count = hi - lo
+        if count <= 0:
+            return []
+        if not points or count <= points:
+            return [self.sample(i) for i in range(lo, hi)]
+        if points == 1:
+            return [self.sample(hi - 1)]
+        step = (count - 1) / (points - 1)
+        return [self.sample(lo + round(k * step)) for k in range(points)]
+
+
+class PositionStore:
+    def __init__(self, capacity=DEFAULT_CAPACITY):
+        self.capacity = capacity
+        self.session_key = None
+        self.rings = {}
+        # bumped on every ingest batch; position.py keys its cached
+        # latest-positions response on it
+        self.version = 0
+        self._lock = threading.Lock()
+
+    def reset(self, session_key):
+        with self._lock:
+            self.session_key = session_key
+            self.rings = {}
+            self.version += 1
+
+    # Append a batch of (car_number, t, x, y, z) rows
+    def extend(self, rows):
+        added = 0
+        with self._lock:
+            for car, t, x, y, z in rows:
+                ring = self.rings.get(car)
+                if ring is None:
+                    ring = self.rings[car] = TrackRing(self.capacity)
+                added += ring.append(t, x, y, z)
+            if added:
+                self.version += 1
+        return added
+
+    def has_samples(self):
+        return any(ring.size for ring in list(self.rings.values()))
+
+    def latest(self):
+        with self._lock:
+            return {car: ring.latest() for car, ring in self.rings.items() if ring.size}
+
+    def at(self, t):
+        with self._lock:
+            samples = {car: ring.at(t) for car, ring in self.rings.items()}
+        return {car: sample for car, sample in samples.items() if sample}
+
+    # car -> time of its newest sample
+    def latest_times(self):
+        with self._lock:
+            return {car: ring.latest()[0] for car, ring in self.rings.items() if ring.size}
+
+    def columns(self, t0, t1, cars=None):
+        with self._lock:
+            return {
+                car: ring.columns(t0, t1)
+                for car, ring in self.rings.items()
+                if cars is None or car in cars
+            }
+
+    def window(self, t0, t1, points=None, cars=None):
+        with self._lock:
+            return {
+                car: ring.window(t0, t1, points)
+                for car, ring in self.rings.items()
+                if cars is None or car in cars
+            }
@@ -0,0 +1,86 @@
+import math
+import struct
+
+import numpy as np
+
+# Fixed-rate resampling of car positions for track maps.
+#
+# OpenF1 location samples arrive at an uneven ~3-4Hz per car. Here every car's
+# x/y is interpolated onto one common clock (10Hz by default) in a single
+# np.interp call: each car's samples are shifted onto their own stretch of the
+# time axis (car k starts at k * stride) and concatenated, so one sorted array
+# covers all cars and no interpolation ever reaches across two cars. Query
+# times are clamped to each car's own first/last sample, so a car without
+# fresh data holds its last position instead of being extrapolated.
+#
+# Binary frame layout (all little-endian):
+#
+#   header   magic "F1PF" | version u8 | pad u8 | cars u16 | frames u16 | pad u16
+#            | start f64 (epoch seconds of frame 0) | rate f32 (frames per second)
+#   cars     car number u16 * cars
+#   frames   for each frame, for each car: x f32, y f32
+#
+# Frame i is at start + i / rate; cars appear in the order of the car table.
+
+DEFAULT_RATE = 10
+MAX_RATE = 50
+MAX_FRAMES = 1200
+
+FRAME_MAGIC = b"F1PF"
+FRAME_VERSION = 1
+FRAME_HEADER = struct.Struct("<4sBxHHxxdf")
+
+
+# Clock ticks at `rate` Hz falling inside [t0, t1]
+def frame_times(t0, t1, rate):
+    first, last = math.ceil(t0 * rate), math.floor(t1 * rate)
+    if last - first + 1 > MAX_FRAMES:
+        raise ValueError(f"Too many frames requested (max {MAX_FRAMES})")
+    return np.arange(first, last + 1, dtype=float) / rate
+
+
+# Interpolate {car: (t, x, y, z) columns} at `times`.
+# Returns (cars, xy) with xy shaped (cars, frames, 2).
+def resample(columns, times):
+    cars = sorted(car for car, cols in columns.items() if len(cols[0]))
+    if not cars or not len(times):
+        return cars, np.empty((len(cars), len(times), 2))
+
+    t = [np.asarray(columns[car][0]) for car in cars]
+    base = min(times[0], min(ts[0] for ts in t))
+    stride = max(times[-1], max(ts[-1] for ts in t)) - base + 1.0
+    offsets = np.arange(len(cars)) * stride
+
+    t_all = np.concatenate([ts - base + offset for ts, offset in zip(t, offsets)])
+    x_all = np.concatenate([np.asarray(columns[car][1]) for car in cars])
+    y_all = np.concatenate([np.asarray(columns[car][2]) for car in cars])
+
+    firsts = np.array([ts[0] for ts in t]) - base
+    lasts = np.array([ts[-1] for ts in t]) - base
+    query = np.clip(times[None, :] - base, firsts[:, None], lasts[:, None]) + offsets[:, None]
+
+    xy = np.empty((len(cars), len(times), 2))
+    xy[:, :, 0] = np.interp(query.ravel(), t_all, x_all).reshape(query.shape)
+    xy[:, :, 1] = np.interp(query.ravel(), t_all, y_all).reshape(query.shape)
+    return cars, xy
+
+
+def encode_frames(times, cars, xy, rate):
+    start = float(times[0]) if len(times) else 0.0
+    header = FRAME_HEADER.pack(FRAME_MAGIC, FRAME_VERSION, len(cars), len(times), start, rate)
+    car_table = np.asarray(cars, dtype="<u2").tobytes()
+    # (frames, cars, 2) so each frame is contiguous
+    frames = np.ascontiguousarray(xy.transpose(1, 0, 2), dtype="<f4").tobytes()
+    return header + car_table + frames
+
+
+def decode_frames(data):
+    magic, version, n_cars, n_frames, start, rate = FRAME_HEADER.unpack_from(data)
+    if magic != FRAME_MAGIC or version != FRAME_VERSION:
+        raise ValueError("Not a position frame")
+    offset = FRAME_HEADER.size
+    cars = np.frombuffer(data, dtype="<u2", count=n_cars, offset=offset).tolist()
+    offset += 2 * n_cars
+    xy = np.frombuffer(data, dtype="<f4", count=n_frames * n_cars * 2, offset=offset)
+    times = start + np.arange(n_frames) / rate
+    return times, cars, xy.reshape(n_frames, n_cars, 2).transpose(1, 0, 2)
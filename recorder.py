@@ -0,0 +1,72 @@
+import atexit
+import gzip
+import json
+import threading
+import time
+from urllib.parse import urlsplit
+
+# Capture of upstream responses for offline replay (see openf1_replay.py).
+#
+# Every JSON response that goes through upstream.get is appended as one line of
+# a gzip-compressed JSONL archive:
+#
+#   {"t": <unix time received>, "url": <full request URL>, "status": 200, "body": <parsed JSON>}
+#
+# Enable it for any service with UPSTREAM_RECORD=/path/to/session.jsonl.gz;
+# UPSTREAM_RECORD_HOSTS (comma-separated) limits it to some hosts, e.g.
+# api.openf1.org. Appending to an existing archive adds a new gzip member,
+# which readers handle transparently.
+
+FLUSH_SECONDS = 5
+
+
+class Recorder:
+    def __init__(self, path, hosts=None):
+        self.path = path
+        self.hosts = set(hosts) if hosts else None
+        self.records = 0
+        self._file = gzip.open(path, "at", encoding="utf-8")
+        self._flushed_at = time.monotonic()
+        self._lock = threading.Lock()
+        atexit.register(self.close)
+
+    def record(self, response):
+        if self.hosts is not None and urlsplit(response.url).netloc not in self.hosts:
+            return
+        try:
+            body = response.json()
+        except ValueError:
+            return
+        line = json.dumps(
+            {"t": time.time(), "url": response.url, "status": response.status_code, "body": body},
+            ensure_ascii=False,
+        )
+        with self._lock:
+            if self._file is None:
+                return
+            self._file.write(line + "\n")
+            self.records += 1
+            # flushing every line would defeat compression; a crash loses at
+            # most the last few seconds
+            if time.monotonic() - self._flushed_at >= FLUSH_SECONDS:
+                self._file.flush()
+                self._flushed_at = time.monotonic()
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+# Records from an archive, oldest first; a truncated tail (e.g. after a crash) is skipped
+def read_archive(path):
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        try:
+            for line in f:
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    continue
+        except (EOFError, OSError):
+            return
@@ -0,0 +1,190 @@
+import argparse
+import gzip
+import json
+import math
+import random
+import sys
+from datetime import datetime, timedelta, timezone
+
+# Deterministic synthetic OpenF1 sessions for offline replay and benchmarks.
+#
+# Each sample is a complete session in OpenF1's row format: sessions, drivers,
+# position, location (~3.7Hz per car), laps with sector times, intervals (race
+# only), race_control and team_radio. The same name and seed always produce
+# the same rows, so replays and benchmark runs are comparable.
+#
+#   python openf1_replay.py --sample race --speed 10
+#   python replay_samples.py qualifying qualifying.jsonl.gz   # write as a recorder archive
+
+SAMPLE_START = datetime(2025, 7, 6, 14, 0, tzinfo=timezone.utc)
+LOCATION_HZ = 3.7
+DRIVERS = [
+    (1, "VER", "Red Bull Racing"), (22, "TSU", "Red Bull Racing"), (4, "NOR", "McLaren"),
+    (81, "PIA", "McLaren"), (16, "LEC", "Ferrari"), (44, "HAM", "Ferrari"),
+    (63, "RUS", "Mercedes"), (12, "ANT", "Mercedes"), (14, "ALO", "Aston Martin"),
+    (18, "STR", "Aston Martin"), (10, "GAS", "Alpine"), (43, "COL", "Alpine"),
+    (23, "ALB", "Williams"), (55, "SAI", "Williams"), (30, "LAW", "Racing Bulls"),
+    (6, "HAD", "Racing Bulls"), (27, "HUL", "Kick Sauber"), (5, "BOR", "Kick Sauber"),
+    (31, "OCO", "Haas F1 Team"), (87, "BEA", "Haas F1 Team"),
+]
+SECTOR_SHARES = (0.32, 0.38, 0.30)
+
+SAMPLES = {
+    # name: (session_key, session_name, session_type, laps, base lap time)
+    "race": (9999, "Race", "Race", 12, 90.0),
+    "qualifying": (9998, "Qualifying", "Qualifying", 8, 88.0),
+}
+
+
+def iso(t):
+    return (SAMPLE_START + timedelta(seconds=t)).isoformat()
+
+
+# Point on a closed synthetic circuit for lap fraction `f`
+def track_point(f):
+    theta = 2 * math.pi * f
+    return (
+        round(4000 * math.cos(theta) + 500 * math.cos(2 * theta)),
+        round(2200 * math.sin(theta) + 600 * math.sin(3 * theta)),
+        round(100 + 20 * math.sin(theta)),
+    )
+
+
+def lap_plan(rng, kind, laps, base):
+    # per driver: list of (lap start, lap duration, sector times)
+    plans = []
+    for grid, _ in enumerate(DRIVERS):
+        pace = base + grid * 0.08 + rng.uniform(0, 0.3)
+        t = grid * 0.25 if kind == "race" else grid * 20.0
+        plan = []
+        for lap in range(laps):
+            if kind == "race":
+                duration = pace + rng.gauss(0, 0.25) + (8.0 if lap == 0 else 0.0)
+            else:
+                # alternating push and cool-down laps
+                duration = pace + rng.gauss(0, 0.2) - 0.02 * lap if lap % 2 == 0 else pace + 18.0
+            shares = [share + rng.uniform(-0.01, 0.01) for share in SECTOR_SHARES]
+            scale = duration / sum(shares)
+            plan.append((t, duration, [round(share * scale, 3) for share in shares]))
+            t += duration
+        plans.append(plan)
+    return plans
+
+
+# Laps completed (fractional) by a driver at time `t`
+def progress(plan, t):
+    for lap, (start, duration, _) in enumerate(plan):
+        if t < start + duration:
+            return lap + max(0.0, t - start) / duration
+    return float(len(plan))
+
+
+def generate_session(name="race", seed=2025):
+    if name not in SAMPLES:
+        raise ValueError(f"Unknown sample {name!r}; choose from {', '.join(SAMPLES)}")
+    session_key, session_name, session_type, laps, base = SAMPLES[name]
+    rng = random.Random(f"{name}-{seed}")
+    plans = lap_plan(rng, name, laps, base)
+    end = max(plan[-1][0] + plan[-1][1] for plan in plans) + 30
+    common = {"session_key": session_key, "meeting_key": 9000}
+
+    rows = {endpoint: [] for endpoint in ("drivers", "position", "location", "laps", "intervals", "race_control", "team_radio")}
+    rows["sessions"] = [dict(
+        common, session_name=session_name, session_type=session_type, date_start=iso(0), date_end=iso(end),
+        location="Silverstone", country_name="United Kingdom", circuit_short_name="Silverstone", year=2025,
+    )]
+    for number, code, team in DRIVERS:
+        rows["drivers"].append(dict(common, driver_number=number, name_acronym=code, team_name=team, broadcast_name=code))
+
+    for (number, _, _), plan in zip(DRIVERS, plans):
+        for lap, (start, duration, sectors) in enumerate(plan, start=1):
+            rows["laps"].append(dict(
+                common, driver_number=number, lap_number=lap, date_start=iso(start), lap_duration=round(duration, 3),
+                duration_sector_1=sectors[0], duration_sector_2=sectors[1], duration_sector_3=sectors[2],
+                is_pit_out_lap=False,
+            ))
+        t = rng.uniform(0, 1 / LOCATION_HZ)
+        while t < end:
+            x, y, z = track_point(progress(plan, t) % 1.0)
+            rows["location"].append(dict(common, driver_number=number, date=iso(t), x=x, y=y, z=z))
+            t += 1 / LOCATION_HZ * rng.uniform(0.8, 1.2)
+
+    # running order once a second; position rows only when a place changes
+    best = {}
+    last_order = {}
+    for second in range(int(end)):
+        if name == "race":
+            done = [(progress(plan, second), number) for (number, _, _), plan in zip(DRIVERS, plans)]
+            order = [number for _, number in sorted(done, reverse=True)]
+        else:
+            for (number, _, _), plan in zip(DRIVERS, plans):
+                for start, duration, _ in plan:
+                    if start + duration <= second:
+                        best[number] = min(best.get(number, math.inf), duration)
+            order = sorted((number for number, _, _ in DRIVERS), key=lambda n: best.get(n, math.inf))
+        for position, number in enumerate(order, start=1):
+            if last_order.get(number) != position:
+                rows["position"].append(dict(common, driver_number=number, position=position, date=iso(second)))
+                last_order[number] = position
+
+        if name == "race" and second % 4 == 0:
+            pace = {number: plan[-1][1] for (number, _, _), plan in zip(DRIVERS, plans)}
+            done = dict((number, value) for value, number in
+                        ((progress(plan, second), number) for (number, _, _), plan in zip(DRIVERS, plans)))
+            leader = done[order[0]]
+            for i, number in enumerate(order):
+                behind_leader = leader - done[number]
+                behind_ahead = done[order[i - 1]] - done[number] if i else 0.0
+                rows["intervals"].append(dict(
+                    common, driver_number=number, date=iso(second),
+                    gap_to_leader=f"+{int(behind_leader)} LAP" if behind_leader >= 1 else round(behind_leader * pace[number], 3),
+                    interval=None if not i else (
+                        f"+{int(behind_ahead)} LAP" if behind_ahead >= 1 else round(behind_ahead * pace[number], 3)),
+                ))
+
+    rc = [
+        (0, "Other", None, "GREEN LIGHT - PIT EXIT OPEN"),
+        (end * 0.3, "Flag", "YELLOW", "YELLOW IN TRACK SECTOR 2"),
+        (end * 0.3 + 25, "Flag", "CLEAR", "CLEAR IN TRACK SECTOR 2"),
+        (end * 0.5, "Other", None, "CAR 18 (STR) TIME 1:31.420 DELETED - TRACK LIMITS AT TURN 9"),
+        (end - 30, "Flag", "CHEQUERED", "CHEQUERED FLAG"),
+    ]
+    for t, category, flag, message in rc:
+        rows["race_control"].append(dict(
+            common, date=iso(t), category=category, flag=flag, message=message,
+            lap_number=max(1, int(progress(plans[0], t)) + 1), driver_number=None, scope="Track", sector=None,
+        ))
+    for i in range(6):
+        number, code, _ = DRIVERS[rng.randrange(len(DRIVERS))]
+        rows["team_radio"].append(dict(
+            common, driver_number=number, date=iso(end * (i + 1) / 7),
+            recording_url=f"https://livetiming.formula1.com/static/sample/TeamRadio/{code}_{i + 1:02d}.mp3",
+        ))
+
+    for endpoint_rows in rows.values():
+        endpoint_rows.sort(key=lambda row: row.get("date") or row.get("date_start") or "")
+    return rows
+
+
+# Write a sample in recorder archive format (one record per endpoint)
+def write_archive(rows, path, base="https://api.openf1.org/v1"):
+    with gzip.open(path, "wt", encoding="utf-8") as f:
+        for endpoint, endpoint_rows in rows.items():
+            record = {"t": SAMPLE_START.timestamp(), "url": f"{base}/{endpoint}", "status": 200, "body": endpoint_rows}
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic OpenF1 session archive.")
+    parser.add_argument("sample", choices=sorted(SAMPLES))
+    parser.add_argument("path", help="output .jsonl.gz")
+    parser.add_argument("--seed", type=int, default=2025)
+    args = parser.parse_args()
+    rows = generate_session(args.sample, args.seed)
+    write_archive(rows, args.path)
+    print(f"Wrote {sum(len(r) for r in rows.values())} rows to {args.path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,120 @@
+import gzip
+import hashlib
+import threading
+
+from flask import Response, current_app, request
+
+from wire_format import encode_msgpack, mimetype_for, preferred_format
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Pre-serialized JSON responses, rebuilt only when the underlying state changes.
+#
+# Each view is encoded once per state version: the JSON bytes, gzip (and brotli
+# when the `brotli` package is installed) variants, and a strong ETag derived
+# from the content. Requests then copy the stored bytes and get a 304 when
+# their If-None-Match still matches. Views are stored per wire format (JSON, or
+# MessagePack for clients that ask for it; see wire_format.py).
+
+MIN_COMPRESS_SIZE = 512
+# Cap on distinct views (e.g. driver filters) stored for one version
+MAX_VIEWS = 256
+
+
+class EncodedResponse:
+    __slots__ = ("body", "etag", "variants", "mimetype")
+
+    def __init__(self, body, mimetype="application/json"):
+        self.body = body
+        self.mimetype = mimetype
+        self.etag = hashlib.blake2b(body, digest_size=12).hexdigest()
+        # content-coding -> (etag, bytes); a strong ETag must differ per coding
+        self.variants = {}
+        if len(body) >= MIN_COMPRESS_SIZE:
+            if brotli is not None:
+                self.variants["br"] = (f"{self.etag}-br", brotli.compress(body, quality=5))
+            self.variants["gzip"] = (f"{self.etag}-gz", gzip.compress(body, compresslevel=6))
+
+    # True if any representation of this content is in the If-None-Match set
+    def matches(self, etags):
+        return etags.contains_weak(self.etag) or any(etags.contains_weak(tag) for tag, _ in self.variants.values())
+
+    # Pick (content-coding, etag, body) for the client's accepted codings
+    def negotiate(self, accepts):
+        for coding, (etag, body) in self.variants.items():
+            if accepts(coding):
+                return coding, etag, body
+        return None, self.etag, self.body
+
+    # (status, headers, body) for a request with the given parsed If-None-Match
+    # (werkzeug ETags) and Accept-Encoding (werkzeug Accept) headers
+    def respond(self, if_none_match, accept_encodings, status=200):
+        coding, etag, body = self.negotiate(lambda coding: coding in accept_encodings)
+        headers = [("ETag", f'"{etag}"'), ("Vary", "Accept, Accept-Encoding")]
+        if status == 200 and self.matches(if_none_match):
+            return 304, headers, b""
+        headers.append(("Content-Type", self.mimetype))
+        if coding:
+            headers.append(("Content-Encoding", coding))
+        return status, headers, body
+
+
+class ResponseCache:
+    def __init__(self, dumps, max_views=MAX_VIEWS):
+        self._dumps = dumps
+        self._max_views = max_views
+        self._version = None
+        self._views = {}
+        self._lock = threading.Lock()
+
+    @property
+    def version(self):
+        return self._version
+
+    # Encoded view `key` for state `version` if it is already built, else None
+    def cached(self, key, version, fmt="json"):
+        with self._lock:
+            views = self._views if version == self._version else None
+        return views.get((key, fmt)) if views is not None else None
+
+    # Encoded view `key` for state `version`, building it with `build()` on a miss.
+    # Versions only move forward; a reader racing an older version still gets a
+    # correct response but does not overwrite the newer views.
+    def get(self, key, version, build, fmt="json"):
+        with self._lock:
+            if self._version is None or version > self._version:
+                self._version = version
+                self._views = {}
+            views = self._views if version == self._version else None
+        encoded = views.get((key, fmt)) if views is not None else None
+        if encoded is None:
+            encoded = encode_payload(build(), fmt, self._dumps)
+            if views is not None and len(views) < self._max_views:
+                views[(key, fmt)] = encoded
+        return encoded
+
+
+# EncodedResponse for `payload` in wire format `fmt`; `dumps` encodes JSON
+def encode_payload(payload, fmt, dumps):
+    if fmt == "msgpack":
+        return EncodedResponse(encode_msgpack(payload), mimetype_for(fmt))
+    return EncodedResponse(dumps(payload).encode("utf-8"))
+
+
+# Wire format the current Flask request asked for
+def request_format():
+    return preferred_format(request.args.get("format"), request.accept_mimetypes)
+
+
+# Serve an EncodedResponse for the current Flask request
+def serve(encoded, status=200):
+    status, headers, body = encoded.respond(request.if_none_match, request.accept_encodings, status)
+    return Response(body, status=status, headers=headers)
+
+
+# Encode and serve a payload that is built per request, in the requested format
+def serve_payload(payload, status=200):
+    return serve(encode_payload(payload, request_format(), current_app.json.dumps), status)
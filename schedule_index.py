@@ -0,0 +1,171 @@
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+# Columnar index of one season's fastf1 event schedule.
+#
+# The schedule is converted once into (events x 5) arrays of session names and
+# UTC start/end seconds. Statuses, the next event and countdowns are then a few
+# array comparisons against "now" instead of an iterrows() walk per request.
+# Session names come from the schedule itself, so sprint weekends (Sprint
+# Qualifying / Sprint instead of FP2 / FP3) are labelled correctly.
+
+SESSION_SLOTS = 5
+
+SESSION_SHORT_NAMES = {
+    "Practice 1": "FP1",
+    "Practice 2": "FP2",
+    "Practice 3": "FP3",
+    "Qualifying": "Quali",
+    "Sprint Qualifying": "Sprint Quali",
+    "Sprint Shootout": "Sprint Shootout",
+    "Sprint": "Sprint",
+    "Race": "Race",
+}
+
+# Expected session length in minutes, used to decide when a session is over
+SESSION_MINUTES = {
+    "Race": 120,
+    "Qualifying": 60,
+    "Sprint": 60,
+    "Sprint Qualifying": 45,
+    "Sprint Shootout": 45,
+}
+DEFAULT_SESSION_MINUTES = 60
+
+STATUS_UPCOMING = "🕓 Upcoming"
+STATUS_LIVE = "🔴 LIVE"
+STATUS_COMPLETED = "✅ Completed"
+
+
+def session_minutes(name):
+    return SESSION_MINUTES.get(name, DEFAULT_SESSION_MINUTES)
+
+
+def format_countdown(seconds):
+    seconds = int(seconds)
+    days, rest = divmod(seconds, 86400)
+    return f"{days}d {rest // 3600}h {(rest // 60) % 60}m"
+
+
+# Start times of one session slot across all events as float UTC seconds (NaN if unset)
+def _slot_seconds(schedule, slot):
+    column = f"Session{slot}DateUtc"
+    if column in schedule:
+        values = pd.to_datetime(schedule[column], utc=True)
+    else:
+        values = pd.to_datetime(schedule[f"Session{slot}Date"], utc=True)
+    return (values - pd.Timestamp(0, tz="UTC")).dt.total_seconds().to_numpy(dtype=float)
+
+
+def _slot_names(schedule, slot):
+    column = f"Session{slot}"
+    if column not in schedule:
+        return np.full(len(schedule), "", dtype=object)
+    names = schedule[column].fillna("").astype(str).to_numpy(dtype=object)
+    names[names == "None"] = ""
+    return names
+
+
+class SeasonIndex:
+    def __init__(self, year, events, names, starts, ends):
+        self.year = year
+        # per-event static info (name, location, country, ...)
+        self.events = events
+        # (events x slots) arrays
+        self.names = names
+        self.starts = starts
+        self.ends = ends
+
+        race_mask = (names == "Race") & ~np.isnan(starts)
+        race_starts = np.where(race_mask, starts, -np.inf).max(axis=1)
+        # events without a session called "Race" fall back to the last slot
+        self.race_starts = np.where(race_mask.any(axis=1), race_starts, starts[:, -1])
+        # event indices ordered by race start, for searchsorted lookups
+        keyed = np.where(np.isnan(self.race_starts), np.inf, self.race_starts)
+        self._race_order = np.argsort(keyed, kind="stable")
+        self._race_sorted = keyed[self._race_order]
+
+        self.calendar = self._build_calendar()
+
+    def __len__(self):
+        return len(self.events)
+
+    # Status of every session of every event at `now_ts` in one pass
+    def statuses(self, now_ts):
+        status = np.full(self.starts.shape, STATUS_UPCOMING, dtype=object)
+        status[now_ts > self.ends] = STATUS_COMPLETED
+        status[(self.starts <= now_ts) & (now_ts <= self.ends)] = STATUS_LIVE
+        return status
+
+    # Index of the first event whose race has not started yet, or None
+    def next_event(self, now_ts):
+        i = int(np.searchsorted(self._race_sorted, now_ts, side="right"))
+        if i >= len(self._race_sorted) or not np.isfinite(self._race_sorted[i]):
+            return None
+        return int(self._race_order[i])
+
+    # Sessions, next-session and race countdowns for event `i` at `now_ts`
+    def event_view(self, i, now_ts):
+        names, starts = self.names[i], self.starts[i]
+        status = self.statuses(now_ts)[i]
+        valid = ~np.isnan(starts) & (names != "")
+
+        sessions = []
+        for slot in np.flatnonzero(valid):
+            start_utc = datetime.fromtimestamp(starts[slot], timezone.utc)
+            sessions.append({
+                "name": SESSION_SHORT_NAMES.get(names[slot], names[slot]),
+                "status": status[slot],
+                "datetime_utc": start_utc.isoformat(),
+                "datetime_local": start_utc.astimezone().strftime('%a %H:%M')
+            })
+
+        upcoming = np.flatnonzero(valid & (starts > now_ts))
+        if len(upcoming):
+            slot = upcoming[0]
+            next_name = SESSION_SHORT_NAMES.get(names[slot], names[slot])
+            countdown_next = f"⏱️ {next_name} in {format_countdown(starts[slot] - now_ts)}"
+        else:
+            next_name = None
+            countdown_next = "N/A"
+
+        race_start = self.race_starts[i]
+        if not np.isnan(race_start) and race_start > now_ts:
+            countdown_race = f"🟩 Race in {format_countdown(race_start - now_ts)}"
+        else:
+            countdown_race = "N/A"
+
+        return sessions, next_name, countdown_next, countdown_race
+
+    def _build_calendar(self):
+        missing = np.isnan(self.starts)
+        firsts = np.where(missing, np.inf, self.starts).min(axis=1)
+        lasts = np.where(missing, -np.inf, self.starts).max(axis=1)
+
+        calendar = []
+        for event, first, last in zip(self.events, firsts, lasts):
+            if not np.isfinite(first):
+                continue
+            start = datetime.fromtimestamp(first, timezone.utc).astimezone()
+            end = datetime.fromtimestamp(last, timezone.utc).astimezone()
+            # Format like "April 11–13"
+            if start.month == end.month:
+                date_range = f"{start.strftime('%B')} {start.day}–{end.day}"
+            else:
+                date_range = f"{start.strftime('%b')} {start.day} – {end.strftime('%b')} {end.day}"
+            calendar.append(dict(event["calendar"], DateRange=date_range))
+        return calendar
+
+
+# Build the index from a fastf1 EventSchedule. `describe_event(row)` returns the
+# per-event static info dict; it must include a "calendar" dict for that event.
+def build_season_index(year, schedule, describe_event):
+    schedule = schedule.reset_index(drop=True)
+    names = np.column_stack([_slot_names(schedule, slot) for slot in range(1, SESSION_SLOTS + 1)])
+    starts = np.column_stack([_slot_seconds(schedule, slot) for slot in range(1, SESSION_SLOTS + 1)])
+    durations = np.vectorize(session_minutes, otypes=[float])(names) * 60.0
+    ends = starts + durations
+    events = [describe_event(row) for row in schedule.to_dict("records")]
+    return SeasonIndex(year, events, names, starts, ends)
@@ -1,412 +1,583 @@
-from flask import Flask, Response, jsonify
-import fastf1
-from datetime import datetime, timezone, timedelta
-import os
-import requests
-from cachetools import cached, TTLCache
-from bs4 import BeautifulSoup
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options
-from datetime import datetime, timezone
-from babel.dates import format_date
-from flask_cors import CORS
-
-# Create the Flask app FIRST
-app = Flask(__name__)
-CORS(app)
-
-CACHE_DIR = 'f1_cache'
-os.makedirs(CACHE_DIR, exist_ok=True)
-try:
-    fastf1.Cache.enable_cache(CACHE_DIR)
-except Exception as e:
-    print(f"Warning: Could not enable FastF1 cache: {e}")
-
-api_cache = TTLCache(maxsize=5, ttl=3600)
-driver_cache = TTLCache(maxsize=5, ttl=3600)
-constructor_cache = TTLCache(maxsize=5, ttl=3600)
-winner_cache = TTLCache(maxsize=5, ttl=3600) 
-cal_cache = TTLCache(maxsize=10, ttl=86400)
-
-def nationality_to_flag(nationality):
-    flags = {
-        "British": "🇬🇧", "German": "🇩🇪", "Dutch": "🇳🇱", "Monegasque": "🇲🇨",
-        "Mexican": "🇲🇽", "Spanish": "🇪🇸", "French": "🇫🇷", "Finnish": "🇫🇮",
-        "Canadian": "🇨🇦", "Australian": "🇦🇺", "Japanese": "🇯🇵", "Chinese": "🇨🇳",
-        "Thai": "🇹🇭", "American": "🇺🇸", "Italian": "🇮🇹", "Austrian": "🇦🇹",
-        "Brazilian": "🇧🇷", "Swiss": "🇨🇭", "New Zealander": "🇳🇿"
-    }
-    if not nationality:
-        return "🏳️"
-    flag = flags.get(nationality)
-    if not flag:
-        print(f"⚠️ Unknown nationality: '{nationality}'")
-        return "🏳️"
-    return flag
-
-def location_to_flag(country):
-    flags = {
-        
-    "Bahrain": "🇧🇭", "Saudi Arabia": "🇸🇦","Australia": "🇦🇺",
-    "Japan": "🇯🇵", "China": "🇨🇳","United States": "🇺🇸",
-    "Italy": "🇮🇹","Monaco": "🇲🇨","Canada": "🇨🇦", 
-    "Spain": "🇪🇸","Austria": "🇦🇹","United Kingdom": "🇬🇧",
-    "Hungary": "🇭🇺","Belgium": "🇧🇪","Netherlands": "🇳🇱",
-    "Azerbaijan": "🇦🇿","Singapore": "🇸🇬","Mexico": "🇲🇽",
-    "Brazil": "🇧🇷","Qatar": "🇶🇦","United Arab Emirates": "🇦🇪",  
-    }
-    return flags.get(country, "🏁")
-
-
-TRACK_NAMES = {
-    "Bahrain GP": "Bahrain International Circuit",
-    "Saudi Arabian GP": "Jeddah Street Circuit",
-    "Australian GP": "Albert Park Circuit",
-    "Japanese GP": "Suzuka Circuit",
-    "Chinese GP": "Shanghai International Circuit",
-    "Miami GP": "Miami International Autodrome",
-    "Emilia Romagna GP": "Imola Circuit",
-    "Monaco GP": "Circuit de Monaco",
-    "Canadian GP": "Circuit Gilles Villeneuve",
-    "Spanish GP": "Circuit de Barcelona-Catalunya",
-    "Austrian GP": "Red Bull Ring",
-    "British GP": "Silverstone Circuit",
-    "Hungarian GP": "Hungaroring",
-    "Belgian GP": "Circuit de Spa-Francorchamps",
-    "Dutch GP": "Circuit Zandvoort",
-    "Italian GP": "Monza Circuit",
-    "Azerbaijan GP": "Baku City Circuit",
-    "Singapore GP": "Marina Bay Street Circuit",
-    "United States GP": "Circuit of the Americas",
-    "Mexico GP": "Autódromo Hermanos Rodríguez",
-    "Brazilian GP": "Interlagos Circuit",
-    "Las Vegas GP": "Las Vegas Street Circuit",
-    "Qatar GP": "Lusail International Circuit",
-    "Abu Dhabi GP": "Yas Marina Circuit"
-}
-
-
-CIRCUIT_COORDINATES = {
-    "Bahrain": (26.0325, 50.5106),
-    "Saudi Arabia": (21.6319, 39.1044),
-    "Australia": (-37.8497, 144.968),
-    "Japan": (34.8431, 136.5419),
-    "China": (31.3389, 121.2197),
-    "Miami": (25.9580, -80.2389),
-    "Emilia Romagna": (44.3442, 11.7166),
-    "Monaco": (43.7347, 7.4206),
-    "Canada": (45.5000, -73.5228),
-    "Spain": (41.5700, 2.2611),
-    "Austria": (47.2197, 14.7647),
-    "UK": (52.0786, -1.0169),
-    "Hungary": (47.5789, 19.2486),
-    "Belgium": (50.4372, 5.9714),
-    "Netherlands": (52.3889, 4.5400),
-    "Italy": (45.6156, 9.2811),
-    "Azerbaijan": (40.3725, 49.8533),
-    "Singapore": (1.2914, 103.8644),
-    "USA": (30.1328, -97.6411),
-    "Mexico": (19.4042, -99.0907),
-    "Brazil": (-23.7036, -46.6997),
-    "Las Vegas": (36.1147, -115.1728),
-    "Qatar": (25.4865, 51.4536),
-    "Abu Dhabi": (24.4672, 54.6031),
-}
-
-DEFAULT_WEATHER = "🌤️ ?°C"
-ERGAST_TIMEOUT = 10
-
-
-@cached(cache=driver_cache)
-def fetch_top_driver_standings(limit=3):
-    url = 'https://api.jolpi.ca/ergast/f1/2025/driverstandings.json'
-    try:
-        response = requests.get(url, timeout=ERGAST_TIMEOUT)
-        response.raise_for_status()
-    except requests.exceptions.RequestException as e:
-        print(f"Driver standings fetch error: {e}")
-        return []
-
-    data = response.json()
-    standings_list = data.get('MRData', {}).get('StandingsTable', {}).get('StandingsLists', [])
-    if not standings_list or not standings_list[0].get('DriverStandings'):
-        return []
-
-    standings = []
-    drivers_data = standings_list[0]['DriverStandings']
-    for driver in drivers_data[:limit]:
-        driver_info = driver.get('Driver', {})
-        code = driver_info.get('code', driver_info.get('familyName', ''))
-        points = driver.get('points', '0')
-        nationality = driver_info.get('nationality', '')
-        flag = nationality_to_flag(nationality)
-        standings.append(f"{flag} {code} {points}pts")
-
-    return " • ".join([f"{i+1}.{d}" for i, d in enumerate(standings)])
-
-    
-@cached(cache=constructor_cache)
-def fetch_top_constructor_standings(limit=3):
-    url = 'https://api.jolpi.ca/ergast/f1/2025/constructorstandings.json'
-    try:
-        response = requests.get(url, timeout=ERGAST_TIMEOUT)
-        response.raise_for_status()
-    except requests.exceptions.RequestException as e:
-        print(f"Constructor standings fetch error: {e}")
-        return []
-
-    data = response.json()
-    constructors_list = data.get('MRData', {}).get('StandingsTable', {}).get('StandingsLists', [])
-    if not constructors_list:
-        return []
-
-    top_constructors = constructors_list[0].get('ConstructorStandings', [])
-    if not top_constructors:
-        return []
-
-    result = []
-    for constructor in top_constructors[:limit]:
-        constructor_info = constructor.get('Constructor', {})
-        name = constructor_info.get('name', 'Unknown')
-        nationality = constructor_info.get('nationality', '')
-        flag = nationality_to_flag(nationality)
-        points = constructor.get('points', '0')
-        result.append(f"{flag} {name} {points}pts")
-
-    return " • ".join([f"{i+1}.{c}" for i, c in enumerate(result)])
-
-
-@cached(cache=winner_cache)
-def fetch_last_race_winner():
-    url = 'https://api.jolpi.ca/ergast/f1/2025/last/results.json'
-    try:
-        response = requests.get(url, timeout=ERGAST_TIMEOUT)
-        response.raise_for_status()
-    except requests.exceptions.RequestException as e:
-        print(f"Error fetching last race winner: {e}")
-        return "N/A"
-
-    data = response.json()
-    races = data.get('MRData', {}).get('RaceTable', {}).get('Races', [])
-    if not races or not races[0].get('Results'):
-        return "N/A"
-
-    race_info = races[0]
-    results = race_info['Results']
-    if not results:
-        return "N/A"
-
-    race_name = race_info.get('raceName', '').replace('Grand Prix', 'GP')
-    winner_data = results[0].get('Driver', {})
-    driver_code = winner_data.get('code', '???')
-    nationality = winner_data.get('nationality', '')
-    flag = nationality_to_flag(nationality)
-
-    return f"{flag} {driver_code} ({race_name})"
-
-@cached(cache=api_cache)
-def fetch_weather(lat, lon):
-    try:
-        url = f"https://api.open-meteo.com/v1/forecast?latitude={lat}&longitude={lon}&current_weather=true"
-        response = requests.get(url, timeout=10)
-        response.raise_for_status()
-        data = response.json()
-        current = data.get("current_weather", {})
-        temp = current.get("temperature", "?")
-        icon_code = current.get("weathercode", 0)
-
-        weather_icons = {
-            0: "☀️", 1: "🌤️", 2: "⛅", 3: "☁️", 45: "🌫️", 48: "🌫️",
-            51: "🌦️", 53: "🌦️", 55: "🌧️", 61: "🌧️", 63: "🌧️", 65: "🌧️",
-            71: "🌨️", 73: "🌨️", 75: "❄️", 95: "⛈️", 96: "⛈️", 99: "⛈️"
-        }
-        icon = weather_icons.get(icon_code, "🌡️")
-        return f"{icon} {temp}°C"
-        
-    except Exception as e:
-        print(f"Weather fetch failed: {e}")
-        return DEFAULT_WEATHER
-        
-def get_track_name(gp_name):
-    return TRACK_NAMES.get(gp_name, "Unknown Circuit")
-
-@cached(cache=cal_cache)
-def get_season_calendar():
-    
-    now = datetime.now(timezone.utc)
-    schedule = fastf1.get_event_schedule(now.year, include_testing=False)
-    calendar = []
-
-    for _, event in schedule.iterrows():
-        gp_name = event['EventName'].replace("Grand Prix", "GP")
-        location = event.get("Location", "Unknown")
-        country = event.get("Country", "Unknown")
-        flag = location_to_flag(country)
-        circuit = get_track_name(gp_name)
-
-        # Get first and last session dates (non-null)
-        session_dates = []
-        for i in range(1, 6):
-            dt = event.get(f"Session{i}Date")
-            if dt and not pandas.isna(dt):
-                dt_local = dt.to_pydatetime().astimezone()
-                session_dates.append(dt_local)
-
-        if not session_dates:
-            continue
-
-        start = min(session_dates)
-        end = max(session_dates)
-
-        # Format like "April 11–13"
-        if start.month == end.month:
-            date_range = f"{start.strftime('%B')} {start.day}–{end.day}"
-        else:
-            date_range = f"{start.strftime('%b')} {start.day} – {end.strftime('%b')} {end.day}"
-
-        calendar.append({
-            "Name": gp_name,
-            "Location": location,
-            "Circuit": circuit,
-            "Country": flag,
-            "DateRange": date_range
-        })
-
-    return calendar
-
-
-@cached(cache=api_cache)
-def get_next_race_info():
-    import pandas
-    now = datetime.now(timezone.utc)
-    schedule = fastf1.get_event_schedule(now.year, include_testing=False)
-
-    next_event = schedule[schedule['Session5Date'] > now]
-    if next_event.empty:
-        return {
-            "Race": {"Name": "No upcoming race"},
-            "Sessions": [],
-            "Drivers": "N/A",
-            "Constructors": "N/A",
-            "Last Winner": "N/A"
-        }
-
-    event = next_event.iloc[0]
-    event_name_raw = event['EventName']
-    gp_name = event_name_raw.replace("Grand Prix", "GP")
-    circuit_name = TRACK_NAMES.get(gp_name, "Unknown Circuit")
-
-    location = event.get("Location", "Unknown")
-    lat = event.get("LocationLatitude")
-    lon = event.get("LocationLongitude")
-    country = event.Country    
-    location_flag = location_to_flag(country)
-
-    if not lat or not lon:
-        coords = CIRCUIT_COORDINATES.get(gp_name.replace(" GP", ""))
-        if coords:
-            lat, lon = coords
-
-    weather = fetch_weather(lat, lon) if lat and lon else DEFAULT_WEATHER
-
-    # Build session info with status
-    session_names = ["FP1", "FP2", "FP3", "Quali", "Race"]
-    sessions = []
-    current_session = None
-    next_session_name = None
-    next_session_time = None
-    found_next = False
-
-    for i in range(1, 6):
-        session_dt = event.get(f"Session{i}Date")
-        name = session_names[i - 1]
-        if session_dt and not pandas.isna(session_dt):
-            start_utc = session_dt.to_pydatetime().astimezone(timezone.utc)
-            end_utc = start_utc + timedelta(hours=1.5)  # assume 90 min duration
-            start_local = start_utc.astimezone()
-            status = "🕓 Upcoming"
-
-            if start_utc <= now <= end_utc:
-                status = "🔴 LIVE"
-                current_session = f"{status}: {name}"
-            elif now > end_utc:
-                status = "✅ Completed"
-            elif not found_next:
-                next_session_name = name
-                next_session_time = start_utc
-                found_next = True
-
-            sessions.append({
-                "name": name,
-                "status": status,
-                "datetime_utc": start_utc.isoformat(),
-                "datetime_local": start_local.strftime('%a %H:%M')
-            })
-
-    # Countdown to next session
-    if next_session_time:
-        delta_next = next_session_time - now
-        countdown_next = f"⏱️ {next_session_name} in {delta_next.days}d {delta_next.seconds // 3600}h {(delta_next.seconds // 60) % 60}m"
-    else:
-        countdown_next = "N/A"
-
-    # Countdown to race
-    race_dt = event.get("Session5Date")
-    if race_dt and not pandas.isna(race_dt):
-        race_utc = race_dt.to_pydatetime().astimezone(timezone.utc)
-        if race_utc > now:
-            delta_race = race_utc - now
-            countdown_race = f"🟩 Race in {delta_race.days}d {delta_race.seconds // 3600}h {(delta_race.seconds // 60) % 60}m"
-        else:
-            countdown_race = "N/A"
-    else:
-        countdown_race = "N/A"
-
-    top_drivers = fetch_top_driver_standings()
-    top_constructors = fetch_top_constructor_standings()
-    last_winner = fetch_last_race_winner()
-    Cal = get_season_calendar()
-
-    return {
-        "Race": {
-            "Name": gp_name,
-            "Circuit-Name" : circuit_name,
-            "Location": location,
-            "Country": location_flag,
-            "Weather": weather,
-            "CountdownToNextSession": countdown_next,
-            "CountdownToRace": countdown_race,
-            #"CurrentSession": current_session,
-            "NextSession": next_session_name
-        },
-        "Calender" : {
-            "2025 " : Cal
-        },
-        "Sessions": sessions,
-        "Drivers": f"[DRIVER STANDINGS] {top_drivers}",
-        "Constructors": f"[CONSTRUCTOR STANDINGS] {top_constructors}",
-        "Last Winner": f"[WINNER] {last_winner}"
-    }
-
-@app.route("/f1info.json")
-def f1info_json():
-    try:
-        info = get_next_race_info()
-        return jsonify(info)
-    except Exception as e:
-        print(f"ERROR generating F1 JSON data: {e}")
-        return jsonify({"error": "Could not retrieve F1 data."}), 500
-
-if __name__ == "__main__":
-    try:
-        import pandas
-    except ImportError:
-        print("ERROR: pandas not found.")
-        exit()
-    try:
-        import cachetools
-    except ImportError:
-        print("ERROR: cachetools not found.")
-        exit()
-    app.run(host='0.0.0.0', port=int(os.environ.get("PORT", 5000)))
-
+from flask import Flask, jsonify, request
+from datetime import datetime, timezone
+import importlib.util
+import os
+import threading
+import time
+import requests
+import upstream
+from swr_cache import RefreshAheadCache, refresh_ahead
+from disk_store import DiskStore
+from flask_cors import CORS
+from response_cache import encode_payload, request_format, serve, serve_payload
+from history_store import HistoryStore
+from history_import import (
+    DEFAULT_PAUSE as HISTORY_IMPORT_PAUSE, HistoryImporter, fetch_mrdata, parse_constructor_standings,
+    parse_driver_standings,
+)
+import standings
+from weather import DEFAULT_WEATHER, WeatherService
+from state_bus import StateBus
+import metrics
+import poller
+
+# Create the Flask app FIRST
+app = Flask(__name__)
+CORS(app)
+metrics.install(app)
+
+CACHE_DIR = os.environ.get("F1_CACHE_DIR", 'f1_cache')
+os.makedirs(CACHE_DIR, exist_ok=True)
+
+# fastf1 pulls in pandas, numpy and friends, which takes seconds on a Pi, so it
+# is imported (and its cache enabled) on first use rather than at startup
+_fastf1 = None
+_fastf1_lock = threading.Lock()
+
+def load_fastf1():
+    global _fastf1
+    with _fastf1_lock:
+        if _fastf1 is None:
+            import fastf1
+            try:
+                fastf1.Cache.enable_cache(CACHE_DIR)
+            except Exception as e:
+                print(f"Warning: Could not enable FastF1 cache: {e}")
+            _fastf1 = fastf1
+    return _fastf1
+
+# Every cached result is also persisted here so a restart can answer from disk
+disk_store = DiskStore(os.path.join(CACHE_DIR, 'f1_store.sqlite'))
+
+# Upstream locations and cache lifetimes are overridable so the service can run
+# against local stubs (see benchmarks/load.py)
+JOLPICA_BASE = os.environ.get("JOLPICA_BASE", "https://api.jolpi.ca/ergast/f1")
+OPEN_METEO_BASE = os.environ.get("OPEN_METEO_BASE", "https://api.open-meteo.com/v1")
+# A JSON copy of a fastf1 EventSchedule to use instead of fastf1
+SCHEDULE_FILE = os.environ.get("F1_SCHEDULE_FILE")
+# Multiplier for every cache TTL below
+CACHE_TTL_SCALE = float(os.environ.get("F1_CACHE_TTL_SCALE", 1))
+
+# Expired entries are served stale while one background thread refreshes them
+driver_cache = RefreshAheadCache(maxsize=5, ttl=3600 * CACHE_TTL_SCALE, store=disk_store, name="drivers")
+constructor_cache = RefreshAheadCache(maxsize=5, ttl=3600 * CACHE_TTL_SCALE, store=disk_store, name="constructors")
+winner_cache = RefreshAheadCache(maxsize=5, ttl=3600 * CACHE_TTL_SCALE, store=disk_store, name="winner")
+cal_cache = RefreshAheadCache(maxsize=10, ttl=86400 * CACHE_TTL_SCALE, store=disk_store, name="calendar")
+schedule_cache = RefreshAheadCache(maxsize=2, ttl=86400 * CACHE_TTL_SCALE, name="schedule")
+# The assembled /f1info.json payload; countdowns make it worth rebuilding each minute
+info_cache = RefreshAheadCache(maxsize=1, ttl=60 * CACHE_TTL_SCALE, store=disk_store, name="info")
+
+# Error sentinels the fetchers return instead of raising; these are never cached
+def is_failure(value):
+    return value is None or value == [] or value == "N/A" or value == DEFAULT_WEATHER
+
+def nationality_to_flag(nationality):
+    flags = {
+        "British": "🇬🇧", "German": "🇩🇪", "Dutch": "🇳🇱", "Monegasque": "🇲🇨",
+        "Mexican": "🇲🇽", "Spanish": "🇪🇸", "French": "🇫🇷", "Finnish": "🇫🇮",
+        "Canadian": "🇨🇦", "Australian": "🇦🇺", "Japanese": "🇯🇵", "Chinese": "🇨🇳",
+        "Thai": "🇹🇭", "American": "🇺🇸", "Italian": "🇮🇹", "Austrian": "🇦🇹",
+        "Brazilian": "🇧🇷", "Swiss": "🇨🇭", "New Zealander": "🇳🇿"
+    }
+    if not nationality:
+        return "🏳️"
+    flag = flags.get(nationality)
+    if not flag:
+        print(f"⚠️ Unknown nationality: '{nationality}'")
+        return "🏳️"
+    return flag
+
+def location_to_flag(country):
+    flags = {
+        
+    "Bahrain": "🇧🇭", "Saudi Arabia": "🇸🇦","Australia": "🇦🇺",
+    "Japan": "🇯🇵", "China": "🇨🇳","United States": "🇺🇸",
+    "Italy": "🇮🇹","Monaco": "🇲🇨","Canada": "🇨🇦", 
+    "Spain": "🇪🇸","Austria": "🇦🇹","United Kingdom": "🇬🇧",
+    "Hungary": "🇭🇺","Belgium": "🇧🇪","Netherlands": "🇳🇱",
+    "Azerbaijan": "🇦🇿","Singapore": "🇸🇬","Mexico": "🇲🇽",
+    "Brazil": "🇧🇷","Qatar": "🇶🇦","United Arab Emirates": "🇦🇪",  
+    }
+    return flags.get(country, "🏁")
+
+
+TRACK_NAMES = {
+    "Bahrain GP": "Bahrain International Circuit",
+    "Saudi Arabian GP": "Jeddah Street Circuit",
+    "Australian GP": "Albert Park Circuit",
+    "Japanese GP": "Suzuka Circuit",
+    "Chinese GP": "Shanghai International Circuit",
+    "Miami GP": "Miami International Autodrome",
+    "Emilia Romagna GP": "Imola Circuit",
+    "Monaco GP": "Circuit de Monaco",
+    "Canadian GP": "Circuit Gilles Villeneuve",
+    "Spanish GP": "Circuit de Barcelona-Catalunya",
+    "Austrian GP": "Red Bull Ring",
+    "British GP": "Silverstone Circuit",
+    "Hungarian GP": "Hungaroring",
+    "Belgian GP": "Circuit de Spa-Francorchamps",
+    "Dutch GP": "Circuit Zandvoort",
+    "Italian GP": "Monza Circuit",
+    "Azerbaijan GP": "Baku City Circuit",
+    "Singapore GP": "Marina Bay Street Circuit",
+    "United States GP": "Circuit of the Americas",
+    "Mexico GP": "Autódromo Hermanos Rodríguez",
+    "Brazilian GP": "Interlagos Circuit",
+    "Las Vegas GP": "Las Vegas Street Circuit",
+    "Qatar GP": "Lusail International Circuit",
+    "Abu Dhabi GP": "Yas Marina Circuit"
+}
+
+
+CIRCUIT_COORDINATES = {
+    "Bahrain": (26.0325, 50.5106),
+    "Saudi Arabia": (21.6319, 39.1044),
+    "Australia": (-37.8497, 144.968),
+    "Japan": (34.8431, 136.5419),
+    "China": (31.3389, 121.2197),
+    "Miami": (25.9580, -80.2389),
+    "Emilia Romagna": (44.3442, 11.7166),
+    "Monaco": (43.7347, 7.4206),
+    "Canada": (45.5000, -73.5228),
+    "Spain": (41.5700, 2.2611),
+    "Austria": (47.2197, 14.7647),
+    "UK": (52.0786, -1.0169),
+    "Hungary": (47.5789, 19.2486),
+    "Belgium": (50.4372, 5.9714),
+    "Netherlands": (52.3889, 4.5400),
+    "Italy": (45.6156, 9.2811),
+    "Azerbaijan": (40.3725, 49.8533),
+    "Singapore": (1.2914, 103.8644),
+    "USA": (30.1328, -97.6411),
+    "Mexico": (19.4042, -99.0907),
+    "Brazil": (-23.7036, -46.6997),
+    "Las Vegas": (36.1147, -115.1728),
+    "Qatar": (25.4865, 51.4536),
+    "Abu Dhabi": (24.4672, 54.6031),
+}
+
+ERGAST_TIMEOUT = 10
+
+# Weather for every circuit above, fetched in one batched request on a schedule
+weather_service = WeatherService(OPEN_METEO_BASE, CIRCUIT_COORDINATES, store=disk_store)
+WEATHER_REFRESH_SECONDS = 1800 * CACHE_TTL_SCALE
+WEATHER_RETRY_SECONDS = 60
+
+def weather_delay():
+    age = weather_service.age()
+    if age is None or age >= WEATHER_REFRESH_SECONDS:
+        return WEATHER_RETRY_SECONDS
+    return WEATHER_REFRESH_SECONDS - age
+
+def refresh_weather():
+    if weather_service.refresh():
+        bus.publish("weather", [weather_service.conditions, weather_service.fetched_at])
+
+
+# Full championship tables, parsed once per refresh (see standings.py); every
+# standings view and ticker string is sliced from these
+@refresh_ahead(driver_cache, failed=is_failure)
+def fetch_driver_standings(season):
+    try:
+        mrdata = fetch_mrdata(f"{season}/driverstandings.json", JOLPICA_BASE)
+    except requests.exceptions.RequestException as e:
+        print(f"Driver standings fetch error: {e}")
+        return []
+    return standings.driver_table(parse_driver_standings(mrdata), nationality_to_flag)
+
+@refresh_ahead(constructor_cache, failed=is_failure)
+def fetch_constructor_standings(season):
+    try:
+        mrdata = fetch_mrdata(f"{season}/constructorstandings.json", JOLPICA_BASE)
+    except requests.exceptions.RequestException as e:
+        print(f"Constructor standings fetch error: {e}")
+        return []
+    return standings.constructor_table(parse_constructor_standings(mrdata), nationality_to_flag)
+
+def fetch_top_driver_standings(season, limit=3):
+    return standings.ticker(fetch_driver_standings(season), limit)
+
+def fetch_top_constructor_standings(season, limit=3):
+    return standings.ticker(fetch_constructor_standings(season), limit)
+
+
+@refresh_ahead(winner_cache, failed=is_failure)
+def fetch_last_race_winner(season):
+    url = f'{JOLPICA_BASE}/{season}/last/results.json'
+    try:
+        response = upstream.get(url, timeout=ERGAST_TIMEOUT)
+        response.raise_for_status()
+    except requests.exceptions.RequestException as e:
+        print(f"Error fetching last race winner: {e}")
+        return "N/A"
+
+    data = response.json()
+    races = data.get('MRData', {}).get('RaceTable', {}).get('Races', [])
+    if not races or not races[0].get('Results'):
+        return "N/A"
+
+    race_info = races[0]
+    results = race_info['Results']
+    if not results:
+        return "N/A"
+
+    race_name = race_info.get('raceName', '').replace('Grand Prix', 'GP')
+    winner_data = results[0].get('Driver', {})
+    driver_code = winner_data.get('code', '???')
+    nationality = winner_data.get('nationality', '')
+    flag = nationality_to_flag(nationality)
+
+    return f"{flag} {driver_code} ({race_name})"
+
+def get_track_name(gp_name):
+    return TRACK_NAMES.get(gp_name, "Unknown Circuit")
+
+# CIRCUIT_COORDINATES keys for countries whose schedule name differs
+COUNTRY_CIRCUITS = {"United Kingdom": "UK", "United States": "USA", "United Arab Emirates": "Abu Dhabi"}
+
+# CIRCUIT_COORDINATES key for a schedule event: its name where that is the key
+# (Miami, Las Vegas, Emilia Romagna, ...), else its country; None if unknown
+def circuit_id_for(event):
+    name = event['EventName'].replace("Grand Prix", "").strip()
+    if name in CIRCUIT_COORDINATES:
+        return name
+    country = event.get("Country", "")
+    country = COUNTRY_CIRCUITS.get(country, country)
+    return country if country in CIRCUIT_COORDINATES else None
+
+# Static per-event info for the season index
+def describe_event(event):
+    gp_name = event['EventName'].replace("Grand Prix", "GP")
+    location = event.get("Location", "Unknown")
+    country = event.get("Country", "Unknown")
+    return {
+        "gp_name": gp_name,
+        "circuit_name": get_track_name(gp_name),
+        "circuit_id": circuit_id_for(event),
+        "location": location,
+        "country_flag": location_to_flag(country),
+        "calendar": {
+            "Name": gp_name,
+            "Location": location,
+            "Circuit": get_track_name(gp_name),
+            "Country": location_to_flag(country)
+        }
+    }
+
+# The season's fastf1 EventSchedule, or the local copy in SCHEDULE_FILE
+def load_event_schedule(year):
+    if SCHEDULE_FILE:
+        import pandas as pd
+        return pd.read_json(SCHEDULE_FILE, orient="records", convert_dates=False)
+    return load_fastf1().get_event_schedule(year, include_testing=False)
+
+# Columnar season index built once per day from the fastf1 schedule; requests
+# only slice it by the current time. Kept in memory only (it holds arrays).
+@refresh_ahead(schedule_cache)
+def get_season_index(year):
+    from schedule_index import build_season_index
+    return build_season_index(year, load_event_schedule(year), describe_event)
+
+@refresh_ahead(cal_cache, failed=is_failure)
+def get_season_calendar():
+    return get_season_index(datetime.now(timezone.utc).year).calendar
+
+
+@refresh_ahead(info_cache, failed=is_failure)
+def get_next_race_info():
+    now = datetime.now(timezone.utc)
+    index = get_season_index(now.year)
+
+    i = index.next_event(now.timestamp())
+    if i is None:
+        return {
+            "Race": {"Name": "No upcoming race"},
+            "Sessions": [],
+            "Drivers": "N/A",
+            "Constructors": "N/A",
+            "Last Winner": "N/A"
+        }
+
+    event = index.events[i]
+    gp_name = event["gp_name"]
+    circuit_name = event["circuit_name"]
+    location = event["location"]
+    location_flag = event["country_flag"]
+    # Weather is only read from the prefetched batch, never fetched here
+    weather = weather_service.current(event["circuit_id"])
+
+    # Session statuses and countdowns for the next event
+    sessions, next_session_name, countdown_next, countdown_race = index.event_view(i, now.timestamp())
+    for session in sessions:
+        start = datetime.fromisoformat(session["datetime_utc"]).timestamp()
+        session["forecast"] = weather_service.session_forecast(event["circuit_id"], start)
+
+    top_drivers = fetch_top_driver_standings(index.year)
+    top_constructors = fetch_top_constructor_standings(index.year)
+    last_winner = fetch_last_race_winner(index.year)
+    Cal = get_season_calendar()
+
+    return {
+        "Race": {
+            "Name": gp_name,
+            "Circuit-Name" : circuit_name,
+            "Location": location,
+            "Country": location_flag,
+            "Weather": weather,
+            "CountdownToNextSession": countdown_next,
+            "CountdownToRace": countdown_race,
+            #"CurrentSession": current_session,
+            "NextSession": next_session_name
+        },
+        "Calender" : {
+            f"{index.year} " : Cal
+        },
+        "Sessions": sessions,
+        "Drivers": f"[DRIVER STANDINGS] {top_drivers}",
+        "Constructors": f"[CONSTRUCTOR STANDINGS] {top_constructors}",
+        "Last Winner": f"[WINNER] {last_winner}"
+    }
+
+# (source dict, meta, {format: EncodedResponse}) for /f1info.json. The cached
+# info dict is only replaced when the cache refreshes, so each format is
+# re-serialized once per refresh (and once more when it turns stale).
+f1info_encoded = (None, None, {})
+
+def f1info_response(info, fmt="json"):
+    global f1info_encoded
+    source, meta, encoded = f1info_encoded
+    current_meta = get_next_race_info.describe()
+    if source is not info or meta != current_meta:
+        encoded = {}
+        f1info_encoded = (info, current_meta, encoded)
+    if fmt not in encoded:
+        payload = dict(info, Meta=current_meta) if current_meta else info
+        encoded[fmt] = encode_payload(payload, fmt, app.json.dumps)
+    return encoded[fmt]
+
+# Warm the caches on a background thread so the port can be bound straight
+# away; until the first result exists (in memory or on disk) requests get a
+# "warming" response instead of waiting on fastf1 and the upstream APIs.
+WARMUP_RETRY_SECONDS = 30
+warmup_thread = None
+warmup_lock = threading.Lock()
+
+def warm_caches():
+    while get_next_race_info.cached() is None:
+        try:
+            get_next_race_info()
+        except Exception as e:
+            print(f"Cache warm-up failed, retrying in {WARMUP_RETRY_SECONDS}s: {e}")
+        if get_next_race_info.cached() is None:
+            time.sleep(WARMUP_RETRY_SECONDS)
+
+def start_warmup():
+    global warmup_thread
+    with warmup_lock:
+        if warmup_thread is None or not warmup_thread.is_alive():
+            warmup_thread = threading.Thread(target=warm_caches, daemon=True)
+            warmup_thread.start()
+
+# Current race info without blocking on a cold cache, or None while warming
+def current_f1info():
+    if get_next_race_info.cached() is None:
+        start_warmup()
+        return None
+    return get_next_race_info()
+
+WARMING_RESPONSE = {"status": "warming", "message": "F1 data is loading, please retry shortly."}
+
+@app.route("/f1info.json")
+def f1info_json():
+    try:
+        info = current_f1info()
+        if info is None:
+            return jsonify(WARMING_RESPONSE), 503, {"Retry-After": "5"}
+        return serve(f1info_response(info, request_format()))
+    except Exception as e:
+        print(f"ERROR generating F1 JSON data: {e}")
+        return jsonify({"error": "Could not retrieve F1 data."}), 500
+
+# Current standings views, sliced from the cached full tables. ?season=YYYY
+# (default: this season), ?limit=N for the top N
+STANDINGS_TABLES = {"drivers": fetch_driver_standings, "constructors": fetch_constructor_standings}
+# First championship season; anything outside it..this year is rejected
+# before it can reach the cache or Jolpica
+FIRST_SEASON = 1950
+
+# ?season=YYYY (default: this season), or None if it is not a championship season
+def requested_season():
+    current = datetime.now(timezone.utc).year
+    if "season" not in request.args:
+        return current
+    season = request.args.get("season", type=int)
+    return season if season is not None and FIRST_SEASON <= season <= current else None
+
+def invalid_season():
+    return jsonify({"error": f"season must be a year from {FIRST_SEASON} to {datetime.now(timezone.utc).year}"}), 400
+
+def standings_table(table, season):
+    fetch = STANDINGS_TABLES[table]
+    return fetch(season), fetch.describe(season)
+
+def standings_payload(season, meta, **views):
+    payload = dict(season=season, **views)
+    if meta:
+        payload["meta"] = meta
+    return payload
+
+def standings_unavailable(table, season):
+    return jsonify({"error": f"No {table} standings available for {season}"}), 503
+
+@app.route("/standings/drivers", defaults={"table": "drivers", "gaps": False})
+@app.route("/standings/constructors", defaults={"table": "constructors", "gaps": False})
+@app.route("/standings/drivers/gaps", defaults={"table": "drivers", "gaps": True})
+@app.route("/standings/constructors/gaps", defaults={"table": "constructors", "gaps": True})
+def standings_view(table, gaps):
+    # The table's top ?limit=N; the /gaps views add points behind the leader
+    # and behind the entry ahead
+    season = requested_season()
+    if season is None:
+        return invalid_season()
+    try:
+        limit = int(request.args["limit"]) if "limit" in request.args else None
+    except ValueError:
+        return jsonify({"error": "limit must be an integer"}), 400
+    rows, meta = standings_table(table, season)
+    if not rows:
+        return standings_unavailable(table, season)
+    if gaps:
+        rows = standings.with_gaps(rows)
+    return serve_payload(standings_payload(season, meta, standings=standings.top(rows, limit)))
+
+@app.route("/standings/drivers/<key>", defaults={"table": "drivers"})
+@app.route("/standings/constructors/<key>", defaults={"table": "constructors"})
+def standings_entry(table, key):
+    # One driver (code, Ergast id or name) or constructor, with its gaps
+    season = requested_season()
+    if season is None:
+        return invalid_season()
+    rows, meta = standings_table(table, season)
+    if not rows:
+        return standings_unavailable(table, season)
+    entry = standings.find(standings.with_gaps(rows), key)
+    if entry is None:
+        return jsonify({"error": f"{key} not found in the {season} {table} standings"}), 404
+    return serve_payload(standings_payload(season, meta, entry=entry))
+
+# Historical queries, answered only from the local store that
+# history_import.py fills; nothing here calls upstream
+history_store = HistoryStore(os.path.join(CACHE_DIR, 'history.sqlite'))
+history_importer = HistoryImporter(history_store, base=JOLPICA_BASE, pause=HISTORY_IMPORT_PAUSE)
+# How often the background top-up checks for a newly finished round
+HISTORY_TOPUP_SECONDS = 3600
+
+def history_top_up():
+    try:
+        added = history_importer.top_up()
+    except requests.exceptions.RequestException as e:
+        print(f"History top-up failed: {e}")
+        return
+    if added:
+        print(f"History top-up imported round(s) {', '.join(map(str, added))}")
+
+def history_not_found(message):
+    return jsonify({"error": message}), 404
+
+# ?round=N, or None for the latest imported round
+def history_round(season):
+    round_arg = request.args.get("round")
+    return history_store.resolve_round(season, int(round_arg) if round_arg else None)
+
+def history_limit():
+    return int(request.args.get("limit", -1))
+
+@app.route("/history")
+def history_seasons():
+    return serve_payload([
+        {"season": season, "rounds": rounds, "last_round": last_round}
+        for season, rounds, last_round in history_store.seasons()
+    ])
+
+@app.route("/history/<int:season>/results/<int:round_number>")
+def history_results(season, round_number):
+    results = history_store.results(season, round_number)
+    if not results:
+        return history_not_found(f"No results stored for {season} round {round_number}")
+    race = history_store.race(season, round_number) or {}
+    return serve_payload({"season": season, "round": round_number, "race": race.get("race_name"),
+                          "date": race.get("date"), "results": results})
+
+@app.route("/history/<int:season>/standings/drivers", defaults={"table": "drivers"})
+@app.route("/history/<int:season>/standings/constructors", defaults={"table": "constructors"})
+def history_standings(season, table):
+    # Championship standings after ?round=N (default: latest imported), top ?limit=N
+    try:
+        round_number = history_round(season)
+        limit = history_limit()
+    except ValueError:
+        return jsonify({"error": "round and limit must be integers"}), 400
+    if round_number is None:
+        return history_not_found(f"No standings stored for {season} round {request.args.get('round', '(any)')}")
+    if table == "drivers":
+        standings = history_store.driver_standings(season, round_number, limit)
+    else:
+        standings = history_store.constructor_standings(season, round_number, limit)
+    race = history_store.race(season, round_number) or {}
+    return serve_payload({"season": season, "round": round_number, "race": race.get("race_name"),
+                          "standings": standings})
+
+@app.route("/history/<int:season>/drivers/<driver>/points")
+def history_driver_points(season, driver):
+    # Championship position and cumulative points after every round; `driver`
+    # is an Ergast driverId (max_verstappen) or a code (VER)
+    driver_id = history_store.resolve_driver(season, driver)
+    if driver_id is None:
+        return history_not_found(f"No driver {driver} stored for {season}")
+    rounds = history_store.driver_progression(season, driver_id)
+    previous = 0.0
+    for row in rounds:
+        row["points_scored"] = round((row["points"] or 0.0) - previous, 2)
+        previous = row["points"] or 0.0
+    return serve_payload({"season": season, "driver_id": driver_id, "rounds": rounds})
+
+if os.environ.get("F1INFO_WARMUP", "1") != "0":
+    start_warmup()
+
+# Followers take the leader's weather as it is fetched
+def apply_bus_message(kind, payload):
+    if kind == "weather":
+        weather_service.load(*payload)
+
+def bus_state():
+    if weather_service.fetched_at is None:
+        return []
+    return [("weather", [weather_service.conditions, weather_service.fetched_at])]
+
+# Optional extras: a weather or history outage must not get the service
+# restarted by the watchdog (see poller.py)
+def start_background_task():
+    poller.supervise("weather", refresh_weather, weather_delay, critical=False)
+    if os.environ.get("F1_HISTORY_TOPUP", "1") != "0":
+        # the first run imports the whole current season, so give it time
+        poller.supervise("history", history_top_up, lambda: HISTORY_TOPUP_SECONDS, stale_after=HISTORY_TOPUP_SECONDS,
+                         critical=False)
+
+# Only one process per host polls Open-Meteo and tops up the history store;
+# the others follow it (see state_bus.py) and read the same SQLite file
+bus = StateBus("f1_info", apply_bus_message, bus_state)
+bus.start(on_leader=start_background_task)
+
+# Keep the systemd watchdog fed while it leads or follows (see poller.py)
+poller.supervisor.watch("f1_info bus", bus.healthy)
+poller.supervisor.start()
+
+if __name__ == "__main__":
+    for module in ("pandas", "cachetools"):
+        if importlib.util.find_spec(module) is None:
+            print(f"ERROR: {module} not found.")
+            exit()
+    # the development server binds its port as soon as run() starts
+    poller.notify_ready()
+    app.run(host='0.0.0.0', port=int(os.environ.get("PORT", 5000)))
+
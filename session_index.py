@@ -0,0 +1,175 @@
+from bisect import bisect_right
+from datetime import datetime, timedelta, timezone
+import threading
+import time
+
+# How long a loaded schedule is trusted before it is fetched again
+SCHEDULE_REFRESH_SECONDS = 6 * 3600
+# Back-off before retrying after a failed schedule load
+SCHEDULE_RETRY_SECONDS = 60
+# A session counts as current from this long before its official start
+SESSION_LEAD_TIME = timedelta(minutes=10)
+# ... and as live until this long after its end, for late laps and messages
+SESSION_TAIL_TIME = timedelta(minutes=15)
+# Assumed length of a session the schedule gives no end time for
+DEFAULT_SESSION_LENGTH = timedelta(hours=2)
+# Within this long of a session ending or starting, pollers idle rather than sleep
+SESSION_IDLE_WINDOW = timedelta(hours=2)
+# Longest a poller sleeps while nothing is on, so schedule changes are picked up
+MAX_POLL_SLEEP = 6 * 3600
+
+
+def parse_utc(value):
+    if not value:
+        return None
+    try:
+        dt = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt
+
+
+# In-memory index of the OpenF1 session schedule.
+#
+# The schedule is fetched once (a whole season in one request) and kept as
+# sorted start timestamps, both overall and per session name/type, so
+# "which session is current for filter X" is a bisect with no network calls.
+# Only `maybe_refresh` ever talks to the upstream; it reloads on a slow cadence
+# or as soon as a session start/end recorded in the index has passed.
+class SessionSchedule:
+    def __init__(self, fetch_sessions, refresh_seconds=SCHEDULE_REFRESH_SECONDS):
+        self._fetch_sessions = fetch_sessions
+        self._refresh_seconds = refresh_seconds
+        self._refresh_lock = threading.Lock()
+        # (starts, sessions, by_filter, boundaries) swapped in as one tuple so
+        # readers never see a half-built index
+        self._index = ([], [], {}, [])
+        self._next_check = 0.0
+        # no reload attempt before this monotonic time, after a failed one
+        self._retry_at = 0.0
+        self._loaded_wall = 0.0
+        # the sessions as fetched, for relaying
+        self.raw_sessions = []
+
+    @property
+    def loaded(self):
+        return bool(self._index[1])
+
+    @property
+    def sessions(self):
+        return self._index[1]
+
+    # Fetch the season's sessions and rebuild the index
+    def refresh(self, now=None):
+        now = now or datetime.now(timezone.utc)
+        sessions = self._fetch_sessions(year=now.year)
+        if not sessions:
+            sessions = self._fetch_sessions()
+        return self.load(sessions, now)
+
+    # Rebuild the index from sessions fetched elsewhere (e.g. relayed by the
+    # polling leader process, see state_bus.py)
+    def load(self, sessions, now=None):
+        if not sessions:
+            return False
+        self._index = self._build(sessions)
+        self.raw_sessions = sessions
+        self._loaded_wall = (now or datetime.now(timezone.utc)).timestamp()
+        return True
+
+    # Reload when the cadence expires or a session boundary has passed, but
+    # never sooner than SCHEDULE_RETRY_SECONDS after a failed reload.
+    # Cheap to call every tick; at most one caller hits the network.
+    def maybe_refresh(self, now=None):
+        now = now or datetime.now(timezone.utc)
+        mono = time.monotonic()
+        if mono < self._retry_at:
+            return False
+        if self.loaded and mono < self._next_check and not self._boundary_passed(now):
+            return False
+        if not self._refresh_lock.acquire(blocking=False):
+            return False
+        try:
+            if self.refresh(now):
+                self._next_check = mono + self._refresh_seconds
+                self._retry_at = 0.0
+                return True
+            self._next_check = self._retry_at = mono + SCHEDULE_RETRY_SECONDS
+            return False
+        finally:
+            self._refresh_lock.release()
+
+    # Session key of the latest session (optionally matching `session_filter`)
+    # that has started, or failing that the next one to start
+    def session_key_for(self, session_filter=None, now=None):
+        session = self.session_for(session_filter, now)
+        return session.get("session_key") if session else None
+
+    def session_for(self, session_filter=None, now=None):
+        now = now or datetime.now(timezone.utc)
+        starts, sessions, by_filter, _ = self._index
+        if session_filter:
+            starts, sessions = by_filter.get(session_filter.lower(), ((), ()))
+        if not sessions:
+            return None
+        i = bisect_right(starts, (now + SESSION_LEAD_TIME).timestamp())
+        return sessions[i - 1] if i else sessions[0]
+
+    # Seconds a poller should wait before its next tick: `live_seconds` while a
+    # session is on, `idle_seconds` around sessions, otherwise until shortly
+    # before the next session starts (at most MAX_POLL_SLEEP)
+    def poll_delay(self, live_seconds, idle_seconds, now=None):
+        now = now or datetime.now(timezone.utc)
+        starts, sessions, _, _ = self._index
+        if not sessions:
+            return idle_seconds
+        i = bisect_right(starts, (now + SESSION_LEAD_TIME).timestamp())
+        if i:
+            previous = sessions[i - 1]
+            end = previous["_end"] or previous["_start"] + DEFAULT_SESSION_LENGTH
+            if now <= end + SESSION_TAIL_TIME:
+                return live_seconds
+            recent = now - end <= SESSION_IDLE_WINDOW
+        else:
+            recent = False
+
+        until_next = starts[i] - SESSION_LEAD_TIME.total_seconds() - now.timestamp() if i < len(starts) else None
+        if recent or (until_next is not None and until_next <= SESSION_IDLE_WINDOW.total_seconds()):
+            delay = idle_seconds
+        else:
+            delay = MAX_POLL_SLEEP
+        if until_next is not None:
+            delay = min(delay, until_next)
+        return max(live_seconds, min(delay, MAX_POLL_SLEEP))
+
+    def _boundary_passed(self, now):
+        boundaries = self._index[3]
+        i = bisect_right(boundaries, self._loaded_wall)
+        return i < len(boundaries) and boundaries[i] <= now.timestamp()
+
+    def _build(self, raw_sessions):
+        sessions = []
+        for session in raw_sessions:
+            start = parse_utc(session.get("date_start") or session.get("session_start_utc"))
+            if not start or session.get("session_key") is None:
+                continue
+            end = parse_utc(session.get("date_end") or session.get("session_end_utc"))
+            sessions.append(dict(session, _start=start, _end=end))
+        sessions.sort(key=lambda s: s["_start"])
+
+        starts = [s["_start"].timestamp() for s in sessions]
+        grouped = {}
+        for ts, session in zip(starts, sessions):
+            names = {(session.get("session_name") or "").lower(), (session.get("session_type") or "").lower()}
+            for name in names - {""}:
+                group = grouped.setdefault(name, ([], []))
+                group[0].append(ts)
+                group[1].append(session)
+
+        boundaries = sorted(
+            [s["_start"].timestamp() for s in sessions]
+            + [s["_end"].timestamp() for s in sessions if s["_end"]]
+        )
+        return starts, sessions, grouped, boundaries
@@ -0,0 +1,79 @@
+# Championship standings, parsed once per refresh and sliced per request.
+#
+# A table is a list of small dicts in championship order, one per driver or
+# constructor: position, code, name, id, points, wins and nationality flag.
+# Tables are plain JSON so the refresh-ahead cache can persist them; the
+# /standings endpoints and the /f1info.json ticker strings are all views of
+# the same cached table, so asking for a different top-N never refetches.
+
+
+# Compact rows from history_import.parse_driver_standings output
+def driver_table(rows, flag_for):
+    return [
+        {
+            "position": row["position"],
+            "code": row["code"] or row["driver_name"].split(" ")[-1],
+            "name": row["driver_name"],
+            "id": row["driver_id"],
+            "team": row["constructor"],
+            "points": row["points"] or 0.0,
+            "wins": row["wins"] or 0,
+            "flag": flag_for(row["nationality"]),
+        }
+        for row in rows
+    ]
+
+
+# Compact rows from history_import.parse_constructor_standings output
+def constructor_table(rows, flag_for):
+    return [
+        {
+            "position": row["position"],
+            "code": row["name"],
+            "name": row["name"],
+            "id": row["constructor_id"],
+            "points": row["points"] or 0.0,
+            "wins": row["wins"] or 0,
+            "flag": flag_for(row["nationality"]),
+        }
+        for row in rows
+    ]
+
+
+def top(table, limit=None):
+    return table if limit is None else table[:max(limit, 0)]
+
+
+# Entry whose code, id or name matches `key` (case-insensitive), or None
+def find(table, key):
+    key = key.lower()
+    for row in table:
+        if key in ((row["code"] or "").lower(), (row["id"] or "").lower(), (row["name"] or "").lower()):
+            return row
+    return None
+
+
+# Entries with their points gap to the leader and to the entry ahead
+def with_gaps(table):
+    if not table:
+        return []
+    leader = table[0]["points"]
+    gaps = []
+    ahead = leader
+    for row in table:
+        gaps.append(dict(row, gap_to_leader=round(leader - row["points"], 2), gap_to_ahead=round(ahead - row["points"], 2)))
+        ahead = row["points"]
+    return gaps
+
+
+def format_points(points):
+    return f"{points:g}"
+
+
+# Ticker string, e.g. "1.🇳🇱 VER 437pts • 2.🇬🇧 NOR 374pts"; [] for an empty table
+def ticker(table, limit=3):
+    if not table:
+        return []
+    return " • ".join(
+        f"{i + 1}.{row['flag']} {row['code']} {format_points(row['points'])}pts" for i, row in enumerate(table[:limit])
+    )
@@ -0,0 +1,188 @@
+import fcntl
+import json
+import os
+import socket
+import struct
+import threading
+import time
+
+# One upstream poller per host, relayed to every other worker process.
+#
+# Each service that polls upstream (live timing, positions) creates a StateBus.
+# The process that wins an exclusive flock on "<name>.lock" becomes the leader:
+# it runs the poller and serves a Unix socket "<name>.sock" that relays every
+# state change it publishes. Any other process (more uvicorn or gunicorn
+# workers, extra copies of the service) becomes a follower: it runs no poller,
+# connects to the socket, first receives the leader's current state and then
+# every change, and answers requests from its own in-memory copy. Upstream load
+# is therefore the same however many workers serve.
+#
+# The lock is released by the kernel when the leader dies. Its followers see
+# their connection close, race for the lock, and the winner starts polling.
+#
+# Messages are length-prefixed JSON arrays [kind, payload]; the leader encodes
+# each message once, whatever the number of followers. A follower that cannot
+# take a message within SEND_TIMEOUT is disconnected; it reconnects and resyncs
+# from the leader's current state.
+#
+# A follower counts as healthy (for the systemd watchdog, see poller.py) while
+# it is connected to a leader, or has been without one for less than
+# LEADERLESS_GRACE seconds.
+#
+# F1_BUS_DIR sets where the lock and socket live (default: f1_cache/bus);
+# F1_BUS=off makes every process poll on its own.
+
+BUS_DIR = os.environ.get("F1_BUS_DIR") or os.path.join(os.environ.get("F1_CACHE_DIR", "f1_cache"), "bus")
+BUS_ENABLED = os.environ.get("F1_BUS", "on") != "off"
+SEND_TIMEOUT = 1.0
+RECONNECT_SECONDS = 1.0
+LEADERLESS_GRACE = 30.0
+HEADER = struct.Struct("!I")
+
+
+def encode_message(kind, payload):
+    body = json.dumps([kind, payload], separators=(",", ":")).encode("utf-8")
+    return HEADER.pack(len(body)) + body
+
+
+def _read_exactly(sock, size):
+    chunks = []
+    while size:
+        chunk = sock.recv(size)
+        if not chunk:
+            raise ConnectionError("leader closed the connection")
+        chunks.append(chunk)
+        size -= len(chunk)
+    return b"".join(chunks)
+
+
+def read_message(sock):
+    (size,) = HEADER.unpack(_read_exactly(sock, HEADER.size))
+    kind, payload = json.loads(_read_exactly(sock, size))
+    return kind, payload
+
+
+class StateBus:
+    # `on_message(kind, payload)` applies a relayed change in a follower.
+    # `current_state()` returns the [(kind, payload)] a new follower needs to
+    # catch up; it is called in the leader.
+    def __init__(self, name, on_message, current_state, directory=BUS_DIR, enabled=BUS_ENABLED):
+        self.name = name
+        self.on_message = on_message
+        self.current_state = current_state
+        self.enabled = enabled
+        self.lock_path = os.path.join(directory, f"{name}.lock")
+        self.socket_path = os.path.join(directory, f"{name}.sock")
+        self.directory = directory
+        self.is_leader = False
+        self._lock_file = None
+        self._followers = []
+        self._followers_lock = threading.Lock()
+        self._on_leader = None
+        self._follower = None
+        self._connected = False
+        self._lost_at = time.monotonic()
+
+    # Become leader (calling `on_leader()`) or follow the current one
+    def start(self, on_leader):
+        self._on_leader = on_leader
+        if not self.enabled:
+            self.is_leader = True
+            on_leader()
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        if self._try_lead():
+            return
+        self._follower = threading.Thread(target=self._follow, name=f"{self.name}-follower", daemon=True)
+        self._follower.start()
+
+    # Relay a change to every follower (no-op in followers and when disabled)
+    def publish(self, kind, payload):
+        if not self.is_leader or not self.enabled:
+            return
+        with self._followers_lock:
+            followers = list(self._followers)
+        if not followers:
+            return
+        message = encode_message(kind, payload)
+        for conn in followers:
+            self._send(conn, message)
+
+    def followers(self):
+        return len(self._followers)
+
+    # True while leading, or following a live leader (see LEADERLESS_GRACE)
+    def healthy(self, now=None):
+        if self.is_leader:
+            return True
+        if self._follower is None or not self._follower.is_alive():
+            return False
+        return self._connected or (now or time.monotonic()) - self._lost_at < LEADERLESS_GRACE
+
+    def _send(self, conn, message):
+        try:
+            conn.sendall(message)
+            return True
+        except OSError:
+            with self._followers_lock:
+                if conn in self._followers:
+                    self._followers.remove(conn)
+            conn.close()
+            return False
+
+    def _try_lead(self):
+        lock_file = open(self.lock_path, "a")
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            return False
+        self._lock_file = lock_file
+        # a socket left behind by a dead leader; the lock proves it is unused
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+        server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        server.bind(self.socket_path)
+        server.listen()
+        self.is_leader = True
+        print(f"{self.name}: leading (pid {os.getpid()})")
+        threading.Thread(target=self._accept, args=(server,), name=f"{self.name}-bus", daemon=True).start()
+        self._on_leader()
+        return True
+
+    def _accept(self, server):
+        while True:
+            conn, _ = server.accept()
+            conn.settimeout(SEND_TIMEOUT)
+            # catch the follower up before it joins the broadcast list; the
+            # list lock keeps a concurrent publish from interleaving
+            with self._followers_lock:
+                try:
+                    for kind, payload in self.current_state():
+                        conn.sendall(encode_message(kind, payload))
+                except OSError:
+                    conn.close()
+                    continue
+                self._followers.append(conn)
+
+    def _follow(self):
+        print(f"{self.name}: following the leader's {self.socket_path}")
+        while True:
+            try:
+                with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+                    sock.connect(self.socket_path)
+                    self._connected = True
+                    while True:
+                        kind, payload = read_message(sock)
+                        try:
+                            self.on_message(kind, payload)
+                        except Exception as e:
+                            print(f"{self.name}: could not apply {kind} from the leader:", e)
+            except (OSError, ValueError) as e:
+                print(f"{self.name}: lost the leader ({e})")
+            if self._connected:
+                self._connected = False
+                self._lost_at = time.monotonic()
+            if self._try_lead():
+                return
+            time.sleep(RECONNECT_SECONDS)
@@ -0,0 +1,112 @@
+import asyncio
+import queue
+import threading
+
+# Fan-out of server-sent events to many concurrent subscribers.
+#
+# Every subscriber owns a small bounded queue. Publishing never blocks the
+# producer: a subscriber whose queue is full is treated as a slow consumer and
+# dropped, and its stream ends so the client can reconnect for a fresh snapshot.
+# Messages are rendered once per distinct subscriber key (e.g. the
+# session/driver filter pair), not once per subscriber.
+
+STREAM_BUFFER = 64
+HEARTBEAT_SECONDS = 15
+
+
+def format_sse(event, data):
+    lines = "".join(f"data: {line}\n" for line in data.splitlines() or [""])
+    return f"event: {event}\n{lines}\n".encode("utf-8")
+
+
+HEARTBEAT = b": keep-alive\n\n"
+
+
+class Subscriber:
+    def __init__(self, key, buffer_size=STREAM_BUFFER):
+        self.key = key
+        self.queue = queue.Queue(maxsize=buffer_size)
+        self.dropped = False
+
+    def push(self, message):
+        try:
+            self.queue.put_nowait(message)
+            return True
+        except queue.Full:
+            self.dropped = True
+            return False
+
+    # Yield queued messages, with heartbeats while idle, until dropped
+    def messages(self, heartbeat=HEARTBEAT_SECONDS):
+        while not self.dropped:
+            try:
+                yield self.queue.get(timeout=heartbeat)
+            except queue.Empty:
+                yield HEARTBEAT
+
+
+# Subscriber served from an asyncio event loop (the ASGI entry point).
+# `push` is called from the poller thread and hands messages to the loop.
+class AsyncSubscriber:
+    def __init__(self, key, loop, buffer_size=STREAM_BUFFER):
+        self.key = key
+        self.loop = loop
+        self.queue = asyncio.Queue(maxsize=buffer_size)
+        self.dropped = False
+
+    def push(self, message):
+        if self.dropped or self.queue.full():
+            self.dropped = True
+            return False
+        self.loop.call_soon_threadsafe(self._put, message)
+        return True
+
+    def _put(self, message):
+        try:
+            self.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            self.dropped = True
+
+    async def messages(self, heartbeat=HEARTBEAT_SECONDS):
+        while not self.dropped:
+            try:
+                yield await asyncio.wait_for(self.queue.get(), heartbeat)
+            except asyncio.TimeoutError:
+                yield HEARTBEAT
+
+
+class Broadcaster:
+    def __init__(self, buffer_size=STREAM_BUFFER):
+        self.buffer_size = buffer_size
+        self._subscribers = set()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._subscribers)
+
+    def subscribe(self, key=None, loop=None):
+        if loop is not None:
+            subscriber = AsyncSubscriber(key, loop, self.buffer_size)
+        else:
+            subscriber = Subscriber(key, self.buffer_size)
+        with self._lock:
+            self._subscribers.add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        with self._lock:
+            self._subscribers.discard(subscriber)
+
+    # `render(key)` returns the encoded message for subscribers with that key,
+    # or None to skip them
+    def publish(self, render):
+        with self._lock:
+            subscribers = list(self._subscribers)
+        rendered = {}
+        for subscriber in subscribers:
+            if subscriber.key not in rendered:
+                rendered[subscriber.key] = render(subscriber.key)
+            message = rendered[subscriber.key]
+            if message is not None and not subscriber.push(message):
+                print(f"Dropping slow stream subscriber {subscriber.key}")
+                self.unsubscribe(subscriber)
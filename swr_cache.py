@@ -0,0 +1,246 @@
+from collections import OrderedDict
+from datetime import datetime, timezone
+import functools
+import threading
+import time
+
+from cachetools.keys import hashkey
+
+from metrics import Counter, Gauge, Histogram
+
+# Refresh-ahead replacement for the cachetools TTLCache + @cached pairs.
+#
+# - A fresh entry is returned as-is.
+# - An expired entry is still returned immediately (stale-while-revalidate)
+#   while a single background thread refreshes it.
+# - A missing entry is loaded once; concurrent callers for the same key wait
+#   for that one load instead of stampeding the upstream (single-flight).
+# - A load that raises or returns a failure sentinel is never cached: the
+#   last-known-good value is kept, and the key is not retried for
+#   `retry_after` seconds so a dead upstream is not hit on every request.
+# - With a DiskStore attached, every good value is also written to disk, and a
+#   key missing from memory (e.g. after a restart) is served from disk as a
+#   stale entry while it refreshes in the background.
+# - Failure records and the set of keys already looked up on disk are bounded
+#   by `maxsize` like the entries, so arbitrary keys cannot grow memory.
+
+FAILURE_RETRY_SECONDS = 60
+LOAD_WAIT_SECONDS = 60
+
+CACHE_LOOKUPS = Counter(
+    "cache_lookups_total",
+    "Cache lookups by cache and result (fresh, stale, disk, miss, failed).",
+    ("cache", "result"),
+)
+CACHE_EVICTIONS = Counter("cache_evictions_total", "Entries evicted to stay within maxsize.", ("cache",))
+CACHE_LOAD_FAILURES = Counter("cache_load_failures_total", "Loads that raised or returned a failure value.", ("cache",))
+CACHE_LOAD_SECONDS = Histogram("cache_load_duration_seconds", "Time spent loading a cache entry.", ("cache",))
+CACHE_ENTRIES = Gauge("cache_entries", "Entries currently held in memory.", ("cache",))
+LOOKUP_RESULTS = ("fresh", "stale", "disk", "miss", "failed")
+
+
+class _Entry:
+    __slots__ = ("value", "fetched_at", "retry_at", "source")
+
+    def __init__(self, value, fetched_at, source="upstream"):
+        self.value = value
+        self.fetched_at = fetched_at
+        self.retry_at = 0.0
+        self.source = source
+
+
+class _Flight:
+    __slots__ = ("done", "value", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class RefreshAheadCache:
+    def __init__(self, maxsize, ttl, retry_after=FAILURE_RETRY_SECONDS, store=None, name=None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.retry_after = retry_after
+        self.store = store
+        self.name = name
+        self._entries = OrderedDict()
+        # key -> (failure value, error, retry_at) for keys that have never loaded
+        self._failures = OrderedDict()
+        self._flights = {}
+        # keys already looked up on disk, so misses hit SQLite only once
+        self._disk_checked = OrderedDict()
+        self._lock = threading.Lock()
+
+        label = name or "unnamed"
+        self._lookups = {result: CACHE_LOOKUPS.labels(label, result) for result in LOOKUP_RESULTS}
+        self._evictions = CACHE_EVICTIONS.labels(label)
+        self._load_failures = CACHE_LOAD_FAILURES.labels(label)
+        self._load_seconds = CACHE_LOAD_SECONDS.labels(label)
+        CACHE_ENTRIES.labels(label).set_function(self.__len__)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._failures.clear()
+            self._disk_checked.clear()
+
+    # (value, fetched_at) for a key regardless of freshness, or None
+    def peek(self, key):
+        entry = self._entries.get(key)
+        return (entry.value, entry.fetched_at) if entry else None
+
+    # Staleness metadata for a cached key, or None if nothing is cached
+    def describe(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        return {
+            "AsOf": datetime.fromtimestamp(entry.fetched_at, timezone.utc).isoformat(),
+            "Stale": time.time() - entry.fetched_at >= self.ttl,
+            "Source": entry.source,
+        }
+
+    def _store_key(self, key):
+        return f"{self.name}:{key!r}"
+
+    # Promote a persisted value into memory; it keeps its original fetch time
+    def _load_from_disk(self, key):
+        if self.store is None or key in self._disk_checked:
+            return None
+        with self._lock:
+            self._disk_checked[key] = True
+            self._evict()
+        saved = self.store.get(self._store_key(key))
+        if saved is None:
+            return None
+        value, saved_at = saved
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                entry = self._entries[key] = _Entry(value, saved_at, source="disk")
+                self._evict()
+        self._lookups["disk"].inc()
+        return entry
+
+    # Drop the oldest entries, failure records and disk lookups beyond
+    # maxsize; caller holds the lock
+    def _evict(self):
+        while len(self._entries) > self.maxsize:
+            key, _ = self._entries.popitem(last=False)
+            self._disk_checked.pop(key, None)
+            self._evictions.inc()
+        while len(self._failures) > self.maxsize:
+            self._failures.popitem(last=False)
+        while len(self._disk_checked) > self.maxsize:
+            self._disk_checked.popitem(last=False)
+
+    # Cached value (fresh, stale or persisted) without ever loading, or None
+    def get_cached(self, key):
+        entry = self._entries.get(key) or self._load_from_disk(key)
+        return entry.value if entry is not None else None
+
+    def get_or_load(self, key, load, failed=None):
+        now = time.time()
+        entry = self._entries.get(key) or self._load_from_disk(key)
+        if entry is not None:
+            if now - entry.fetched_at < self.ttl:
+                self._lookups["fresh"].inc()
+                return entry.value
+            self._lookups["stale"].inc()
+            if now >= entry.retry_at:
+                self._start_flight(key, load, failed, background=True)
+            return entry.value
+
+        failure = self._failures.get(key)
+        if failure is not None and now < failure[2]:
+            self._lookups["failed"].inc()
+            if failure[1] is not None:
+                raise failure[1]
+            return failure[0]
+
+        self._lookups["miss"].inc()
+        flight, leader = self._start_flight(key, load, failed, background=False)
+        if not leader:
+            flight.done.wait(LOAD_WAIT_SECONDS)
+        if flight.error is not None:
+            raise flight.error
+        return flight.value
+
+    # Begin (or join) the single load for `key`. Returns (flight, is_leader);
+    # a foreground leader runs the load on the calling thread.
+    def _start_flight(self, key, load, failed, background):
+        with self._lock:
+            flight = self._flights.get(key)
+            if flight is not None:
+                return flight, False
+            flight = self._flights[key] = _Flight()
+        if background:
+            threading.Thread(target=self._run, args=(key, flight, load, failed), daemon=True).start()
+        else:
+            self._run(key, flight, load, failed)
+        return flight, True
+
+    def _run(self, key, flight, load, failed):
+        start = time.perf_counter()
+        try:
+            value = load()
+            flight.value = value
+            if failed is not None and failed(value):
+                self._record_failure(key, value, None)
+            else:
+                self._store(key, value)
+        except Exception as e:
+            flight.error = e
+            self._record_failure(key, None, e)
+            print(f"Cache refresh failed for {key}: {e}")
+        finally:
+            self._load_seconds.observe(time.perf_counter() - start)
+            with self._lock:
+                self._flights.pop(key, None)
+            flight.done.set()
+
+    def _store(self, key, value):
+        fetched_at = time.time()
+        with self._lock:
+            self._entries[key] = _Entry(value, fetched_at)
+            self._entries.move_to_end(key)
+            self._failures.pop(key, None)
+            self._evict()
+        if self.store is not None:
+            self.store.put(self._store_key(key), value, fetched_at)
+
+    def _record_failure(self, key, value, error):
+        self._load_failures.inc()
+        retry_at = time.time() + self.retry_after
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                # keep serving the last-known-good value
+                entry.retry_at = retry_at
+            else:
+                self._failures[key] = (value, error, retry_at)
+                self._failures.move_to_end(key)
+                self._evict()
+
+
+# Decorator: cache `func`'s result per arguments in a RefreshAheadCache.
+# `failed(value)` marks return values (error sentinels) that must not be cached.
+def refresh_ahead(cache, failed=None):
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            key = hashkey(*args, **kwargs)
+            return cache.get_or_load(key, lambda: func(*args, **kwargs), failed)
+        wrapper.cache = cache
+        wrapper.describe = lambda *args, **kwargs: cache.describe(hashkey(*args, **kwargs))
+        wrapper.cached = lambda *args, **kwargs: cache.get_cached(hashkey(*args, **kwargs))
+        return wrapper
+    return decorator
@@ -0,0 +1,72 @@
+from event_log import Event, EventLog
+
+
+def radio(date, number, driver):
+    return Event(None, "team_radio", date, number, driver, recording_url=f"https://example.com/{number}/{date}.mp3")
+
+
+def race_control(date, message, category="Flag", flag=None, lap=None):
+    return Event(None, "race_control", date, category=category, flag=flag, lap=lap, message=message)
+
+
+def sample_log():
+    log = EventLog(9999)
+    log.add([
+        race_control("2025-07-06T14:00:00", "GREEN LIGHT - PIT EXIT OPEN", flag="GREEN", lap=1),
+        radio("2025-07-06T14:05:00", 1, "VER"),
+        radio("2025-07-06T14:06:00", 44, "HAM"),
+        race_control("2025-07-06T14:07:00", "YELLOW IN TRACK SECTOR 4", flag="YELLOW", lap=3),
+        radio("2025-07-06T14:08:00", 1, "VER"),
+    ])
+    return log
+
+
+def test_add_numbers_events_and_drops_duplicates():
+    log = sample_log()
+    assert [event.id for event in log.all()] == [1, 2, 3, 4, 5]
+    assert log.last_id() == 5
+    added = log.add([radio("2025-07-06T14:08:00", 1, "VER"), radio("2025-07-06T14:09:00", 44, None)])
+    assert [event.id for event in added] == [6]
+    # the driver code is not part of an event's identity
+    assert log.add([radio("2025-07-06T14:09:00", 44, "HAM")]) == []
+
+
+def test_since_pages_through_the_log():
+    log = sample_log()
+    events, more = log.since(0, limit=2)
+    assert [event.id for event in events] == [1, 2] and more
+    events, more = log.since(2, limit=2)
+    assert [event.id for event in events] == [3, 4] and more
+    events, more = log.since(4, limit=2)
+    assert [event.id for event in events] == [5] and not more
+    assert log.since(5) == ([], False)
+
+
+def test_since_filters():
+    log = sample_log()
+    events, _ = log.since(0, kind="team_radio", driver_number=1)
+    assert [event.id for event in events] == [2, 5]
+    events, _ = log.since(2, driver="ver")
+    assert [event.id for event in events] == [5]
+    events, _ = log.since(0, flag="yellow")
+    assert [event.message for event in events] == ["YELLOW IN TRACK SECTOR 4"]
+    # None matches anything; an unknown value matches nothing
+    assert len(log.since(0, driver=None)[0]) == 5
+    assert log.since(0, driver_number=16) == ([], False)
+
+
+def test_latest_up_to_an_id():
+    log = sample_log()
+    assert [event.id for event in log.latest(2, kind="team_radio")] == [3, 5]
+    assert [event.id for event in log.latest(2, until=4, kind="team_radio")] == [2, 3]
+    assert [event.id for event in log.latest(10, until=3)] == [1, 2, 3]
+
+
+def test_extend_keeps_the_leaders_ids():
+    follower = EventLog(9999)
+    leader = sample_log()
+    assert len(follower.extend(leader.all()[:3])) == 3
+    # already held or out of order: ignored
+    assert follower.extend(leader.all()[1:2] + leader.all()[4:]) == []
+    assert [event.id for event in follower.extend(leader.all()[3:])] == [4, 5]
+    assert follower.since(0, driver_number=1)[0] == leader.since(0, driver_number=1)[0]
@@ -0,0 +1,55 @@
+import numpy as np
+import pytest
+
+from position_frames import FRAME_HEADER, MAX_FRAMES, decode_frames, encode_frames, frame_times, resample
+
+
+def test_frame_times_are_clock_ticks_inside_the_window():
+    times = frame_times(100.05, 100.5, 10)
+    assert times.tolist() == pytest.approx([100.1, 100.2, 100.3, 100.4, 100.5])
+
+
+def test_frame_times_rejects_too_many_frames():
+    with pytest.raises(ValueError):
+        frame_times(0, MAX_FRAMES, 1)
+
+
+def test_resample_interpolates_and_holds_each_car_at_its_own_ends():
+    columns = {
+        44: ([10.0, 12.0], [0.0, 20.0], [100.0, 120.0], [0.0, 0.0]),
+        1: ([11.0, 13.0], [5.0, 5.0], [-5.0, -15.0], [0.0, 0.0]),
+    }
+    cars, xy = resample(columns, np.array([10.0, 11.0, 12.0, 13.0]))
+    assert cars == [1, 44]
+    # car 1 has no sample before t=11 and holds its first position
+    assert xy[0, :, 0].tolist() == [5.0, 5.0, 5.0, 5.0]
+    assert xy[0, :, 1].tolist() == [-5.0, -5.0, -10.0, -15.0]
+    # car 44 has none after t=12 and holds its last
+    assert xy[1, :, 0].tolist() == [0.0, 10.0, 20.0, 20.0]
+    assert xy[1, :, 1].tolist() == [100.0, 110.0, 120.0, 120.0]
+
+
+def test_encode_decode_round_trip():
+    times = frame_times(1700000000.0, 1700000001.0, 10)
+    cars = [1, 16, 44]
+    rng = np.random.default_rng(1)
+    xy = rng.uniform(-8000, 8000, size=(len(cars), len(times), 2))
+
+    data = encode_frames(times, cars, xy, 10)
+    assert len(data) == FRAME_HEADER.size + 2 * len(cars) + 8 * len(cars) * len(times)
+
+    decoded_times, decoded_cars, decoded_xy = decode_frames(data)
+    assert decoded_cars == cars
+    np.testing.assert_allclose(decoded_times, times)
+    # coordinates travel as float32
+    np.testing.assert_allclose(decoded_xy, xy.astype(np.float32))
+
+
+def test_encode_decode_empty():
+    times, cars, xy = decode_frames(encode_frames(np.array([]), [], np.empty((0, 0, 2)), 10))
+    assert cars == [] and len(times) == 0 and xy.shape == (0, 0, 2)
+
+
+def test_decode_rejects_other_data():
+    with pytest.raises(ValueError):
+        decode_frames(b"XXXX" + bytes(FRAME_HEADER.size))
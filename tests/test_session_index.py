@@ -0,0 +1,69 @@
+from datetime import datetime, timezone
+
+import pytest
+
+from session_index import MAX_POLL_SLEEP, SessionSchedule
+
+LIVE, IDLE = 5, 120
+
+SESSIONS = [
+    {"session_key": 1, "session_name": "Race", "session_type": "Race",
+     "date_start": "2025-07-06T14:00:00+00:00", "date_end": "2025-07-06T16:00:00+00:00"},
+    # no end time: assumed to run DEFAULT_SESSION_LENGTH
+    {"session_key": 2, "session_name": "Practice 1", "session_type": "Practice",
+     "date_start": "2025-07-25T11:30:00+00:00", "date_end": None},
+]
+
+
+def at(value):
+    return datetime.fromisoformat(value).replace(tzinfo=timezone.utc)
+
+
+@pytest.fixture
+def schedule():
+    schedule = SessionSchedule(lambda **_: [])
+    schedule.load(SESSIONS, at("2025-07-01T00:00:00"))
+    return schedule
+
+
+def test_nothing_loaded_polls_at_the_idle_rate():
+    assert SessionSchedule(lambda **_: []).poll_delay(LIVE, IDLE) == IDLE
+
+
+@pytest.mark.parametrize("now", [
+    "2025-07-06T13:51:00",  # within the lead time before the start
+    "2025-07-06T15:00:00",
+    "2025-07-06T16:14:00",  # within the tail after the end
+    "2025-07-25T13:40:00",  # a session without an end time
+])
+def test_live_around_a_session(schedule, now):
+    assert schedule.poll_delay(LIVE, IDLE, at(now)) == LIVE
+
+
+@pytest.mark.parametrize("now", [
+    "2025-07-06T17:00:00",  # shortly after a session ended
+    "2025-07-25T10:00:00",  # shortly before the next one
+])
+def test_idle_near_a_session(schedule, now):
+    assert schedule.poll_delay(LIVE, IDLE, at(now)) == IDLE
+
+
+def test_sleeps_until_just_before_the_next_session(schedule):
+    # the next session counts as current from 11:20, ten minutes before its start
+    assert schedule.poll_delay(LIVE, IDLE, at("2025-07-25T08:00:00")) == 3 * 3600 + 20 * 60
+    assert schedule.poll_delay(LIVE, IDLE, at("2025-07-25T11:19:00")) == 60
+    # but never for less than the live cadence
+    assert schedule.poll_delay(LIVE, IDLE, at("2025-07-25T11:19:58")) == LIVE
+
+
+def test_long_sleeps_are_capped(schedule):
+    assert schedule.poll_delay(LIVE, IDLE, at("2025-07-10T00:00:00")) == MAX_POLL_SLEEP
+    assert schedule.poll_delay(LIVE, IDLE, at("2025-06-01T00:00:00")) == MAX_POLL_SLEEP
+    # and after the last session
+    assert schedule.poll_delay(LIVE, IDLE, at("2025-08-01T00:00:00")) == MAX_POLL_SLEEP
+
+
+def test_session_for_filter(schedule):
+    assert schedule.session_key_for("race", at("2025-07-20T00:00:00")) == 1
+    assert schedule.session_key_for(None, at("2025-07-25T11:25:00")) == 2
+    assert schedule.session_key_for("qualifying", at("2025-07-20T00:00:00")) is None
@@ -0,0 +1,172 @@
+import threading
+import time
+
+import pytest
+
+import swr_cache
+from disk_store import DiskStore
+from swr_cache import RefreshAheadCache, refresh_ahead
+
+
+class Clock:
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def time(self):
+        return self.now
+
+    def perf_counter(self):
+        return time.perf_counter()
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(swr_cache, "time", clock)
+    return clock
+
+
+class Loader:
+    def __init__(self, *results):
+        self.results = list(results)
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        result = self.results.pop(0) if len(self.results) > 1 else self.results[0]
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+
+def wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.01)
+
+
+def test_fresh_entry_is_served_without_loading(clock):
+    cache = RefreshAheadCache(maxsize=4, ttl=60)
+    load = Loader("a", "b")
+    assert cache.get_or_load("k", load) == "a"
+    clock.now += 59
+    assert cache.get_or_load("k", load) == "a"
+    assert load.calls == 1
+
+
+def test_expired_entry_is_served_stale_while_it_refreshes(clock):
+    cache = RefreshAheadCache(maxsize=4, ttl=60)
+    load = Loader("a", "b")
+    cache.get_or_load("k", load)
+    clock.now += 61
+    assert cache.describe("k")["Stale"]
+    assert cache.get_or_load("k", load) == "a"
+    wait_for(lambda: cache.peek("k")[0] == "b")
+    assert cache.get_or_load("k", load) == "b"
+    assert not cache.describe("k")["Stale"]
+
+
+def test_concurrent_misses_load_once(clock):
+    cache = RefreshAheadCache(maxsize=4, ttl=60)
+    release = threading.Event()
+    calls = []
+
+    def load():
+        calls.append(1)
+        release.wait(5)
+        return "a"
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get_or_load("k", load))) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    wait_for(lambda: calls)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+    assert results == ["a"] * 4 and len(calls) == 1
+
+
+def test_failure_value_is_not_cached_and_not_retried_until_retry_after(clock):
+    cache = RefreshAheadCache(maxsize=4, ttl=60, retry_after=30)
+    load = Loader({"error": "down"}, "a")
+    failed = lambda value: isinstance(value, dict) and "error" in value
+    assert cache.get_or_load("k", load, failed) == {"error": "down"}
+    assert "k" not in cache
+    clock.now += 29
+    assert cache.get_or_load("k", load, failed) == {"error": "down"}
+    assert load.calls == 1
+    clock.now += 1
+    assert cache.get_or_load("k", load, failed) == "a"
+    assert "k" in cache
+
+
+def test_exception_is_raised_again_until_retry_after(clock):
+    cache = RefreshAheadCache(maxsize=4, ttl=60, retry_after=30)
+    load = Loader(RuntimeError("down"), "a")
+    for _ in range(2):
+        with pytest.raises(RuntimeError):
+            cache.get_or_load("k", load)
+    assert load.calls == 1
+    clock.now += 30
+    assert cache.get_or_load("k", load) == "a"
+
+
+def test_failed_refresh_keeps_the_last_good_value(clock):
+    cache = RefreshAheadCache(maxsize=4, ttl=60, retry_after=30)
+    load = Loader("a", RuntimeError("down"), "b")
+    cache.get_or_load("k", load)
+    clock.now += 61
+    assert cache.get_or_load("k", load) == "a"
+    wait_for(lambda: load.calls == 2 and not cache._flights)
+    # still stale, but no new refresh until retry_after has passed
+    assert cache.get_or_load("k", load) == "a"
+    assert load.calls == 2
+    clock.now += 30
+    cache.get_or_load("k", load)
+    wait_for(lambda: cache.peek("k")[0] == "b")
+
+
+def test_entries_and_failure_records_are_bounded(clock):
+    cache = RefreshAheadCache(maxsize=2, ttl=60)
+    for key in range(4):
+        cache.get_or_load(key, Loader(key))
+    assert len(cache) == 2 and 0 not in cache and 3 in cache
+    for key in range(4):
+        with pytest.raises(RuntimeError):
+            cache.get_or_load(("bad", key), Loader(RuntimeError("down")))
+    assert len(cache._failures) == 2
+
+
+def test_restart_serves_from_disk_and_refreshes(clock, tmp_path):
+    store = DiskStore(str(tmp_path / "cache.sqlite"))
+    first = RefreshAheadCache(maxsize=4, ttl=60, store=store, name="test")
+    first.get_or_load("k", Loader("a"))
+
+    clock.now += 120
+    second = RefreshAheadCache(maxsize=4, ttl=60, store=store, name="test")
+    release = threading.Event()
+
+    def load():
+        release.wait(5)
+        return "b"
+
+    assert second.get_or_load("k", load) == "a"
+    assert second.describe("k")["Source"] == "disk"
+    release.set()
+    wait_for(lambda: second.peek("k")[0] == "b")
+    assert second.describe("k")["Source"] == "upstream"
+
+
+def test_refresh_ahead_decorator_keys_on_arguments(clock):
+    calls = []
+
+    @refresh_ahead(RefreshAheadCache(maxsize=4, ttl=60))
+    def square(n):
+        calls.append(n)
+        return n * n
+
+    assert [square(2), square(3), square(2)] == [4, 9, 4]
+    assert calls == [2, 3]
+    assert square.cached(3) == 9 and square.cached(4) is None
@@ -0,0 +1,71 @@
+import math
+
+import pytest
+
+from timing_engine import LAP_WINDOW, TimingEngine, parse_gap
+
+
+def laps(number, first, last, untimed=()):
+    return [
+        {"driver_number": number, "lap_number": lap, "lap_duration": None if lap in untimed else 90.0 + number / 100}
+        for lap in range(first, last + 1)
+    ]
+
+
+def test_no_laps_starts_at_lap_one():
+    timing = TimingEngine()
+    assert timing.lap_cursor() == 1
+    assert timing.lagging_cursors() == {}
+
+
+def test_cursor_is_the_oldest_lap_without_a_time():
+    timing = TimingEngine()
+    timing.ingest_laps(laps(1, 1, 5, untimed={5}) + laps(44, 1, 4, untimed={4}))
+    assert timing.lap_cursor() == 4
+    timing.ingest_laps(laps(44, 4, 4))
+    assert timing.lap_cursor() == 5
+
+
+def test_untimed_lap_stops_holding_the_cursor_two_laps_later():
+    timing = TimingEngine()
+    # lap 2 (say, under red flag) never gets a time
+    timing.ingest_laps(laps(1, 1, 3, untimed={2, 3}))
+    assert timing.lap_cursor() == 2
+    timing.ingest_laps(laps(1, 4, 4, untimed={4}))
+    assert timing.lap_cursor() == 3
+
+
+def test_lapped_driver_gets_their_own_cursor():
+    timing = TimingEngine()
+    timing.ingest_laps(laps(1, 1, 10, untimed={10}) + laps(2, 1, 10 - LAP_WINDOW - 1, untimed={10 - LAP_WINDOW - 1}))
+    assert timing.lap_cursor() == 10
+    assert timing.lagging_cursors() == {2: 10 - LAP_WINDOW - 1}
+    # a driver exactly LAP_WINDOW laps behind still holds the main cursor
+    timing.ingest_laps(laps(2, 10 - LAP_WINDOW, 10 - LAP_WINDOW, untimed={10 - LAP_WINDOW}))
+    assert timing.lap_cursor() == 10 - LAP_WINDOW - 1
+    assert timing.lagging_cursors() == {}
+
+
+def test_describe_uses_best_laps_without_intervals():
+    timing = TimingEngine()
+    timing.ingest_laps([
+        {"driver_number": 1, "lap_number": 1, "lap_duration": 90.0},
+        {"driver_number": 44, "lap_number": 1, "lap_duration": 90.5},
+    ])
+    rows = timing.describe([1, 44])
+    assert rows[1][:2] == ("Leader", "Leader")
+    assert rows[44][:5] == ("+0.500", "+0.500", 1, "1:30.500", "1:30.500")
+
+
+@pytest.mark.parametrize("value, expected", [
+    (None, (math.nan, 0)),
+    (1.5, (1.5, 0)),
+    ("+1 LAP", (math.nan, 1)),
+    ("+3 LAPS", (math.nan, 3)),
+    ("0.75", (0.75, 0)),
+    ("garbage", (math.nan, 0)),
+])
+def test_parse_gap(value, expected):
+    seconds, laps_behind = parse_gap(value)
+    assert laps_behind == expected[1]
+    assert seconds == pytest.approx(expected[0], nan_ok=True)
@@ -0,0 +1,33 @@
+import pytest
+
+import wire_format
+from wire_format import FIELD_IDS, FIELD_NAMES, compact, expand
+
+
+def test_field_ids_are_unique():
+    assert len(FIELD_NAMES) == len(FIELD_IDS)
+
+
+def test_compact_expand_round_trip():
+    payload = {
+        "session": {"session_key": 9999},
+        "drivers": [
+            {"Driver Number": 1, "Code": "VER", "Gap to Car Ahead": "Leader", "Sector Deltas": [0.1, None, 0.0]},
+            {"Driver Number": 44, "Code": "HAM", "Gap to Car Ahead": "+1.234", "Sector Deltas": [None, None, None]},
+        ],
+        "unknown key": {"x": 1.5},
+    }
+    compacted = compact(payload)
+    assert compacted[FIELD_IDS["drivers"]][0][FIELD_IDS["Code"]] == "VER"
+    # names missing from the table pass through unchanged
+    assert compacted["unknown key"] == {FIELD_IDS["x"]: 1.5}
+    assert expand(compacted) == payload
+
+
+def test_msgpack_round_trip():
+    if wire_format.msgpack is None:
+        pytest.skip("msgpack is not installed")
+    payload = [{"car_number": 44, "samples": [["2025-07-06T14:30:00+00:00", 1.0, 2.0, 3.0]]}]
+    body = wire_format.encode_msgpack(payload)
+    assert wire_format.decode_msgpack(body) == payload
+    assert b"car_number" not in body
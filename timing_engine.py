@@ -0,0 +1,181 @@
+import re
+
+import numpy as np
+
+# Lap, sector and interval state for every driver in the current session.
+#
+# OpenF1 `/position` rows only carry a position, so gaps and lap counts come
+# from `/laps` and `/intervals`, fed in incrementally by the live timing poller.
+# State lives in arrays preallocated for every possible car number (indexed by
+# the number itself), so each batch is O(rows) to apply and O(drivers) to
+# re-derive session bests; nothing grows over a session.
+#
+# Gaps follow OpenF1's `/intervals` (races and sprints). Sessions without
+# intervals (practice, qualifying) fall back to best-lap deltas: gap to the
+# fastest lap, and to the car ahead in the running order.
+
+MAX_DRIVER_NUMBER = 100
+SECTORS = 3
+# Drivers this many laps behind the leader stop holding back the laps cursor;
+# their laps are polled per driver instead (see lagging_cursors)
+LAP_WINDOW = 3
+
+LAPS_BEHIND = re.compile(r"\+?\s*(\d+)\s*LAPS?", re.IGNORECASE)
+
+
+def lap_time_text(seconds):
+    if seconds is None or np.isnan(seconds):
+        return "N/A"
+    minutes, rest = divmod(float(seconds), 60)
+    return f"{int(minutes)}:{rest:06.3f}" if minutes else f"{rest:.3f}"
+
+
+def gap_text(seconds, laps):
+    if laps:
+        return f"+{laps} LAP" if laps == 1 else f"+{laps} LAPS"
+    if np.isnan(seconds):
+        return "N/A"
+    return f"{seconds:+.3f}"
+
+
+# OpenF1 gap values are seconds, "+N LAP(S)" strings or null: (seconds, laps)
+def parse_gap(value):
+    if value is None:
+        return np.nan, 0
+    if isinstance(value, (int, float)):
+        return float(value), 0
+    match = LAPS_BEHIND.search(str(value))
+    if match:
+        return np.nan, int(match.group(1))
+    try:
+        return float(value), 0
+    except ValueError:
+        return np.nan, 0
+
+
+def _number(row):
+    number = row.get("driver_number")
+    if isinstance(number, int) and 0 <= number < MAX_DRIVER_NUMBER:
+        return number
+    return None
+
+
+def _seconds(value):
+    return float(value) if isinstance(value, (int, float)) else np.nan
+
+
+class TimingEngine:
+    def __init__(self, size=MAX_DRIVER_NUMBER):
+        self.size = size
+        self.seen = np.zeros(size, dtype=bool)
+        # highest lap number seen, and laps with a recorded lap time
+        self.current_lap = np.zeros(size, dtype=np.int32)
+        self.laps_completed = np.zeros(size, dtype=np.int32)
+        self.last_lap = np.full(size, np.nan)
+        self.best_lap = np.full(size, np.nan)
+        # sectors of the newest lap seen (partial while it is in progress)
+        self.sectors_lap = np.zeros(size, dtype=np.int32)
+        self.last_sectors = np.full((size, SECTORS), np.nan)
+        self.best_sectors = np.full((size, SECTORS), np.nan)
+        self.gap_to_leader = np.full(size, np.nan)
+        self.gap_laps = np.zeros(size, dtype=np.int32)
+        self.interval = np.full(size, np.nan)
+        self.interval_laps = np.zeros(size, dtype=np.int32)
+        self.has_intervals = np.zeros(size, dtype=bool)
+        self.session_best_lap = np.nan
+        self.session_best_sectors = np.full(SECTORS, np.nan)
+
+    def reset(self):
+        self.__init__(self.size)
+
+    def ingest_laps(self, rows):
+        for row in rows:
+            number, lap = _number(row), row.get("lap_number")
+            if number is None or not isinstance(lap, int):
+                continue
+            self.seen[number] = True
+            self.current_lap[number] = max(self.current_lap[number], lap)
+
+            sectors = [_seconds(row.get(f"duration_sector_{k}")) for k in range(1, SECTORS + 1)]
+            if lap >= self.sectors_lap[number]:
+                self.sectors_lap[number] = lap
+                self.last_sectors[number] = sectors
+            self.best_sectors[number] = np.fmin(self.best_sectors[number], sectors)
+
+            duration = _seconds(row.get("lap_duration"))
+            if np.isnan(duration):
+                continue
+            if lap >= self.laps_completed[number]:
+                self.laps_completed[number] = lap
+                self.last_lap[number] = duration
+            self.best_lap[number] = np.fmin(self.best_lap[number], duration)
+
+        self.session_best_lap = np.fmin.reduce(self.best_lap)
+        self.session_best_sectors = np.fmin.reduce(self.best_sectors, axis=0)
+
+    def ingest_intervals(self, rows):
+        for row in sorted(rows, key=lambda row: row.get("date") or ""):
+            number = _number(row)
+            if number is None:
+                continue
+            self.seen[number] = True
+            self.has_intervals[number] = True
+            self.gap_to_leader[number], self.gap_laps[number] = parse_gap(row.get("gap_to_leader"))
+            self.interval[number], self.interval_laps[number] = parse_gap(row.get("interval"))
+
+    # Each driver's oldest lap still open. A lap counts as open until it has a
+    # lap time, or until the driver is two laps further on: out-laps and laps
+    # under red flag or safety car may never get a time, and must not hold the
+    # cursor back for the rest of the session.
+    def _open_laps(self):
+        return np.maximum(self.laps_completed + 1, self.current_lap - 1)
+
+    # Drivers on track and within LAP_WINDOW laps of the leader
+    def _in_window(self):
+        return (self.current_lap > 0) & (self.current_lap >= self.current_lap.max() - LAP_WINDOW)
+
+    # First lap number the next `/laps` poll needs: the oldest open lap of any
+    # driver within LAP_WINDOW laps of the leader
+    def lap_cursor(self):
+        if not self.current_lap.max():
+            return 1
+        return int(self._open_laps()[self._in_window()].min())
+
+    # {number: oldest open lap} for the drivers further behind, whose laps
+    # lap_cursor() no longer covers; each is polled with its own cursor
+    def lagging_cursors(self):
+        lagging = np.flatnonzero((self.current_lap > 0) & ~self._in_window())
+        open_laps = self._open_laps()
+        return {int(number): int(open_laps[number]) for number in lagging}
+
+    # {number: (gap to car ahead, gap to leader, laps, last lap, best lap,
+    # sector deltas to session best)} for drivers in running `order`
+    def describe(self, order):
+        rows = {}
+        ahead = None
+        for number in order:
+            if not (isinstance(number, int) and 0 <= number < self.size):
+                continue
+            if self.has_intervals[number]:
+                interval = gap_text(self.interval[number], self.interval_laps[number])
+                leader_gap = gap_text(self.gap_to_leader[number], self.gap_laps[number])
+            else:
+                best = self.best_lap[number]
+                interval = gap_text(best - self.best_lap[ahead], 0) if ahead is not None else "N/A"
+                leader_gap = gap_text(best - self.session_best_lap, 0)
+            if ahead is None:
+                interval = "Leader"
+                if leader_gap in ("+0.000", "N/A"):
+                    leader_gap = "Leader"
+
+            deltas = self.last_sectors[number] - self.session_best_sectors
+            rows[number] = (
+                interval,
+                leader_gap,
+                int(self.laps_completed[number]),
+                lap_time_text(self.last_lap[number]),
+                lap_time_text(self.best_lap[number]),
+                tuple(None if np.isnan(delta) else round(float(delta), 3) for delta in deltas),
+            )
+            ahead = number
+        return rows
@@ -0,0 +1,157 @@
+import os
+import random
+import threading
+import time
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from metrics import Counter, Gauge, Histogram
+
+# Shared HTTP client for every upstream call (OpenF1, Jolpica, Open-Meteo).
+#
+# One keep-alive `requests.Session` per host reuses TCP+TLS connections across
+# polls, every call gets a bounded (connect, read) timeout, transient failures
+# are retried with jittered exponential backoff, and a per-host circuit breaker
+# fails fast while an upstream is down instead of tying up a thread per call.
+
+DEFAULT_TIMEOUT = (3.05, 10)
+POOL_SIZE = 8
+MAX_RETRIES = 2
+BACKOFF_BASE = 0.5
+BACKOFF_CAP = 8.0
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+# Consecutive failures before a host's breaker opens, and how long it stays open
+BREAKER_THRESHOLD = 5
+BREAKER_COOLDOWN = 30.0
+
+
+class UpstreamUnavailable(requests.exceptions.ConnectionError):
+    pass
+
+
+class CircuitBreaker:
+    def __init__(self, threshold=BREAKER_THRESHOLD, cooldown=BREAKER_COOLDOWN):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_at = None
+        self._lock = threading.Lock()
+
+    # Closed: always allow. Open: refuse until the cooldown has elapsed, then
+    # let a single trial call through (half-open).
+    def allow(self):
+        with self._lock:
+            if self.opened_at is None:
+                return True
+            if time.monotonic() - self.opened_at >= self.cooldown:
+                self.opened_at = time.monotonic()
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.failures >= self.threshold:
+                self.opened_at = time.monotonic()
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return "closed"
+        return "half-open" if time.monotonic() - self.opened_at >= self.cooldown else "open"
+
+
+# Optional response recorder (recorder.Recorder), enabled by UPSTREAM_RECORD
+recorder = None
+if os.environ.get("UPSTREAM_RECORD"):
+    from recorder import Recorder
+
+    hosts = [host for host in os.environ.get("UPSTREAM_RECORD_HOSTS", "").split(",") if host]
+    recorder = Recorder(os.environ["UPSTREAM_RECORD"], hosts)
+
+UPSTREAM_SECONDS = Histogram("upstream_request_duration_seconds", "Upstream HTTP attempt latency, by host.", ("host",))
+UPSTREAM_REQUESTS = Counter(
+    "upstream_requests_total",
+    "Upstream HTTP attempts by host and outcome (ok, http_error, retried, connection_error, circuit_open).",
+    ("host", "outcome"),
+)
+UPSTREAM_CIRCUIT_OPEN = Gauge("upstream_circuit_open", "1 while a host's circuit breaker is open or half-open.", ("host",))
+OUTCOMES = ("ok", "http_error", "retried", "connection_error", "circuit_open")
+
+_sessions = {}
+_breakers = {}
+# host -> (latency histogram child, {outcome: counter child})
+_metrics = {}
+_registry_lock = threading.Lock()
+
+
+def _host_state(host):
+    with _registry_lock:
+        session = _sessions.get(host)
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=POOL_SIZE, max_retries=0)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            breaker = CircuitBreaker()
+            _sessions[host] = session
+            _breakers[host] = breaker
+            _metrics[host] = (
+                UPSTREAM_SECONDS.labels(host),
+                {outcome: UPSTREAM_REQUESTS.labels(host, outcome) for outcome in OUTCOMES},
+            )
+            UPSTREAM_CIRCUIT_OPEN.labels(host).set_function(lambda: int(breaker.state != "closed"))
+        return session, _breakers[host], _metrics[host]
+
+
+def breaker_for(url):
+    return _host_state(urlsplit(url).netloc)[1]
+
+
+def backoff_delay(attempt):
+    return random.uniform(0, min(BACKOFF_CAP, BACKOFF_BASE * (2 ** attempt)))
+
+
+# GET `url` through the pooled session for its host.
+# Returns the final `requests.Response`; callers still call `raise_for_status()`.
+# Raises `UpstreamUnavailable` while the host's breaker is open, or the last
+# connection/timeout error once retries are exhausted.
+def get(url, params=None, timeout=DEFAULT_TIMEOUT, retries=MAX_RETRIES, **kwargs):
+    host = urlsplit(url).netloc
+    session, breaker, (latency, outcomes) = _host_state(host)
+
+    for attempt in range(retries + 1):
+        if not breaker.allow():
+            outcomes["circuit_open"].inc()
+            raise UpstreamUnavailable(f"circuit open for {host}")
+        start = time.perf_counter()
+        try:
+            response = session.get(url, params=params, timeout=timeout, **kwargs)
+        except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+            latency.observe(time.perf_counter() - start)
+            breaker.record_failure()
+            if attempt == retries:
+                outcomes["connection_error"].inc()
+                raise
+        else:
+            latency.observe(time.perf_counter() - start)
+            if response.status_code not in RETRY_STATUSES:
+                breaker.record_success()
+                outcomes["ok" if response.status_code < 400 else "http_error"].inc()
+                if recorder is not None:
+                    recorder.record(response)
+                return response
+            breaker.record_failure()
+            if attempt == retries:
+                outcomes["http_error"].inc()
+                return response
+        outcomes["retried"].inc()
+        time.sleep(backoff_delay(attempt))
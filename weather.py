@@ -0,0 +1,130 @@
+from bisect import bisect_right
+import threading
+import time
+
+import requests
+
+import upstream
+
+# Current conditions and hourly forecasts for every calendar circuit.
+#
+# One Open-Meteo request covers all circuits (it accepts comma-separated
+# latitude/longitude lists and answers with one result per location, in
+# order). Results are keyed by circuit ID, swapped in as one dict, and
+# persisted to the DiskStore so a restart has weather straight away. Lookups
+# never touch the network: server.py refreshes the service from a supervised
+# poller in one process per host and relays the result to the others (see
+# state_bus.py), and /f1info.json only reads what is already here.
+
+DEFAULT_WEATHER = "🌤️ ?°C"
+FORECAST_DAYS = 14
+CURRENT_FIELDS = ("temperature_2m", "weather_code")
+HOURLY_FIELDS = ("temperature_2m", "precipitation_probability", "weather_code")
+STORE_KEY = "weather:circuits"
+# Spacing of the hourly forecast slots
+FORECAST_SLOT_SECONDS = 3600
+
+WEATHER_ICONS = {
+    0: "☀️", 1: "🌤️", 2: "⛅", 3: "☁️", 45: "🌫️", 48: "🌫️",
+    51: "🌦️", 53: "🌦️", 55: "🌧️", 61: "🌧️", 63: "🌧️", 65: "🌧️",
+    71: "🌨️", 73: "🌨️", 75: "❄️", 95: "⛈️", 96: "⛈️", 99: "⛈️"
+}
+
+
+def weather_text(temperature, weather_code):
+    icon = WEATHER_ICONS.get(weather_code or 0, "🌡️")
+    return f"{icon} {'?' if temperature is None else temperature}°C"
+
+
+class WeatherService:
+    def __init__(self, base, circuits, store=None, timeout=10):
+        self.base = base
+        # circuit ID -> (lat, lon)
+        self.circuits = dict(circuits)
+        self.store = store
+        self.timeout = timeout
+        # circuit ID -> {"current": {...}, "hourly": {...}}
+        self.conditions = {}
+        self.fetched_at = None
+        self._lock = threading.Lock()
+        self._load_from_disk()
+
+    def _load_from_disk(self):
+        saved = self.store.get(STORE_KEY) if self.store is not None else None
+        if saved:
+            self.conditions, self.fetched_at = saved
+
+    # Install conditions fetched elsewhere (relayed by the polling process)
+    def load(self, conditions, fetched_at):
+        with self._lock:
+            if self.fetched_at is None or fetched_at > self.fetched_at:
+                self.conditions, self.fetched_at = conditions, fetched_at
+
+    def age(self, now=None):
+        return None if self.fetched_at is None else (now or time.time()) - self.fetched_at
+
+    # Fetch every circuit in one request; False (keeping the old data) on failure
+    def refresh(self):
+        ids = list(self.circuits)
+        if not ids:
+            return False
+        params = {
+            "latitude": ",".join(str(self.circuits[i][0]) for i in ids),
+            "longitude": ",".join(str(self.circuits[i][1]) for i in ids),
+            "current": ",".join(CURRENT_FIELDS),
+            "hourly": ",".join(HOURLY_FIELDS),
+            "timeformat": "unixtime",
+            "timezone": "UTC",
+            "forecast_days": FORECAST_DAYS,
+        }
+        with self._lock:
+            try:
+                response = upstream.get(f"{self.base}/forecast", params=params, timeout=self.timeout)
+                response.raise_for_status()
+                results = response.json()
+            except (requests.exceptions.RequestException, ValueError) as e:
+                print(f"Weather fetch failed: {e}")
+                return False
+            # a single location comes back as one object rather than a list
+            if isinstance(results, dict):
+                results = [results]
+            if len(results) != len(ids):
+                print(f"Weather fetch returned {len(results)} locations for {len(ids)} circuits")
+                return False
+            conditions = {
+                circuit: {
+                    "current": {field: result.get("current", {}).get(field) for field in CURRENT_FIELDS},
+                    "hourly": {field: result.get("hourly", {}).get(field) or [] for field in ("time",) + HOURLY_FIELDS},
+                }
+                for circuit, result in zip(ids, results)
+            }
+            self.conditions, self.fetched_at = conditions, time.time()
+            if self.store is not None:
+                self.store.put(STORE_KEY, conditions, self.fetched_at)
+            return True
+
+    # "☀️ 27°C" for a circuit, or DEFAULT_WEATHER if nothing is known yet
+    def current(self, circuit_id):
+        current = self.conditions.get(circuit_id, {}).get("current")
+        if not current or current.get("temperature_2m") is None:
+            return DEFAULT_WEATHER
+        return weather_text(current["temperature_2m"], current.get("weather_code"))
+
+    # Hourly forecast slot covering UTC timestamp `ts`, or None beyond the forecast
+    def forecast_at(self, circuit_id, ts):
+        hourly = self.conditions.get(circuit_id, {}).get("hourly")
+        times = hourly["time"] if hourly else []
+        i = bisect_right(times, ts) - 1
+        if i < 0 or ts - times[i] >= FORECAST_SLOT_SECONDS:
+            return None
+        return {field: hourly[field][i] if i < len(hourly[field]) else None for field in HOURLY_FIELDS}
+
+    # Forecast summary for a session starting at `ts`, e.g. "🌦️ 19°C, 40% rain"
+    def session_forecast(self, circuit_id, ts):
+        slot = self.forecast_at(circuit_id, ts)
+        if slot is None:
+            return None
+        text = weather_text(slot["temperature_2m"], slot["weather_code"])
+        if slot["precipitation_probability"] is not None:
+            text += f", {slot['precipitation_probability']}% rain"
+        return text
@@ -0,0 +1,138 @@
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+# Compact response format for bandwidth- and CPU-constrained clients (LED
+# matrices, microcontrollers).
+#
+# Clients that send `Accept: application/msgpack` (or `?format=msgpack`) get the
+# same payload as the JSON endpoints, encoded as MessagePack with every known
+# field name replaced by a small integer ID from FIELD_IDS below. IDs under 128
+# encode as a single byte, so "Gap to Car Ahead" costs 1 byte instead of 18.
+# Keys not in the table (and all values) are passed through unchanged.
+#
+# The table is append-only: an ID is never reused or renumbered, so clients
+# built against an older table keep working. Python clients can decode with
+# msgpack.unpackb(body, strict_map_key=False) and FIELD_NAMES.
+#
+# Without the `msgpack` package installed the endpoints simply keep serving JSON.
+
+MSGPACK_MIMETYPE = "application/msgpack"
+JSON_MIMETYPE = "application/json"
+
+FIELD_IDS = {
+    # /live_session_data
+    "session": 1,
+    "drivers": 2,
+    "team_radio": 3,
+    "race_control": 4,
+    "message": 5,
+    "Driver Number": 6,
+    "Code": 7,
+    "Gap to Car Ahead": 8,
+    "Laps Completed": 9,
+    "Position": 10,
+    "Lap Indicator": 11,
+    "Driver": 12,
+    "Radio Message": 13,
+    "Category": 14,
+    "Message": 15,
+    "Time UTC": 16,
+    "Gap to Leader": 17,
+    "Last Lap": 18,
+    "Best Lap": 19,
+    "Sector Deltas": 26,
+    "Recording URL": 27,
+    # /position.json
+    "car_number": 20,
+    "x": 21,
+    "y": 22,
+    "z": 23,
+    "date": 24,
+    "samples": 25,
+    # /f1info.json
+    "Race": 30,
+    "Name": 31,
+    "Circuit-Name": 32,
+    "Location": 33,
+    "Country": 34,
+    "Weather": 35,
+    "CountdownToNextSession": 36,
+    "CountdownToRace": 37,
+    "NextSession": 38,
+    "Calender": 39,
+    "Circuit": 40,
+    "DateRange": 41,
+    "Sessions": 42,
+    "name": 43,
+    "status": 44,
+    "datetime_utc": 45,
+    "datetime_local": 46,
+    "Drivers": 47,
+    "Constructors": 48,
+    "Last Winner": 49,
+    "Meta": 50,
+    "AsOf": 51,
+    "Stale": 52,
+    "Source": 53,
+    "forecast": 54,
+    # shared
+    "error": 60,
+    # /live_session_data/events
+    "events": 61,
+    "next_since": 62,
+    "has_more": 63,
+    "session_key": 64,
+    "ID": 65,
+    "Type": 66,
+    "Flag": 67,
+    "Lap": 68,
+    "Scope": 69,
+    "Sector": 70,
+}
+
+FIELD_NAMES = {field_id: name for name, field_id in FIELD_IDS.items()}
+
+
+def available_formats():
+    return ("json", "msgpack") if msgpack is not None else ("json",)
+
+
+# "msgpack" or "json" for a request's ?format= argument and parsed Accept header
+# (a werkzeug MIMEAccept)
+def preferred_format(format_arg, accept_mimetypes):
+    if format_arg in available_formats():
+        return format_arg
+    if msgpack is not None and accept_mimetypes.best_match([JSON_MIMETYPE, MSGPACK_MIMETYPE]) == MSGPACK_MIMETYPE:
+        return "msgpack"
+    return "json"
+
+
+# Replace known field names by their IDs, recursively
+def compact(value):
+    if isinstance(value, dict):
+        return {FIELD_IDS.get(key, key): compact(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [compact(item) for item in value]
+    return value
+
+
+def expand(value):
+    if isinstance(value, dict):
+        return {FIELD_NAMES.get(key, key): expand(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [expand(item) for item in value]
+    return value
+
+
+def encode_msgpack(payload):
+    return msgpack.packb(compact(payload), use_bin_type=True)
+
+
+def decode_msgpack(body):
+    return expand(msgpack.unpackb(body, raw=False, strict_map_key=False))
+
+
+def mimetype_for(fmt):
+    return MSGPACK_MIMETYPE if fmt == "msgpack" else JSON_MIMETYPE